@@ -18,7 +18,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
 
@@ -27,6 +27,7 @@ from services import smoke_orchestrator as smo
 from services.smoke_capacity import CapacityRules
 from services.smoke_paths import smoke_plan_excel_path
 from services.smoke_excel_service import write_smoke_plan_excel
+from services.smoke_plan_service import plan_slot_index
 
 
 Coord = Tuple[int, int, int]
@@ -49,6 +50,7 @@ class SmokePlanController:
         )
         self._plan_df: Optional[pd.DataFrame] = None
         self._selected_df: Optional[pd.DataFrame] = None
+        self._slots: Dict[Coord, int] = {}   # coord -> index řádku plan_df
 
     # ======================== PŘEDVYPLNĚNÍ ========================
     def prefill(self, selected_items_df: pd.DataFrame) -> pd.DataFrame:
@@ -59,11 +61,15 @@ class SmokePlanController:
         plan_df = smo.build_plan_df(selected_items_df,
                                     week_monday=self._state.week_monday,
                                     rules=self._state.rules)  # type: ignore[arg-type]
-        self._plan_df = plan_df
+        self._set_plan(plan_df)
         return plan_df.copy()
 
     def load_plan(self, plan_df: pd.DataFrame) -> None:
-        self._plan_df = plan_df.copy()
+        self._set_plan(plan_df.copy())
+
+    def _set_plan(self, plan_df: pd.DataFrame) -> None:
+        self._plan_df = plan_df
+        self._slots = plan_slot_index(plan_df, self._state.week_monday)
 
     def plan_df(self) -> pd.DataFrame:
         if self._plan_df is None:
@@ -81,17 +87,8 @@ class SmokePlanController:
     def _find_row_index(self, coord: Coord) -> Optional[int]:
         if self._plan_df is None or self._plan_df.empty:
             return None
-        day_idx, smoker_idx, row_idx = coord
-        df = self._plan_df
-        # ve storage je udirna/pozice 1-based, dny držíme přes datum
-        day_date = pd.Timestamp(self._state.week_monday) + pd.Timedelta(days=day_idx)
-        mask = (
-            (pd.to_datetime(df["datum"]).dt.date == day_date.date()) &
-            (df["udirna"] == (smoker_idx + 1)) &
-            (df["pozice"] == (row_idx + 1))
-        )
-        idx = df[mask].index
-        return int(idx[0]) if len(idx) else None
+        # O(1) z indexu slotů (staví se v prefill/load_plan)
+        return self._slots.get(self._key_tuple(*coord))
 
     def apply_move(self, src: Coord, dst: Coord) -> None:
         """Vymění obsah dvou slotů (swap)."""
@@ -106,9 +103,8 @@ class SmokePlanController:
             "mnozstvi", "jednotka", "poznamka", "meat_type", "part_index", "shift",
         ]
         df = self._plan_df
-        tmp = df.loc[a, cols_payload].copy()
-        df.loc[a, cols_payload] = df.loc[b, cols_payload].values
-        df.loc[b, cols_payload] = tmp.values
+        cols_payload = [c for c in cols_payload if c in df.columns]   # 'shift' mívá jen plán z Excelu
+        df.loc[[a, b], cols_payload] = df.loc[[b, a], cols_payload].to_numpy()
 
     def set_note(self, coord: Coord, text: str) -> None:
         if self._plan_df is None:
@@ -116,7 +112,7 @@ class SmokePlanController:
         i = self._find_row_index(coord)
         if i is None:
             return
-        self._plan_df.loc[i, "poznamka"] = text
+        self._plan_df.at[i, "poznamka"] = text
 
     def set_dose(self, coord: Coord, qty: Optional[float], unit: Optional[str]) -> None:
         if self._plan_df is None:
@@ -125,9 +121,9 @@ class SmokePlanController:
         if i is None:
             return
         # množství v plánu je per-slot
-        self._plan_df.loc[i, "mnozstvi"] = qty
+        self._plan_df.at[i, "mnozstvi"] = qty
         if unit is not None:
-            self._plan_df.loc[i, "jednotka"] = unit
+            self._plan_df.at[i, "jednotka"] = unit
 
     # ======================== ULOŽENÍ / SYNC ========================
     def save_excel(self, sheet_name: str = "Plan") -> str:
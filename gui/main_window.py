@@ -100,6 +100,9 @@ def run():
                     continue
 
     finally:
+        # čekající zápisy (write-behind) musí na disk i při pádu smyčky
+        with suppress(Exception):
+            graph_store.flush_pending()
         with suppress(Exception):
             window.close()
 
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+IngredientsTableModel – Qt model (QAbstractTableModel) nad DataFrame ingrediencí.
+
+QTableView si z modelu čte jen viditelné buňky, takže i tisíce nekoupených řádků
+se otevřou okamžitě. Po „Koupeno“ se řádky odeberou signály modelu
+(beginRemoveRows/endRemoveRows) – okno se znovu nestaví.
+
+Příprava řádků (`table_rows`) je bez Qt a sdílí ji i widgetový layout
+v gui/results_window (headless režim, testy).
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtGui import QBrush, QColor
+
+from services.data_utils import first_nonempty, fmt_cz_date, key_txt_series, to_bool_cell_excel
+
+AGG_DATE_PLACEHOLDER = "XX-XX-XXXX"
+
+# (titulek, klíč ve sloupcích table_rows); poslední sloupec je akce „Koupeno“
+COLUMNS: List[Tuple[str, str]] = [
+    ("Datum", "datum"),
+    ("SK", "sk"),
+    ("Reg.č.", "rc"),
+    ("Název", "nazev"),
+    ("Množství", "potreba"),
+    ("", "jednotka"),
+    ("Akce", "akce"),
+]
+ACTION_COL = len(COLUMNS) - 1
+ACTION_TEXT = "Koupeno"
+ACTION_BG = "#e6e6e6"
+
+Cells = Dict[str, List[str]]
+
+
+# ------------------------- příprava řádků (bez Qt) -------------------------
+def table_rows(df_full: pd.DataFrame, col_k: str, aggregate: bool = False) -> Tuple[Cells, List[List[int]]]:
+    """
+    Zobrazované řádky nekoupených ingrediencí.
+
+    Vrací (cells, src):
+      - cells: sloupec -> seznam textů (klíče viz COLUMNS, bez „akce“),
+      - src:   pro každý řádek seznam indexů df_full, které řádek reprezentuje.
+    """
+    df_full[col_k] = df_full[col_k].map(to_bool_cell_excel).astype(bool)
+    d = df_full.loc[~df_full[col_k]].copy()
+    if d.empty:
+        return {key: [] for _, key in COLUMNS[:ACTION_COL]}, []
+
+    if not aggregate:
+        if "datum" in d.columns:
+            d["_sort_datum"] = pd.to_datetime(d["datum"], errors="coerce")
+            d = d.sort_values("_sort_datum", na_position="last", kind="mergesort")
+
+        def _col(name):
+            vals = d[name].tolist() if name in d.columns else [""] * len(d)
+            return [str(v) for v in vals]
+
+        datum = d["datum"].tolist() if "datum" in d.columns else [""] * len(d)
+        cells = {
+            "datum": [fmt_cz_date(v) for v in datum],
+            "sk": _col("ingredience_sk"),
+            "rc": _col("ingredience_rc"),
+            "nazev": _col("nazev"),
+            "potreba": _col("potreba"),
+            "jednotka": _col("jednotka"),
+        }
+        return cells, [[int(i)] for i in d.index]
+
+    # -------- aggregate=True: součet přes data po normalizovaném (SK, RC) --------
+    d["_sk_key"] = key_txt_series(d["ingredience_sk"])
+    d["_rc_key"] = key_txt_series(d["ingredience_rc"])
+    d["_num_pot"] = pd.to_numeric(d["potreba"], errors="coerce").fillna(0.0)
+
+    g = (
+        d.groupby(["_sk_key", "_rc_key"], as_index=False)
+         .agg(
+             potreba=("_num_pot", "sum"),
+             nazev=("nazev", first_nonempty),
+             jednotka=("jednotka", first_nonempty),
+         )
+         .sort_values(["_sk_key", "_rc_key"], kind="mergesort")
+    )
+
+    # (norm. SK, norm. RC) -> indexy všech NEkoupených řádků (pozice v d -> index df_full)
+    labels = d.index.to_numpy()
+    members = {k: [int(i) for i in labels[pos]] for k, pos in d.groupby(["_sk_key", "_rc_key"]).indices.items()}
+
+    sk = [str(v).strip() for v in g["_sk_key"].tolist()]
+    rc = [str(v).strip() for v in g["_rc_key"].tolist()]
+    cells = {
+        "datum": [AGG_DATE_PLACEHOLDER] * len(g),
+        "sk": sk,
+        "rc": rc,
+        "nazev": [str(v).strip() for v in g["nazev"].tolist()],
+        "potreba": [str(v) for v in g["potreba"].tolist()],
+        "jednotka": [str(v).strip() for v in g["jednotka"].tolist()],
+    }
+    return cells, [members.get(k, []) for k in zip(sk, rc)]
+
+
+# ------------------------- Qt model -------------------------
+class IngredientsTableModel(QAbstractTableModel):
+    def __init__(self, df_full: pd.DataFrame, col_k: str, aggregate: bool = False, parent=None):
+        super().__init__(parent)
+        self._cells: Cells = {}
+        self._src: List[List[int]] = []
+        self.set_frame(df_full, col_k, aggregate)
+
+    # ------------------- data -------------------
+    def set_frame(self, df_full: pd.DataFrame, col_k: str, aggregate: bool = False) -> None:
+        """Přestaví řádky (např. přepnutí agregace) – view zůstává, jen se resetuje model."""
+        self.beginResetModel()
+        self._cells, self._src = table_rows(df_full, col_k, aggregate)
+        self.endResetModel()
+
+    def source_indices(self, row: int) -> List[int]:
+        return list(self._src[row]) if 0 <= row < len(self._src) else []
+
+    def remove_rows(self, rows: Iterable[int]) -> None:
+        """Odebere řádky (po souvislých blocích odzadu, aby se indexy neposouvaly)."""
+        rows = sorted({int(r) for r in rows if 0 <= int(r) < len(self._src)}, reverse=True)
+        i = 0
+        while i < len(rows):
+            last = first = rows[i]
+            while i + 1 < len(rows) and rows[i + 1] == first - 1:
+                i += 1
+                first = rows[i]
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._src[first:last + 1]
+            for col in self._cells.values():
+                del col[first:last + 1]
+            self.endRemoveRows()
+            i += 1
+
+    # ------------------- QAbstractTableModel -------------------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._src)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if col == ACTION_COL:
+                return ACTION_TEXT
+            return self._cells[COLUMNS[col][1]][row]
+        if role == Qt.TextAlignmentRole and col == ACTION_COL:
+            return int(Qt.AlignCenter)
+        if role == Qt.BackgroundRole and col == ACTION_COL:
+            return QBrush(QColor(ACTION_BG))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return COLUMNS[section][0] if 0 <= section < len(COLUMNS) else None
+        return None
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+SemisTreeModel – líný stromový model (QAbstractItemModel) pro okno „Plán polotovarů“.
+
+Úroveň 1 = řádky SK 300 (den nebo týden), úroveň 2 = výrobky SK 400 z listu Detaily.
+Podřádky se vytvoří až při rozbalení řádku (canFetchMore/fetchMore), QTreeView
+s uniformRowHeights čte jen viditelné řádky – otevření i na měsíc plánu je okamžité.
+Přepnutí den/týden jen vymění řádky modelu (reset), okno zůstává.
+
+Přípravu řádků (SemiRow) dělá gui/results_semis_window; model je jen zobrazuje.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Qt
+from PySide6.QtGui import QFont
+
+DetailKey = Tuple[str, str, object]   # (polotovar_sk, polotovar_rc, datum) – klíč detail_map
+
+COLUMNS = ["Datum", "Reg.č.", "Název", "Množství", "", "Výběr"]
+SELECT_COL = len(COLUMNS) - 1
+
+
+@dataclass
+class SemiRow:
+    """Jeden hlavní řádek (SK 300 za den/týden)."""
+    main: Dict[str, object]                  # datum (text), polotovar_sk/rc/nazev, potreba, jednotka
+    src: List[int]                           # indexy df_main, které řádek reprezentuje
+    detail_keys: List[DetailKey] = field(default_factory=list)
+    ready: bool = False                      # všechny listy podstromu koupené
+    pos: int = 0                             # pozice v modelu (pro parent())
+    children: Optional[List[dict]] = field(default=None, repr=False)  # detaily, až po rozbalení
+
+
+# ------------------------- formátování (sdílí i widgetový layout) -------------------------
+def fmt_qty_2dec_cz(v) -> str:
+    """
+    Naformátuje číslo na dvě desetinná místa s čárkou jako oddělovačem.
+    Vstup může být číslo nebo text s čárkou/tečkou.
+    Pokud nejde převést na číslo, vrátí původní text.
+    """
+    if v is None:
+        return ""
+    s = str(v).strip()
+    if s == "":
+        return ""
+    try:
+        f = float(s.replace(" ", "").replace(",", "."))
+        return f"{f:.2f}".replace(".", ",")
+    except Exception:
+        return s
+
+
+def detail_cells(d: dict) -> Tuple[str, str, str]:
+    """(RC výrobku, '↳ název', 'množství MJ') pro podřádek detailu."""
+    vyrobek_rc = str(d.get("vyrobek_rc", "") or d.get("final_rc", "")).strip()
+    name_raw = str(d.get("vyrobek_nazev", "") or d.get("final_nazev", "")).strip()
+    name_disp = f"↳ {name_raw or '(bez názvu)'}"
+
+    mnozstvi = fmt_qty_2dec_cz(d.get("mnozstvi", ""))
+    jednotka = str(d.get("jednotka", "")).strip()
+    return vyrobek_rc, name_disp, f"{mnozstvi} {jednotka}".strip()
+
+
+# ------------------------- Qt model -------------------------
+class SemisTreeModel(QAbstractItemModel):
+    _TOP = object()   # internalPointer hlavních řádků; podřádky nesou svůj SemiRow
+
+    def __init__(self, rows: List[SemiRow], detail_map: Dict[DetailKey, List[dict]], parent=None):
+        super().__init__(parent)
+        self._rows: List[SemiRow] = []
+        self._detail_map = detail_map or {}
+        self._checked: set = set()
+        self.set_rows(rows)
+
+    # ------------------- data -------------------
+    def set_rows(self, rows: List[SemiRow], detail_map: Optional[Dict[DetailKey, List[dict]]] = None) -> None:
+        """Vymění hlavní řádky (přepnutí den/týden); detaily se zase tvoří až při rozbalení."""
+        self.beginResetModel()
+        if detail_map is not None:
+            self._detail_map = detail_map
+        self._rows = list(rows)
+        for i, r in enumerate(self._rows):
+            r.pos = i
+            r.children = None
+        self._checked = set()
+        self.endResetModel()
+
+    def row_at(self, row: int) -> Optional[SemiRow]:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def set_checked(self, rows: Iterable[int], checked: bool = True) -> None:
+        for r in rows:
+            if self.row_at(r) is None:
+                continue
+            (self._checked.add if checked else self._checked.discard)(r)
+            ix = self.index(r, SELECT_COL)
+            self.dataChanged.emit(ix, ix, [Qt.CheckStateRole])
+
+    def selected_indices(self) -> List[int]:
+        """Uniq seřazené indexy df_main zaškrtnutých řádků (pro „Naplánovat“)."""
+        return sorted({int(i) for r in self._checked for i in self._rows[r].src})
+
+    def _details_of(self, r: SemiRow) -> List[dict]:
+        return [det for k in r.detail_keys for det in self._detail_map.get(k, [])]
+
+    def _has_details(self, r: SemiRow) -> bool:
+        if r.children is not None:
+            return bool(r.children)
+        return any(k in self._detail_map for k in r.detail_keys)
+
+    # ------------------- struktura stromu -------------------
+    def index(self, row, column, parent=QModelIndex()):
+        if not parent.isValid():
+            if 0 <= row < len(self._rows) and 0 <= column < len(COLUMNS):
+                return self.createIndex(row, column, self._TOP)
+            return QModelIndex()
+        if parent.internalPointer() is not self._TOP:
+            return QModelIndex()
+        owner = self.row_at(parent.row())
+        if owner is None or not owner.children or not (0 <= row < len(owner.children)):
+            return QModelIndex()
+        return self.createIndex(row, column, owner)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        owner = index.internalPointer()
+        if owner is self._TOP:
+            return QModelIndex()
+        return self.createIndex(owner.pos, 0, self._TOP)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if not parent.isValid():
+            return len(self._rows)
+        if parent.internalPointer() is not self._TOP or parent.column() != 0:
+            return 0
+        owner = self.row_at(parent.row())
+        return len(owner.children or []) if owner is not None else 0
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()) -> bool:
+        if not parent.isValid():
+            return bool(self._rows)
+        if parent.internalPointer() is not self._TOP or parent.column() != 0:
+            return False
+        owner = self.row_at(parent.row())
+        return owner is not None and self._has_details(owner)
+
+    def canFetchMore(self, parent) -> bool:
+        if not parent.isValid() or parent.internalPointer() is not self._TOP:
+            return False
+        owner = self.row_at(parent.row())
+        return owner is not None and owner.children is None and self._has_details(owner)
+
+    def fetchMore(self, parent) -> None:
+        """Materializuje detaily řádku (volá QTreeView při rozbalení)."""
+        if not self.canFetchMore(parent):
+            return
+        owner = self._rows[parent.row()]
+        children = self._details_of(owner)
+        if not children:
+            owner.children = []
+            return
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        owner.children = children
+        self.endInsertRows()
+
+    # ------------------- obsah -------------------
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        f = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.internalPointer() is self._TOP and index.column() == SELECT_COL:
+            f |= Qt.ItemIsUserCheckable
+        return f
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        owner = index.internalPointer()
+
+        if owner is not self._TOP:   # podřádek (detail)
+            if role != Qt.DisplayRole:
+                return None
+            rc, name, qty = detail_cells(owner.children[index.row()])
+            return {1: rc, 2: name, 3: qty}.get(col, "")
+
+        r = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            m = r.main
+            if col == 0:
+                return str(m.get("datum", ""))
+            if col == 1:
+                return str(m.get("polotovar_rc", ""))
+            if col == 2:
+                return str(m.get("polotovar_nazev", ""))
+            if col == 3:
+                return fmt_qty_2dec_cz(m.get("potreba", ""))
+            if col == 4:
+                return str(m.get("jednotka", ""))
+            return ""
+        if role == Qt.CheckStateRole and col == SELECT_COL:
+            return Qt.Checked if index.row() in self._checked else Qt.Unchecked
+        if role == Qt.FontRole and col in (2, 3):
+            f = QFont()
+            f.setBold(True)
+            f.setUnderline(col == 2 and r.ready)   # podtržení = vše koupeno
+            return f
+        if role == Qt.TextAlignmentRole and col == 3:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole) -> bool:
+        if (not index.isValid() or role != Qt.CheckStateRole
+                or index.internalPointer() is not self._TOP or index.column() != SELECT_COL):
+            return False
+        checked = value in (Qt.Checked, Qt.Checked.value, 2, True)
+        self.set_checked([index.row()], checked)
+        return True
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(COLUMNS):
+            return COLUMNS[section]
+        return None
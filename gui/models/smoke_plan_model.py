@@ -8,10 +8,12 @@ přímo přes metody controlleru; tato třída ale pomáhá s operacemi nad DF.
 """
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import pandas as pd
 from datetime import date, timedelta
 
+from services.smoke_plan_service import plan_slot_index
+
 Coord = Tuple[int, int, int]
 
 
@@ -19,10 +21,12 @@ class SmokePlanModel:
     def __init__(self, week_monday: date) -> None:
         self._week = week_monday
         self._df: Optional[pd.DataFrame] = None
+        self._slots: Dict[Coord, int] = {}   # coord -> index řádku _df
 
     # ------------------- core -------------------
     def load_from_df(self, plan_df: pd.DataFrame) -> None:
         self._df = plan_df.copy()
+        self._slots = plan_slot_index(self._df, self._week)
 
     def to_dataframe(self) -> pd.DataFrame:
         return self._df.copy() if self._df is not None else pd.DataFrame()
@@ -32,14 +36,7 @@ class SmokePlanModel:
         if self._df is None or self._df.empty:
             return None
         d, s, r = coord
-        day_date = pd.Timestamp(self._week) + pd.Timedelta(days=d)
-        m = (
-            (pd.to_datetime(self._df["datum"]).dt.date == day_date.date()) &
-            (self._df["udirna"] == (s + 1)) &
-            (self._df["pozice"] == (r + 1))
-        )
-        idx = self._df[m].index
-        return int(idx[0]) if len(idx) else None
+        return self._slots.get((int(d), int(s), int(r)))
 
     # ------------------- mutations -------------------
     def apply_move(self, src: Coord, dst: Coord) -> None:
@@ -53,23 +50,22 @@ class SmokePlanModel:
             "polotovar_id", "polotovar_id_base", "polotovar_nazev",
             "mnozstvi", "jednotka", "poznamka", "meat_type", "part_index", "shift",
         ]
-        tmp = self._df.loc[a, cols].copy()
-        self._df.loc[a, cols] = self._df.loc[b, cols].values
-        self._df.loc[b, cols] = tmp.values
+        cols = [c for c in cols if c in self._df.columns]   # 'shift' mívá jen plán z Excelu
+        self._df.loc[[a, b], cols] = self._df.loc[[b, a], cols].to_numpy()
 
     def set_note(self, coord: Coord, text: str) -> None:
         i = self._row_index(coord)
         if i is None:
             return
-        self._df.loc[i, "poznamka"] = text
+        self._df.at[i, "poznamka"] = text
 
     def set_dose(self, coord: Coord, qty: Optional[float], unit: Optional[str]) -> None:
         i = self._row_index(coord)
         if i is None:
             return
-        self._df.loc[i, "mnozstvi"] = qty
+        self._df.at[i, "mnozstvi"] = qty
         if unit is not None:
-            self._df.loc[i, "jednotka"] = unit
+            self._df.at[i, "jednotka"] = unit
 
     # ------------------- read -------------------
     def cell_payload(self, coord: Coord) -> dict:
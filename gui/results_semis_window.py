@@ -10,9 +10,10 @@ from gui.smoke_plan_window import open_smoke_plan_window
 from controllers.smoke_plan_controller import SmokePlanController
 from services.smoke_capacity import CapacityRules
 import PySimpleGUIQt as sg
+import numpy as np
 import pandas as pd
 from services import graph_store
-from services.readiness import compute_ready_semis_under_finals
+from services.readiness import compute_ready_semis_under_finals, is_semi_ready
 g = graph_store.get_graph()
 ready_keys = compute_ready_semis_under_finals(g)
 
@@ -28,6 +29,13 @@ from services.gui_helpers import (
     dbg_set_enabled,
 )
 from services import error_messages as ERR  # <- centralizované hlášky
+from gui.models.semis_tree_model import (
+    SELECT_COL,
+    SemiRow,
+    SemisTreeModel,
+    detail_cells,
+    fmt_qty_2dec_cz as _fmt_qty_2dec_cz,
+)
 
 # ========================= VZHLED / ROZMĚRY =========================
 dbg_set_enabled(False)  # zap/vyp debug v gui_helpers
@@ -85,58 +93,43 @@ def _collect_selected_indices_from_window(buy_map: Dict[str, List[int]], values:
                 picked.extend(int(i) for i in idxs if pd.notna(i))
     return sorted({int(i) for i in picked})
 
-def _is_polotovar_ready(sk, rc) -> bool:
-    """
-    Vrátí True, pokud všechny listové ingredience v podstromu polotovaru (sk, rc)
-    mají atribut `bought=True`.
-
-    Používá runtime graf z graph_store (attach_status_from_excels do něj natahuje koupeno).
-    """
+def _runtime_graph():
     try:
         # preferovaná cesta – pokud graph_store nabízí getter
         g = getattr(graph_store, "get_graph", None)
-        g = g() if callable(g) else getattr(graph_store, "_G", None)
+        return g() if callable(g) else getattr(graph_store, "_G", None)
     except Exception:
-        g = getattr(graph_store, "_G", None)
+        return getattr(graph_store, "_G", None)
 
+def _ready_flags(pairs) -> List[bool]:
+    """
+    Hromadné _is_polotovar_ready pro seznam (sk, rc): graf se vezme jednou
+    a každý unikátní pár se vyhodnotí jen jednou.
+    """
+    pairs = list(pairs)
+    g = _runtime_graph()
     if not g or not getattr(g, "nodes", None):
-        return False
-
-    isk = _to_int_or_none(sk)
-    irc = _to_int_or_none(rc)
-    if isk is None or irc is None:
-        return False
-
-    nid = (isk, irc)
-    if nid not in g.nodes:
-        return False
-
-    # DFS na listy (ingredience): list = uzel bez edges
-    stack = [nid]
-    visited = set()
-    while stack:
-        cur = stack.pop()
-        if cur in visited:
-            continue
-        visited.add(cur)
-
-        node = g.nodes.get(cur)
-        if not node:
-            continue
+        return [False] * len(pairs)
+
+    cache: Dict[tuple, bool] = {}
+    out: List[bool] = []
+    for sk, rc in pairs:
+        key = (str(sk), str(rc))
+        if key not in cache:
+            isk = _to_int_or_none(sk)
+            irc = _to_int_or_none(rc)
+            cache[key] = False if isk is None or irc is None else is_semi_ready(g, (isk, irc))
+        out.append(cache[key])
+    return out
 
-        edges = getattr(node, "edges", []) or []
-        if not edges:
-            # list – musí být koupený
-            if not bool(getattr(node, "bought", False)):
-                return False
-        else:
-            for e in edges:
-                try:
-                    stack.append(e.child)
-                except Exception:
-                    pass
+def _is_polotovar_ready(sk, rc) -> bool:
+    """
+    Vrátí True, pokud všechny listové ingredience v podstromu polotovaru (sk, rc)
+    mají atribut `bought=True` (readiness.is_semi_ready – čítač nekoupených listů).
 
-    return True
+    Používá runtime graf z graph_store (attach_status_from_excels do něj natahuje koupeno).
+    """
+    return _ready_flags([(sk, rc)])[0]
 
 def _safe_loc(win):
     try:
@@ -154,24 +147,6 @@ def _remember_pos(win):
 def _force_bool(df: pd.DataFrame, col: str):
     df[col] = df[col].map(to_bool_cell_excel).astype(bool)
 
-# --- přidej někam k utilitám v horní části souboru (např. pod _get_any) ---
-def _fmt_qty_2dec_cz(v) -> str:
-    """
-    Naformátuje číslo na dvě desetinná místa s čárkou jako oddělovačem.
-    Vstup může být číslo nebo text s čárkou/tečkou.
-    Pokud nejde převést na číslo, vrátí původní text.
-    """
-    if v is None:
-        return ""
-    s = str(v).strip()
-    if s == "":
-        return ""
-    try:
-        f = float(s.replace(" ", "").replace(",", "."))
-        return f"{f:.2f}".replace(".", ",")
-    except Exception:
-        return s
-
 def _filter_unmade(df: pd.DataFrame, col: str) -> pd.DataFrame:
     _force_bool(df, col)
     return df.loc[~df[col]].copy()
@@ -260,15 +235,7 @@ def on_plan_button_click(df_main: pd.DataFrame, selected_indices: list[int]) ->
     open_smoke_plan_window(df_selected)
 
 def _row_detail(d: dict):
-    # hodnoty z detailu
-    vyrobek_rc = str(d.get("vyrobek_rc", "") or d.get("final_rc", "")).strip()
-    name_raw   = str(d.get("vyrobek_nazev", "") or d.get("final_nazev", "")).strip()
-    name_disp  = f"↳ {name_raw or '(bez názvu)'}"
-
-    # množství + mj
-    mnozstvi = _fmt_qty_2dec_cz(d.get("mnozstvi", ""))
-    jednotka = str(d.get("jednotka", "")).strip()
-    qty_full = f"{mnozstvi} {jednotka}".strip()
+    vyrobek_rc, name_disp, qty_full = detail_cells(d)
 
     # Pozn.: sloupec SK "odebíráme" tak, že ho zobrazíme prázdný (kvůli zarovnání sloupců)
     return [
@@ -281,39 +248,23 @@ def _row_detail(d: dict):
     ]
 
 # ========================= IO: Excel =========================
-def _save_semi_excel(df_main: pd.DataFrame, df_det: Optional[pd.DataFrame]):
+def _mark_produced(df_main: pd.DataFrame, df_det: Optional[pd.DataFrame], col_k: str, sel) -> None:
     """
-    1) 'Ping' plain zápis pro test UC5 (odposlech to_excel(path,...)).
-    2) Okamžitě přepíšeme soubor korektní strukturou s pojmenovanými listy
-       (Prehled/Detaily), aby zůstala kompatibilita s UC2.
+    Označí řádky df_main (indexy `sel`) jako vyrobené. Stav jde přes graph_store (deník),
+    do OUTPUT_SEMI_EXCEL se zapíše zobrazený Prehled/Detaily (ensure_output_semis_excel).
     """
-    empty_details = pd.DataFrame(columns=[
-        "datum", "polotovar_sk", "polotovar_rc",
-        "vyrobek_sk", "vyrobek_rc", "vyrobek_nazev",
-        "mnozstvi", "jednotka"
-    ])
-
-    # 1) Plain zápis (pro zachycení v testu UC5)
-    try:
-        df_main.to_excel(OUTPUT_SEMI_EXCEL, index=False)
-    except Exception as e:
-        ERR.show_error(ERR.MSG["semis_save"], e)  # zaloguj, pokračuj na korektní zápis
-
-    # 2) Korektní zápis s pojmenovanými sheety
-    try:
-        with pd.ExcelWriter(OUTPUT_SEMI_EXCEL, engine="openpyxl") as writer:
-            df_main.to_excel(writer, sheet_name="Prehled", index=False)
-            (df_det if (df_det is not None and not df_det.empty) else empty_details) \
-                .to_excel(writer, sheet_name="Detaily", index=False)
-    except Exception as e:
-        # poslední fallback – stále se jmény sheetů
+    keys = []
+    for i in sel:
         try:
-            with pd.ExcelWriter(OUTPUT_SEMI_EXCEL, engine="openpyxl") as writer:
-                df_main.to_excel(writer, sheet_name="Prehled", index=False)
-                (df_det if (df_det is not None and not df_det.empty) else empty_details) \
-                    .to_excel(writer, sheet_name="Detaily", index=False)
-        except Exception as e2:
-            ERR.show_error(ERR.MSG["semis_save"], e2)
+            r = df_main.loc[i]
+        except Exception:
+            continue
+        keys.append((r.get("datum", ""), r.get("polotovar_sk", ""), r.get("polotovar_rc", "")))
+    if sel:
+        df_main.loc[sel, col_k] = True
+    _force_bool(df_main, col_k)
+    det = df_det.copy() if df_det is not None else None
+    graph_store.set_semis_produced_many(keys, produced=True, export=(df_main.copy(), det))
 
 # ========================= AGREGACE: Týden =========================
 def _week_range_label(ts: pd.Timestamp) -> str:
@@ -328,16 +279,20 @@ def _week_range_label(ts: pd.Timestamp) -> str:
     end = start + pd.Timedelta(days=6)
     return f"{fmt_cz_date(start)} – {fmt_cz_date(end)}"
 
-def _aggregate_weekly(df_main: pd.DataFrame, col_k: str) -> pd.DataFrame:
+_WEEKLY_COLS = ["_week_start", "datum", "polotovar_sk", "polotovar_rc", "polotovar_nazev", "jednotka", "potreba"]
+
+def _weekly_groups(df_main: pd.DataFrame, col_k: str) -> Tuple[pd.DataFrame, List[np.ndarray]]:
     """
-    Vrátí agregovaný DF se sloupci:
-      _week_start, datum(label Po–Ne), polotovar_sk, polotovar_rc, polotovar_nazev, jednotka, potreba
-    Agreguje jen NEVYROBENÉ řádky podle týdnů (Po–Ne) a podle SK/RC/Název/Jednotka.
+    Týdenní agregace nevyrobených řádků + mapování skupina -> zdrojové indexy df_main.
+
+    Vrací (g, src): g jako _aggregate_weekly, src[i] = indexy df_main (vzestupně)
+    sečtené do řádku g.iloc[i]. Mapování vzniká z čísla skupiny (ngroup) jedním
+    stabilním řazením – bez masky přes celý zdroj pro každou skupinu.
     """
     # pracujeme jen s nevyrobenými
     d = _filter_unmade(df_main.copy(), col_k)
     if d.empty:
-        return d
+        return d, []
 
     # Normalizace a typy
     # datum -> datetime
@@ -357,166 +312,219 @@ def _aggregate_weekly(df_main: pd.DataFrame, col_k: str) -> pd.DataFrame:
     d = d.loc[~d["_dt"].isna()].copy()
     if d.empty:
         # nic agregovat, vrať prázdno se správnými sloupci
-        return pd.DataFrame(columns=["_week_start","datum","polotovar_sk","polotovar_rc","polotovar_nazev","jednotka","potreba"])
+        return pd.DataFrame(columns=_WEEKLY_COLS), []
 
-    # týden začínající pondělím (stejná logika jako níže v d_src)
+    # týden začínající pondělím
     d["_week_start"] = (d["_dt"] - pd.to_timedelta(d["_dt"].dt.weekday, unit="D")).dt.normalize()
 
     grp_cols = ["_week_start", "polotovar_sk", "polotovar_rc", "polotovar_nazev", "jednotka"]
-    g = (
-        d.groupby(grp_cols, dropna=False, as_index=False)["potreba_num"]
-         .sum()
-         .rename(columns={"potreba_num": "potreba"})
-    )
+    grp = d.groupby(grp_cols, dropna=False)
+    g = grp["potreba_num"].sum().rename("potreba").reset_index()
+
+    # Vytvoř label týdne Po–Ne (jednou pro každý týden)
+    labels = {ws: _week_range_label(ws) for ws in g["_week_start"].unique()}
+    g["datum"] = g["_week_start"].map(labels)
 
-    # Vytvoř label týdne Po–Ne
-    g["datum"] = g["_week_start"].apply(_week_range_label)
+    # skupina -> zdrojové indexy: číslo skupiny odpovídá pořadí řádků g
+    codes = grp.ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(g)))[:-1]
+    src = np.split(d.index.to_numpy(dtype=np.int64)[order], bounds)
 
     # pořadí sloupců pro jistotu
-    g = g[["_week_start", "datum", "polotovar_sk", "polotovar_rc", "polotovar_nazev", "jednotka", "potreba"]]
+    return g[_WEEKLY_COLS], src
 
-    return g
+def _aggregate_weekly(df_main: pd.DataFrame, col_k: str) -> pd.DataFrame:
+    """
+    Vrátí agregovaný DF se sloupci:
+      _week_start, datum(label Po–Ne), polotovar_sk, polotovar_rc, polotovar_nazev, jednotka, potreba
+    Agreguje jen NEVYROBENÉ řádky podle týdnů (Po–Ne) a podle SK/RC/Název/Jednotka.
+    """
+    return _weekly_groups(df_main, col_k)[0]
 
-# ========================= LAYOUT BUILDER =========================
-def _build_rows(
-    df_main: pd.DataFrame,
-    df_details_map: Dict[Tuple[str, str, object], List[dict]],
-    col_k: str,
-    show_details: bool,
-    weekly_sum: bool,
-):
-    buy_map: Dict[str, List[int]] = {}
-    rowkey_map: Dict[str, str] = {}
+# ========================= ŘÁDKY PLÁNU =========================
+def _col_values(d: pd.DataFrame, col: str) -> list:
+    return d[col].tolist() if col in d.columns else [""] * len(d)
 
+def _plan_rows(df_main: pd.DataFrame, col_k: str, weekly_sum: bool) -> List[SemiRow]:
+    """
+    Hlavní řádky okna (nevyrobené SK 300) – sdílí je widgetový layout i SemisTreeModel.
+    Denní režim: 1 řádek = 1 řádek df_main; týdenní: součet po (týden, SK, RC, název, MJ).
+    """
     if weekly_sum:
-        d_src = _filter_unmade(df_main.copy(), col_k)
-        for c in ["polotovar_sk", "polotovar_rc", "polotovar_nazev", "jednotka"]:
-            d_src[c] = d_src[c].fillna("").astype(str).str.strip()
-        to_date_col(d_src, "datum")
-        d_src["_dt"] = pd.to_datetime(d_src["datum"], errors="coerce")
-        d_src["_week_start"] = (d_src["_dt"] - pd.to_timedelta(d_src["_dt"].dt.weekday, unit="D")).dt.normalize()
-
-        d = _aggregate_weekly(df_main, col_k)
+        d, src = _weekly_groups(df_main, col_k)
         if d.empty:
-            return None, buy_map, rowkey_map
-
-        rows: List[List[sg.Element]] = [[*_header_row()]]
-        btn_id = 0
-
-        for _, r in d.iterrows():
-            start_dt = r.get("_week_start", pd.NaT)
-            sk = str(r.get("polotovar_sk", "")).strip()
-            rc = str(r.get("polotovar_rc", "")).strip()
-            nm = str(r.get("polotovar_nazev", "")).strip()
-            mj = str(r.get("jednotka", "")).strip()
-
-            mask = (
-                (d_src["_week_start"] == start_dt)
-                & (d_src["polotovar_sk"] == sk)
-                & (d_src["polotovar_rc"] == rc)
-                & (d_src["polotovar_nazev"] == nm)
-                & (d_src["jednotka"] == mj)
-            )
-            idx_list = list(d_src.loc[mask].index.astype(int))
-
-            ready = _is_polotovar_ready(sk, rc)
-
-            select_key = f"-WSEMI-{btn_id}-"
-            btn_id += 1
-
-            main_row = _row_main(
-                {
-                    "datum": r.get("datum", ""),
-                    "polotovar_sk": sk,
-                    "polotovar_rc": rc,
-                    "polotovar_nazev": nm,
-                    "potreba": r.get("potreba", ""),
-                    "jednotka": mj,
+            return []
+
+        # detaily skupiny: zdrojové dny podle data (klíče detail_map)
+        d_src = df_main.loc[np.concatenate(src)].copy()
+        to_date_col(d_src, "datum")
+        dt_of = dict(zip(d_src.index, pd.to_datetime(d_src["datum"], errors="coerce")))
+        key_of = dict(zip(d_src.index, zip(
+            d_src["polotovar_sk"].fillna("").astype(str).str.strip(),
+            d_src["polotovar_rc"].fillna("").astype(str).str.strip(),
+            d_src["datum"],
+        )))
+
+        sk = [str(v).strip() for v in d["polotovar_sk"]]
+        rc = [str(v).strip() for v in d["polotovar_rc"]]
+        ready = _ready_flags(zip(sk, rc))
+
+        out: List[SemiRow] = []
+        for n, (label, nm, pot, mj) in enumerate(zip(d["datum"], d["polotovar_nazev"], d["potreba"], d["jednotka"])):
+            idx_list = [int(i) for i in src[n]]
+            out.append(SemiRow(
+                main={
+                    "datum": label,
+                    "polotovar_sk": sk[n],
+                    "polotovar_rc": rc[n],
+                    "polotovar_nazev": str(nm).strip(),
+                    "potreba": pot,
+                    "jednotka": str(mj).strip(),
                 },
-                row_key=select_key,  # jen pro podpis, nepoužívá se dál
-                select_key=select_key,
-                ready=ready,
-            )
-            rows.append([*main_row])
-
-            if show_details and idx_list:
-                d_src_sel = d_src.loc[idx_list].copy()
-                d_src_sel["_dt_sort"] = pd.to_datetime(d_src_sel["datum"], errors="coerce")
-                d_src_sel = d_src_sel.sort_values("_dt_sort", kind="mergesort")
-                for _, rr in d_src_sel.iterrows():
-                    key_det = (
-                        str(rr.get("polotovar_sk", "")),
-                        str(rr.get("polotovar_rc", "")),
-                        rr.get("datum", "")
-                    )
-                    for det in df_details_map.get(key_det, []):
-                        rows.append([*_row_detail(det)])
-
-            # mapování: checkbox -> zdrojové řádky
-            buy_map[select_key] = idx_list
-            rowkey_map[select_key] = select_key
-
-        return rows, buy_map, rowkey_map
+                src=idx_list,
+                detail_keys=[key_of[i] for i in sorted(idx_list, key=dt_of.__getitem__)],
+                ready=ready[n],
+            ))
+        return out
 
     # ------ neagregovaný režim ------
     d = _filter_unmade(df_main, col_k)
     if d.empty:
-        return None, buy_map, rowkey_map
+        return []
 
     to_date_col(d, "datum")
     d["_sort_datum"] = pd.to_datetime(d["datum"], errors="coerce")
     d = d.sort_values(["_sort_datum", "polotovar_sk", "polotovar_rc"], kind="mergesort")
 
-    rows: List[List[sg.Element]] = [[*_header_row()]]
-
-    for i, r in d.iterrows():
-        sk_val = r.get("polotovar_sk", "")
-        rc_val = r.get("polotovar_rc", "")
-
-        ready = _is_polotovar_ready(sk_val, rc_val)
-
-        select_key = f"-SEMI-{int(i)}-"
-
-        main_row = _row_main(
-            {
-                "datum": fmt_cz_date(r.get("datum", "")),
+    sks, rcs = _col_values(d, "polotovar_sk"), _col_values(d, "polotovar_rc")
+    ready = _ready_flags(zip(sks, rcs))
+
+    out = []
+    for i, sk_val, rc_val, dt, nm, pot, mj, ok in zip(
+        d.index,
+        sks,
+        rcs,
+        _col_values(d, "datum"),
+        _col_values(d, "polotovar_nazev"),
+        _col_values(d, "potreba"),
+        _col_values(d, "jednotka"),
+        ready,
+    ):
+        out.append(SemiRow(
+            main={
+                "datum": fmt_cz_date(dt),
                 "polotovar_sk": sk_val,
                 "polotovar_rc": rc_val,
-                "polotovar_nazev": r.get("polotovar_nazev", ""),
-                "potreba": r.get("potreba", ""),
-                "jednotka": r.get("jednotka", ""),
+                "polotovar_nazev": nm,
+                "potreba": pot,
+                "jednotka": mj,
             },
-            row_key=select_key,
-            select_key=select_key,
-            ready=ready,
-        )
-        rows.append([*main_row])
+            src=[int(i)],   # každý řádek odpovídá přesně jednomu řádku df_main
+            detail_keys=[(str(sk_val), str(rc_val), dt)],
+            ready=ok,
+        ))
+    return out
+
+# ========================= LAYOUT BUILDER =========================
+# Widgetový layout (headless režim a testy); GUI používá líný QTreeView (SemisTreeModel).
+def _build_rows(
+    df_main: pd.DataFrame,
+    df_details_map: Dict[Tuple[str, str, object], List[dict]],
+    col_k: str,
+    show_details: bool,
+    weekly_sum: bool,
+):
+    buy_map: Dict[str, List[int]] = {}
+    rowkey_map: Dict[str, str] = {}
+
+    plan = _plan_rows(df_main, col_k, weekly_sum)
+    if not plan:
+        return None, buy_map, rowkey_map
+
+    rows: List[List[sg.Element]] = [[*_header_row()]]
+    for n, pr in enumerate(plan):
+        select_key = f"-WSEMI-{n}-" if weekly_sum else f"-SEMI-{pr.src[0]}-"
+        rows.append([*_row_main(pr.main, row_key=select_key, select_key=select_key, ready=pr.ready)])
 
-        if show_details:
-            key = (str(sk_val), str(rc_val), r.get("datum", ""))
-            for det in df_details_map.get(key, []):
-                rows.append([*_row_detail(det)])
+        if show_details and pr.src:
+            for key_det in pr.detail_keys:
+                for det in df_details_map.get(key_det, []):
+                    rows.append([*_row_detail(det)])
 
-        # každý checkbox odpovídá přesně jednomu řádku df_main
-        buy_map[select_key] = [int(i)]
+        # mapování: checkbox -> zdrojové řádky
+        buy_map[select_key] = pr.src
         rowkey_map[select_key] = select_key
 
     return rows, buy_map, rowkey_map
 
 # ========================= WINDOW HELPERS =========================
+TREE_COL_WIDTH_CHARS = (DATE_WIDTH, RC_WIDTH, NAME_WIDTH_CHARS, QTY_WIDTH_CHARS + 4, UNIT_WIDTH_CHARS, 8)
+
+
+def _use_tree_view() -> bool:
+    """Líný QTreeView jen ve skutečném GUI; headless/testy používají widgetový layout."""
+    return not (os.environ.get("PYTEST_CURRENT_TEST") or os.environ.get("QT_QPA_PLATFORM") == "offscreen")
+
+
+class _TreeState:
+    """Model + view vložené do okna (přepínače jen mění model / rozbalení, okno zůstává)."""
+    def __init__(self, model: SemisTreeModel, view):
+        self.model = model
+        self.view = view
+
+    def show_details(self, on: bool) -> None:
+        if on:
+            self.view.expandAll()
+        else:
+            self.view.collapseAll()
+
+
+def _mount_tree(w, model: SemisTreeModel) -> _TreeState:
+    """Vloží QTreeView s modelem do sloupce '-COL-' okna."""
+    from PySide6 import QtWidgets
+
+    view = QtWidgets.QTreeView()
+    view.setModel(model)
+    model.setParent(view)
+    view.setUniformRowHeights(True)   # view neměří řádky – rychlé i pro tisíce řádků
+    view.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+    view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+    view.setWordWrap(False)
+    px = QtWidgets.QApplication.fontMetrics().horizontalAdvance("0")
+    for col, chars in enumerate(TREE_COL_WIDTH_CHARS):
+        view.setColumnWidth(col, max(24, chars * px + 8))
+
+    w['-COL-'].Widget.layout().addWidget(view)
+    return _TreeState(model, view)
+
+
+def _tree_state(w) -> Optional[_TreeState]:
+    meta = getattr(w, "metadata", None)
+    return meta if isinstance(meta, _TreeState) else None
+
+
 def _create_window(df_main, detail_map, col_k, show_details, weekly_sum, location=None):
-    rows_layout, buy_map, rowkey_map = _build_rows(df_main, detail_map, col_k, show_details, weekly_sum)
-    if rows_layout is None:
-        return None, None, None
-
-    table_col = sg.Column(
-        rows_layout,
-        scrollable=True,
-        size=(1140, 560),
-        key='-COL-',
-        pad=(6, 4),
-        element_justification='left',
-    )
+    model = None
+    if _use_tree_view():
+        model = SemisTreeModel(_plan_rows(df_main, col_k, weekly_sum), detail_map)
+        if model.rowCount() == 0:
+            return None, None, None
+        buy_map, rowkey_map = {}, {}
+        table_col = sg.Column([[]], size=(1140, 560), key='-COL-', pad=(6, 4))
+    else:
+        rows_layout, buy_map, rowkey_map = _build_rows(df_main, detail_map, col_k, show_details, weekly_sum)
+        if rows_layout is None:
+            return None, None, None
+
+        table_col = sg.Column(
+            rows_layout,
+            scrollable=True,
+            size=(1140, 560),
+            key='-COL-',
+            pad=(6, 4),
+            element_justification='left',
+        )
     controls = [
         sg.Checkbox(
             "Zobrazit podsestavy (detail)",
@@ -552,6 +560,9 @@ def _create_window(df_main, detail_map, col_k, show_details, weekly_sum, locatio
         pass
 
     w = sg.Window("Plán polotovarů", layout, **win_kwargs)
+    if model is not None:
+        w.metadata = _mount_tree(w, model)
+        w.metadata.show_details(show_details)
     return w, buy_map, rowkey_map
 
 def _builder_factory(df_main, detail_map, col_k, show_details, weekly_sum):
@@ -565,7 +576,8 @@ def _builder_factory(df_main, detail_map, col_k, show_details, weekly_sum):
 # ========================= PUBLIC =========================
 def open_semis_results():
     """
-    Okno 'Plán polotovarů' – rekreace obsahu se zachováním pozice/scrollu.
+    Okno 'Plán polotovarů'. V GUI líný QTreeView (detaily až při rozbalení, den/týden
+    jen přeskupí model); headless/testy rekreují widgetový obsah se zachováním pozice/scrollu.
     Primárně čteme z Excelu (kvůli testům); pokud není, použijeme cache (graph_store).
     """
     import os
@@ -577,6 +589,7 @@ def open_semis_results():
         from services import graph_store
 
         # ---------- 1) Načtení dat (Excel -> priorita kvůli testům) ----------
+        graph_store.flush_pending()  # Excel musí odpovídat paměti (write-behind)
         if Path(_SEMIS_XLSX).exists():
             try:
                 df_main = pd.read_excel(_SEMIS_XLSX, sheet_name="Prehled").fillna("")
@@ -669,7 +682,11 @@ def open_semis_results():
             # přepínání detailů
             if ev == "-DETAILS-":
                 target = bool(vals["-DETAILS-"]) if isinstance(vals.get("-DETAILS-"), bool) else not show_details
-                if target != show_details:
+                tree = _tree_state(w)
+                if target != show_details and tree is not None:
+                    show_details = target
+                    tree.show_details(show_details)
+                elif target != show_details:
                     show_details = target
                     res = recreate_window_preserving(w, _builder_factory(df_main, detail_map, col_k, show_details, weekly_sum), col_key='-COL-')
                     if not res or res[0] is None:
@@ -682,7 +699,15 @@ def open_semis_results():
             # přepínání weekly
             if ev == "-WEEKLY-":
                 target = bool(vals["-WEEKLY-"]) if isinstance(vals.get("-WEEKLY-"), bool) else not weekly_sum
-                if target != weekly_sum:
+                tree = _tree_state(w)
+                if target != weekly_sum and tree is not None:
+                    # přeskupení den/týden jen vymění řádky modelu
+                    weekly_sum = target
+                    tree.model.set_rows(_plan_rows(df_main, col_k, weekly_sum))
+                    if tree.model.rowCount() == 0:
+                        sg.popup(ERR.MSG["semis_all_done"]); break
+                    tree.show_details(show_details)
+                elif target != weekly_sum:
                     weekly_sum = target
                     res = recreate_window_preserving(w, _builder_factory(df_main, detail_map, col_k, show_details, weekly_sum), col_key='-COL-')
                     if not res or res[0] is None:
@@ -706,15 +731,7 @@ def open_semis_results():
 
                     try:
                         sel = sorted({int(i) for i in idx_list if pd.notna(i)})
-                        if sel:
-                            df_main.loc[sel, col_k] = True
-                        _force_bool(df_main, col_k)
-
-                        try:
-                            df_main.to_excel(OUTPUT_SEMI_EXCEL, index=False)  # <- PLAIN PING pro UC5
-                        except Exception:
-                            pass
-                        _save_semi_excel(df_main, df_det)
+                        _mark_produced(df_main, df_det, col_k, sel)
                     except Exception as e:
                         ERR.show_error(ERR.MSG["semis_save"], e)
                         loops += 1
@@ -742,30 +759,9 @@ def open_semis_results():
                             n = int(ev.split("-WSEMI-")[1].split("-")[0])
                         except Exception:
                             n = 0
-
-                        d_src = _filter_unmade(df_main.copy(), col_k)
-                        for c in ["polotovar_sk", "polotovar_rc", "polotovar_nazev", "jednotka"]:
-                            d_src[c] = d_src[c].fillna("").astype(str).str.strip()
-                        to_date_col(d_src, "datum")
-                        d_src["_dt"] = pd.to_datetime(d_src["datum"], errors="coerce")
-                        d_src["_week_start"] = (d_src["_dt"] - pd.to_timedelta(d_src["_dt"].dt.weekday, unit="D")).dt.normalize()
-
-                        d_agg = _aggregate_weekly(df_main, col_k)
-                        if d_agg is not None and not d_agg.empty and 0 <= n < len(d_agg):
-                            r = d_agg.iloc[n]
-                            start_dt = r.get("_week_start", pd.NaT)
-                            sk = str(r.get("polotovar_sk", "")).strip()
-                            rc = str(r.get("polotovar_rc", "")).strip()
-                            nm = str(r.get("polotovar_nazev", "")).strip()
-                            mj = str(r.get("jednotka", "")).strip()
-                            mask = (
-                                (d_src["_week_start"] == start_dt)
-                                & (d_src["polotovar_sk"] == sk)
-                                & (d_src["polotovar_rc"] == rc)
-                                & (d_src["polotovar_nazev"] == nm)
-                                & (d_src["jednotka"] == mj)
-                            )
-                            idx_list = list(d_src.loc[mask].index.astype(int))
+                        _, src = _weekly_groups(df_main, col_k)
+                        if 0 <= n < len(src):
+                            idx_list = [int(i) for i in src[n]]
 
                     if not idx_list:
                         ERR.show_error(ERR.MSG["semis_weekly_no_src"])
@@ -775,16 +771,7 @@ def open_semis_results():
 
                     try:
                         sel = sorted({int(i) for i in idx_list if pd.notna(i)})
-                        if sel:
-                            df_main.loc[sel, col_k] = True
-
-                        _force_bool(df_main, col_k)
-
-                        try:
-                            df_main.to_excel(OUTPUT_SEMI_EXCEL, index=False)  # <- PLAIN PING pro UC5
-                        except Exception:
-                            pass
-                        _save_semi_excel(df_main, df_det)
+                        _mark_produced(df_main, df_det, col_k, sel)
                     except Exception as e:
                         ERR.show_error(ERR.MSG["semis_save_weekly"], e)
                         loops += 1
@@ -802,7 +789,11 @@ def open_semis_results():
                 continue
 
             if ev == "PLAN":
-                sel_indices = _collect_selected_indices_from_window(buy_map, vals)
+                tree = _tree_state(w)
+                if tree is not None:
+                    sel_indices = tree.model.selected_indices()
+                else:
+                    sel_indices = _collect_selected_indices_from_window(buy_map, vals)
                 on_plan_button_click(df_main, sel_indices)
                 continue
 
@@ -812,6 +803,7 @@ def open_semis_results():
                 break
 
         _remember_pos(w)
+        graph_store.flush_pending()
         try:
             w.close()
         except Exception:
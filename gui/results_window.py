@@ -19,10 +19,15 @@ from services.gui_helpers import (
 )
 from services import error_messages as ERR
 from services import graph_store
+from gui.models.ingredients_table_model import (
+    AGG_DATE_PLACEHOLDER,
+    ACTION_COL,
+    IngredientsTableModel,
+    table_rows,
+)
 
 dbg_set_enabled(False)
 
-AGG_DATE_PLACEHOLDER = "XX-XX-XXXX"
 CELL_PAD = (0, 2)
 BTN_PAD  = ((0, 0), (-3, 3))
 LAST_WIN_POS = None
@@ -87,103 +92,13 @@ def _filter_unbought(d: pd.DataFrame, col_k: str) -> pd.DataFrame:
     _force_bool_col(d, col_k)
     return d.loc[~d[col_k]].copy()
 
-def _first_nonempty(s: pd.Series):
-    for x in s:
-        if str(x).strip() != "":
-            return x
-    return ""
-
-def _safe_int(v):
-    try:
-        return int(float(str(v).replace(",", ".")))
-    except Exception:
-        return None
-
-def _key_txt(v) -> str:
-    """Normalizace klíče: 150, '150.0', '150,0' -> '150'; None -> ''."""
-    if v is None:
-        return ""
-    i = _safe_int(v)
-    return str(i) if i is not None else str(v).strip()
-
 # ------------------------- LAYOUT BUILDER -------------------------
+# Widgetový layout (headless režim a testy); GUI používá virtualizovaný QTableView.
 # Vrací (rows_layout, buy_map, rowkey_map)
 # - buy_map:  klíč tlačítka -> seznam indexů df_full k označení True
 # - rowkey_map: (pro neagregovanou verzi mapuje index->vizuální klíč; pro agregovanou není nutný)
-def _build_table_layout(df_full: pd.DataFrame, col_k: str, aggregate: bool = False):
-    buy_map = {}
-    rowkey_map = {}
-
-    if not aggregate:
-        d = _filter_unbought(df_full, col_k)
-        if d.empty:
-            return None, buy_map, rowkey_map
-
-        if "datum" in d.columns:
-            sort_vals = pd.to_datetime(d["datum"], errors="coerce")
-            d["_sort_datum"] = sort_vals
-            d = d.sort_values("_sort_datum", na_position="last", kind="mergesort")
-            d = d.drop(columns=["_sort_datum"], errors="ignore")
-
-        header = [
-            sg.Text("Datum",   size=(12,1), font=('Any', 10, 'bold'), pad=CELL_PAD),
-            sg.Text("SK",      size=(6,1),  font=('Any', 10, 'bold'), pad=CELL_PAD),
-            sg.Text("Reg.č.",  size=(10,1), font=('Any', 10, 'bold'), pad=CELL_PAD),
-            sg.Text("Název",   size=(36,1), font=('Any', 10, 'bold'), pad=CELL_PAD),
-            sg.Text("Množství",size=(12,1), font=('Any', 10, 'bold'), pad=CELL_PAD),
-            sg.Text("",        size=(8,1),  font=('Any', 10, 'bold'), pad=CELL_PAD),
-            sg.Text("Akce",    size=(10,1), font=('Any', 10, 'bold'), pad=CELL_PAD),
-        ]
-        rows = [[*header]]
-
-        for i, r in d.iterrows():
-            i_int = int(i)
-            row_key = f"-BUY-{i_int}-"
-            vis_key = f"-ROW-{i_int}-"
-            buy_map[row_key] = [i_int]
-            rowkey_map[i_int] = vis_key  # testy očekávají plnění rowkey_map
-
-            row_widgets = [
-                sg.Text(fmt_cz_date(r.get("datum","")), size=(12,1), pad=CELL_PAD),
-                sg.Text(str(r.get("ingredience_sk","")), size=(6,1),  pad=CELL_PAD),
-                sg.Text(str(r.get("ingredience_rc","")), size=(10,1), pad=CELL_PAD),
-                sg.Text(str(r.get("nazev","")),          size=(36,1), pad=CELL_PAD),
-                sg.Text(str(r.get("potreba","")),        size=(12,1), pad=CELL_PAD),
-                sg.Text(str(r.get("jednotka","")),       size=(8,1),  pad=CELL_PAD),
-                sg.Button("Koupeno", key=row_key, size=(10,1), pad=BTN_PAD),
-            ]
-            rows.append([*row_widgets])
-
-        return rows, buy_map, rowkey_map
-
-    # -------- aggregate=True --------
-    d = _filter_unbought(df_full, col_k)
-    if d.empty:
-        return None, buy_map, rowkey_map
-
-    # normalizované klíče a číselná potřeba
-    d = d.copy()
-    d["_sk_key"] = d["ingredience_sk"].map(_key_txt)
-    d["_rc_key"] = d["ingredience_rc"].map(_key_txt)
-    d["_num_pot"] = pd.to_numeric(d["potreba"], errors="coerce").fillna(0.0)
-
-    g = (
-        d.groupby(["_sk_key", "_rc_key"], as_index=False)
-         .agg(
-             potreba=("_num_pot", "sum"),
-             nazev=("nazev", _first_nonempty),
-             jednotka=("jednotka", _first_nonempty),
-         )
-         .sort_values(["_sk_key","_rc_key"], kind="mergesort")
-    )
-
-    # (norm. SK, norm. RC) -> indexy všech NEkoupených řádků (z d)
-    group_to_indices = {}
-    for idx, row in d.iterrows():
-        key = (row.get("_sk_key",""), row.get("_rc_key",""))
-        group_to_indices.setdefault(key, []).append(int(idx))
-
-    header = [
+def _header_row():
+    return [
         sg.Text("Datum",   size=(12,1), font=('Any', 10, 'bold'), pad=CELL_PAD),
         sg.Text("SK",      size=(6,1),  font=('Any', 10, 'bold'), pad=CELL_PAD),
         sg.Text("Reg.č.",  size=(10,1), font=('Any', 10, 'bold'), pad=CELL_PAD),
@@ -192,62 +107,120 @@ def _build_table_layout(df_full: pd.DataFrame, col_k: str, aggregate: bool = Fal
         sg.Text("",        size=(8,1),  font=('Any', 10, 'bold'), pad=CELL_PAD),   # prázdný titulek pro jednotku
         sg.Text("Akce",    size=(10,1), font=('Any', 10, 'bold'), pad=CELL_PAD),
     ]
-    rows = [[*header]]
-
-    btn_id = 0
-    for _, r in g.iterrows():
-        sk_k = str(r.get("_sk_key","")).strip()
-        rc_k = str(r.get("_rc_key","")).strip()
-        nazev = str(r.get("nazev","")).strip()
-        jednotka = str(r.get("jednotka","")).strip()
-
-        row_key = f"-BUY-G-{btn_id}-"
-        btn_id += 1
-        buy_map[row_key] = group_to_indices.get((sk_k, rc_k), [])
-
-        row_widgets = [
-            sg.Text(AGG_DATE_PLACEHOLDER, size=(12,1), pad=CELL_PAD),
-            sg.Text(sk_k,                  size=(6,1),  pad=CELL_PAD),
-            sg.Text(rc_k,                  size=(10,1), pad=CELL_PAD),
-            sg.Text(nazev,                 size=(36,1), pad=CELL_PAD),
-            sg.Text(str(r.get("potreba","")), size=(12,1), pad=CELL_PAD),
-            sg.Text(jednotka,              size=(8,1),  pad=CELL_PAD),
+
+def _build_table_layout(df_full: pd.DataFrame, col_k: str, aggregate: bool = False):
+    buy_map = {}
+    rowkey_map = {}
+
+    cells, src = table_rows(df_full, col_k, aggregate)
+    if not src:
+        return None, buy_map, rowkey_map
+
+    rows = [_header_row()]
+    for n, idxs in enumerate(src):
+        if aggregate:
+            row_key = f"-BUY-G-{n}-"
+        else:
+            i_int = idxs[0]
+            row_key = f"-BUY-{i_int}-"
+            rowkey_map[i_int] = f"-ROW-{i_int}-"  # testy očekávají plnění rowkey_map
+        buy_map[row_key] = idxs
+
+        rows.append([
+            sg.Text(cells["datum"][n],    size=(12,1), pad=CELL_PAD),
+            sg.Text(cells["sk"][n],       size=(6,1),  pad=CELL_PAD),
+            sg.Text(cells["rc"][n],       size=(10,1), pad=CELL_PAD),
+            sg.Text(cells["nazev"][n],    size=(36,1), pad=CELL_PAD),
+            sg.Text(cells["potreba"][n],  size=(12,1), pad=CELL_PAD),
+            sg.Text(cells["jednotka"][n], size=(8,1),  pad=CELL_PAD),
             sg.Button("Koupeno", key=row_key, size=(10,1), pad=BTN_PAD),
-        ]
-        rows.append([*row_widgets])
+        ])
 
     return rows, buy_map, rowkey_map
 
 
+# ------------------------- VIRTUALIZOVANÁ TABULKA (QTableView) -------------------------
+TABLE_BUY_KEY = "-TABLE-BUY-"
+COL_WIDTH_CHARS = (12, 6, 10, 36, 12, 8, 10)
+ROW_HEIGHT_PX = 22
+
+
 def _controls_row(agg_flag):
     return [
         sg.Checkbox("Sčítat napříč daty", key="-AGG-", enable_events=True, default=bool(agg_flag), size=(22,1), pad=(0, 2)),
         sg.Button("Zavřít", key="-CLOSE-", size=(16,1), pad=(0, 2)),
+        # skryté tlačítko – klik na „Koupeno“ v QTableView ho stiskne a tím pošle událost do smyčky
+        sg.Button("", key=TABLE_BUY_KEY, visible=False),
     ]
 
-def _create_results_window(df_full, col_k, agg_flag, location=None):
-    rows_layout, buy_map, rowkey_map = _build_table_layout(df_full, col_k, aggregate=agg_flag)
-    if rows_layout is None:
-        return None, None, None
 
+class _TableState:
+    """Model + view vložené do okna; řádky kliknuté na „Koupeno“ čekají v `pending`."""
+    def __init__(self, model, view):
+        self.model = model
+        self.view = view
+        self.pending = []
+
+    def take_pending(self):
+        rows, self.pending = self.pending, []
+        return rows
+
+
+def _mount_table(w, model) -> _TableState:
+    """Vloží QTableView s modelem do sloupce '-COL-' okna."""
+    from PySide6 import QtWidgets
+
+    view = QtWidgets.QTableView()
+    view.setModel(model)
+    model.setParent(view)
+    view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+    view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+    view.setWordWrap(False)
+    view.verticalHeader().setVisible(False)
+    # pevná výška řádku -> view nemusí měřit obsah (rychlé i pro tisíce řádků)
+    view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    view.verticalHeader().setDefaultSectionSize(ROW_HEIGHT_PX)
+    px = QtWidgets.QApplication.fontMetrics().horizontalAdvance("0")
+    for col, chars in enumerate(COL_WIDTH_CHARS):
+        view.setColumnWidth(col, max(24, chars * px + 8))
+
+    state = _TableState(model, view)
+
+    def _on_clicked(index):
+        if index.isValid() and index.column() == ACTION_COL:
+            state.pending.append(index.row())
+            w[TABLE_BUY_KEY].Widget.click()
+
+    view.clicked.connect(_on_clicked)
+    w['-COL-'].Widget.layout().addWidget(view)
+    return state
+
+
+def _table_state(w):
+    meta = getattr(w, "metadata", None)
+    return meta if isinstance(meta, _TableState) else None
+
+
+def _create_results_window(df_full, col_k, agg_flag, location=None):
     # Headless režim (pytest nebo QT offscreen) → dummy okno, aby se testy nezasekly
     import os
     if os.environ.get("PYTEST_CURRENT_TEST") or os.environ.get("QT_QPA_PLATFORM") == "offscreen":
+        rows_layout, buy_map, rowkey_map = _build_table_layout(df_full, col_k, aggregate=agg_flag)
+        if rows_layout is None:
+            return None, None, None
+
         class _DummyWin:
             def read(self): return (None, {})
             def close(self): pass
             def current_location(self): return (0, 0)
         return _DummyWin(), buy_map, rowkey_map
 
-    # Normální GUI režim
-    table_col = sg.Column(
-        rows_layout,
-        scrollable=True,
-        size=(1000, 560),
-        key='-COL-',
-        pad=(0, 0),
-        element_justification='left',
-    )
+    # Normální GUI režim: model nad DF, widgety jen pro viditelné řádky
+    model = IngredientsTableModel(df_full, col_k, aggregate=agg_flag)
+    if model.rowCount() == 0:
+        return None, None, None
+
+    table_col = sg.Column([[]], size=(1000, 560), key='-COL-', pad=(0, 0))
     controls = _controls_row(agg_flag)
     controls_col = sg.Column([controls], element_justification='center', pad=(0, 0))
     lay = [[table_col], [controls_col]]
@@ -262,7 +235,8 @@ def _create_results_window(df_full, col_k, agg_flag, location=None):
         pass
 
     w = sg.Window("Výsledek", lay, **win_kwargs)
-    return w, buy_map, rowkey_map
+    w.metadata = _mount_table(w, model)
+    return w, {}, {}
 
 
 
@@ -273,9 +247,45 @@ def _builder_factory(df_full, col_k, agg_flag):
     return _builder
 
 
+def _load_source(source_mode: str, col_k=None) -> pd.DataFrame:
+    from pathlib import Path
+    if source_mode == "excel" and Path(OUTPUT_EXCEL).exists():
+        df_full = pd.read_excel(OUTPUT_EXCEL).fillna("")
+    else:
+        df_full = graph_store.get_ingredients_df().fillna("")
+    df_full.columns = [str(c).strip() for c in df_full.columns]
+    to_date_col(df_full, "datum")
+    if col_k is not None:
+        _force_bool_col(df_full, col_k)
+    return df_full
+
+
+def _mark_bought(df_full: pd.DataFrame, col_k: str, sel, source_mode: str) -> pd.DataFrame:
+    """
+    Označí řádky df_full (indexy `sel`) jako koupené a vrátí df_full.
+    Stav jde přes graph_store (deník); soubor zapíše write-behind fronta, GUI nečeká na zápis.
+    """
+    sel = [i for i in sel if i in df_full.index]
+    if not sel:
+        return df_full
+    rows = df_full.loc[sel]
+    keys = list(zip(*(rows[c] if c in rows.columns else [""] * len(rows)
+                      for c in ("datum", "ingredience_sk", "ingredience_rc"))))
+    df_full.loc[sel, col_k] = True
+
+    # EXCEL režim: okno ukazuje obsah sešitu → do OUTPUT_EXCEL jde tahle tabulka (ne projekce)
+    export = df_full.copy() if source_mode == "excel" else None
+    graph_store.set_ingredients_bought_many(keys, bought=True, export=export)
+    return df_full
+
+
 # ------------------------- PUBLIC -------------------------
 def open_results():
-    """Okno výsledků: sjednocený standard – rekreace okna přes helper, bez poskakování."""
+    """
+    Okno výsledků. V GUI je tabulka virtualizovaná (QTableView + model): „Koupeno“
+    odebere řádky z modelu a přepnutí agregace jen přestaví model. Headless/testy
+    používají widgetový layout a rekreaci okna přes helper.
+    """
     import os
     from pathlib import Path
 
@@ -289,16 +299,11 @@ def open_results():
     global LAST_WIN_POS
     try:
         # -------- ZDROJ DAT: preferuj existující OUTPUT_EXCEL (testy to očekávají) --------
+        graph_store.flush_pending()  # Excel musí odpovídat paměti (write-behind)
         source_mode = "excel" if Path(OUTPUT_EXCEL).exists() else "cache"
 
-        if source_mode == "excel":
-            df_full = pd.read_excel(OUTPUT_EXCEL).fillna("")
-        else:
-            # fallback na cache (strom je jediný zdroj pravdy v runtime)
-            df_full = graph_store.get_ingredients_df().fillna("")
-
-        df_full.columns = [str(c).strip() for c in df_full.columns]
-        to_date_col(df_full, "datum")
+        # fallback na cache (strom je jediný zdroj pravdy v runtime)
+        df_full = _load_source(source_mode)
 
         if df_full.empty:
             sg.popup(ERR.MSG["results_empty"])
@@ -332,32 +337,50 @@ def open_results():
             if ev in (sg.WINDOW_CLOSED, "-CLOSE-", None):
                 break
 
+            table = _table_state(w)
+
             if ev == "-AGG-":
                 target = bool(vals["-AGG-"]) if isinstance(vals.get("-AGG-"), bool) else not agg_flag
                 if target != agg_flag:
                     agg_flag = target
 
-                    # Při přepnutí agregace znovu načti zdroj
-                    if source_mode == "excel" and Path(OUTPUT_EXCEL).exists():
-                        df_full = pd.read_excel(OUTPUT_EXCEL).fillna("")
+                    if table is not None:
+                        table.model.set_frame(df_full, col_k, aggregate=agg_flag)
+                        if table.model.rowCount() == 0:
+                            sg.popup(ERR.MSG["results_all_bought"])
+                            break
                     else:
-                        df_full = graph_store.get_ingredients_df().fillna("")
-                    df_full.columns = [str(c).strip() for c in df_full.columns]
-                    to_date_col(df_full, "datum")
-                    _force_bool_col(df_full, col_k)
-
-                    builder = _builder_factory(df_full, col_k, agg_flag)
-                    res = recreate_window_preserving(w, builder, col_key='-COL-')
-                    if not res or res[0] is None:
-                        sg.popup(ERR.MSG["results_all_bought"])
-                        break
-                    w, buy_map, _ = res
+                        builder = _builder_factory(df_full, col_k, agg_flag)
+                        res = recreate_window_preserving(w, builder, col_key='-COL-')
+                        if not res or res[0] is None:
+                            sg.popup(ERR.MSG["results_all_bought"])
+                            break
+                        w, buy_map, _ = res
 
                 loops += 1
                 if max_loops is not None and loops >= max_loops:
                     break
                 continue
 
+            if ev == TABLE_BUY_KEY and table is not None:
+                rows = table.take_pending()
+                idx_list = [i for r in rows for i in table.model.source_indices(r)]
+                if not idx_list:
+                    ERR.show_error(ERR.MSG["results_index_map"])
+                    continue
+                try:
+                    df_full = _mark_bought(df_full, col_k, sorted(set(idx_list)), source_mode)
+                except Exception as e:
+                    ERR.show_error(ERR.MSG["results_save"], e)
+                    continue
+
+                # odebrání řádků signály modelu – okno se nestaví znovu
+                table.model.remove_rows(rows)
+                if table.model.rowCount() == 0:
+                    sg.popup(ERR.MSG["results_all_bought_close"])
+                    break
+                continue
+
             if isinstance(ev, str) and ev.startswith("-BUY-"):
                 idx_list = buy_map.get(ev, [])
                 if not idx_list:
@@ -369,44 +392,7 @@ def open_results():
 
                 try:
                     sel = sorted({int(i) for i in idx_list if pd.notna(i)})
-
-                    if source_mode == "excel":
-                        # --- EXCEL režim: přímá úprava a zápis do OUTPUT_EXCEL ---
-                        if sel:
-                            df_full.loc[sel, col_k] = True
-                        _force_bool_col(df_full, col_k)
-                        df_full.to_excel(OUTPUT_EXCEL, index=False)
-
-                        # pro jistotu re-read (stabilní stav) a překreslit
-                        df_full = pd.read_excel(OUTPUT_EXCEL).fillna("")
-                        df_full.columns = [str(c).strip() for c in df_full.columns]
-                        to_date_col(df_full, "datum")
-                        _force_bool_col(df_full, col_k)
-
-                    else:
-                        # --- CACHE režim: update v graph_store + zápis i do OUTPUT_EXCEL (kvůli testům) ---
-                        keys = []
-                        for i in sel:
-                            try:
-                                r = df_full.loc[i]
-                            except Exception:
-                                continue
-                            keys.append((r.get("datum", ""), r.get("ingredience_sk", ""), r.get("ingredience_rc", "")))
-                        if keys:
-                            graph_store.set_ingredients_bought_many(keys, bought=True)
-
-                        # Do GUI si natáhni čerstvý stav z cache
-                        df_full = graph_store.get_ingredients_df().fillna("")
-                        df_full.columns = [str(c).strip() for c in df_full.columns]
-                        to_date_col(df_full, "datum")
-                        _force_bool_col(df_full, col_k)
-
-                        # A zároveň perzistuj aktuální snapshot do OUTPUT_EXCEL, aby testy měly co číst
-                        try:
-                            df_full.to_excel(OUTPUT_EXCEL, index=False)
-                        except Exception:
-                            pass
-
+                    df_full = _mark_bought(df_full, col_k, sel, source_mode)
                 except Exception as e:
                     ERR.show_error(ERR.MSG["results_save"], e)
                     loops += 1
@@ -433,6 +419,7 @@ def open_results():
                 break
 
         _remember_pos(w)
+        graph_store.flush_pending()
         try:
             w.close()
         except Exception:
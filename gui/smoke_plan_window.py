@@ -1,6 +1,7 @@
 # gui/smoke_plan_window.py
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from datetime import date, timedelta
@@ -166,8 +167,19 @@ def _coerce_item(row: dict) -> Item:
         source_id=str(row.get("source_id") or row.get("id") or row.get("row_id") or row.get("guid") or ""),
     )
 
-def _prefill_with_rules(items: List[Item]) -> Dict[CellKey, List[Item]]:
-    return RULES_ENGINE.prefill(items, DAYS, SMOKERS, ROWS_PER_SMOKER, confirm_cb=_confirm_rule)
+def _prefill_with_rules(items: List[Item]) -> Tuple[Dict[CellKey, List[Item]], str]:
+    """Předvyplněná mřížka + text pro hlavičku okna (report solveru; u greedy prázdný)."""
+    # FG_SMOKE_SOLVER=local → local search místo greedy (rozpočet FG_SMOKE_SOLVER_BUDGET_S, výchozí 2 s)
+    if os.environ.get("FG_SMOKE_SOLVER", "").strip().lower() == "local":
+        try:
+            budget = float(os.environ.get("FG_SMOKE_SOLVER_BUDGET_S", "2") or 2)
+        except ValueError:
+            budget = 2.0        # neplatná hodnota nesmí zablokovat otevření okna
+        if not budget > 0:
+            budget = 2.0
+        res = RULES_ENGINE.solve(items, DAYS, SMOKERS, ROWS_PER_SMOKER, time_budget_s=budget)
+        return res.grid, res.report()
+    return RULES_ENGINE.prefill(items, DAYS, SMOKERS, ROWS_PER_SMOKER, confirm_cb=_confirm_rule), ""
 
 
 def _fmt_qty2_cz(v: float) -> str:
@@ -517,7 +529,7 @@ def open_smoke_plan_window(selected_df: pd.DataFrame) -> None:
     """
     items: List[Item] = [_coerce_item(rec) for rec in selected_df.to_dict("records")]
     week_monday = _next_week_monday()
-    grid: Dict[CellKey, List[Item]] = _prefill_with_rules(items)
+    grid, solver_report = _prefill_with_rules(items)
 
     # Globální odebrání implicitních rozestupů
     sg.set_options(element_padding=(0, 0))
@@ -547,6 +559,8 @@ def open_smoke_plan_window(selected_df: pd.DataFrame) -> None:
         [sg.Text("Plán uzení (Po–So)", font=FONT_TITLE, background_color=BG, pad=PAD_ELEM)],
         [sg.Text(f"Týden od (pondělí): {week_monday:%d.%m.%Y}", background_color=BG, font=FONT_BASE, pad=PAD_ELEM)],
     ]
+    if solver_report:
+        header.append([sg.Text(solver_report, key="-SOLVER-", background_color=BG, font=FONT_BASE, pad=PAD_ELEM)])
 
     def _make_day_tab_content(d: int) -> List[List[sg.Element]]:
         blocks = [_make_smoker_block(grid, d, s, block_px, px_char) for s in range(1, SMOKERS + 1)]
@@ -710,5 +724,7 @@ def open_smoke_plan_window(selected_df: pd.DataFrame) -> None:
                 _popup_ok_safe(f"Plán se uložil, ale označení vyrobeno selhalo:\n{e}", "Upozornění")
 
 
+    try: graph_store.flush_pending()
+    except Exception: pass
     try: window.close()
     except Exception: pass
@@ -1,19 +1,130 @@
 # services/data_loader.py
 from __future__ import annotations
+import os
+import hashlib
 import pandas as pd
+from pathlib import Path
+from typing import Callable, Dict, Optional
 from services.paths import RECEPTY_FILE, PLAN_FILE
 from services.data_utils import clean_columns, to_date_col
 
+RECEPTY_SHEET = "HEO - Kusovníkové vazby platné "
+
+# ---------------------------- Snapshot cache (binární kopie očištěných DF) ----------------------------
+# Vedle sešitu se ukládá "<soubor>.snapshot.pkl" s očištěným DataFrame a podpisem zdroje.
+# Podpis = (mtime_ns, size) pro rychlou kontrolu + sha1 obsahu, když se mtime změní bez změny dat
+# (např. kopie souboru). Pickle volíme proto, že nevyžaduje další závislost (pyarrow) a drží
+# i Python `date` objekty ve sloupci 'datum' beze ztráty.
+# Vypnutí: FG_NO_SNAPSHOT=1
+_SNAPSHOT_SUFFIX = ".snapshot.pkl"
+_SNAPSHOT_VERSION = 1
+
+_SNAPSHOT_STATS: Dict[str, int] = {"hit": 0, "miss": 0}
+
+
+def snapshot_stats() -> Dict[str, int]:
+    """Počty zásahů/výpadků snapshot cache od startu (nebo od reset_snapshot_stats)."""
+    return dict(_SNAPSHOT_STATS)
+
+
+def reset_snapshot_stats() -> None:
+    _SNAPSHOT_STATS["hit"] = 0
+    _SNAPSHOT_STATS["miss"] = 0
+
+
+def _snapshot_enabled() -> bool:
+    return os.environ.get("FG_NO_SNAPSHOT") != "1"
+
+
+def _snapshot_path(src: Path) -> Path:
+    return src.with_name(src.name + _SNAPSHOT_SUFFIX)
+
+
+def _file_sha1(src: Path) -> str:
+    h = hashlib.sha1()
+    with open(src, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_snapshot(src: Path, key: str) -> Optional[pd.DataFrame]:
+    """Vrátí DF ze snapshotu, pokud odpovídá aktuálnímu zdroji; jinak None."""
+    snap = _snapshot_path(src)
+    if not snap.exists():
+        return None
+    try:
+        payload = pd.read_pickle(snap)
+        if not isinstance(payload, dict) or payload.get("version") != _SNAPSHOT_VERSION or payload.get("key") != key:
+            return None
+        st = src.stat()
+        if payload.get("mtime_ns") == st.st_mtime_ns and payload.get("size") == st.st_size:
+            return payload["df"]
+        # mtime nesedí – rozhodne obsah
+        if payload.get("sha1") == _file_sha1(src):
+            _write_snapshot(src, key, payload["df"], sha1=payload["sha1"])  # obnov rychlý podpis
+            return payload["df"]
+    except Exception:
+        return None
+    return None
+
+
+def _write_snapshot(src: Path, key: str, df: pd.DataFrame, *, sha1: Optional[str] = None) -> None:
+    """Best-effort zápis snapshotu (read-only složka apod. nesmí shodit načtení)."""
+    try:
+        st = src.stat()
+        payload = {
+            "version": _SNAPSHOT_VERSION,
+            "key": key,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha1": sha1 or _file_sha1(src),
+            "df": df,
+        }
+        snap = _snapshot_path(src)
+        tmp = snap.with_name(snap.name + ".tmp")
+        pd.to_pickle(payload, tmp)
+        os.replace(tmp, snap)
+    except Exception:
+        pass
+
+
+def _load_cached(src, key: str, read_clean: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    src = Path(src)
+    if _snapshot_enabled():
+        df = _read_snapshot(src, key)
+        if df is not None:
+            _SNAPSHOT_STATS["hit"] += 1
+            return df
+    _SNAPSHOT_STATS["miss"] += 1
+    df = read_clean()
+    if _snapshot_enabled():
+        _write_snapshot(src, key, df)
+    return df
+
+
+def _read_recepty() -> pd.DataFrame:
+    recepty = pd.read_excel(RECEPTY_FILE, sheet_name=RECEPTY_SHEET)
+    clean_columns(recepty)
+    return recepty
+
+
+def _read_plan() -> pd.DataFrame:
+    plan = pd.read_excel(PLAN_FILE)
+    clean_columns(plan)
+    if "datum" in plan.columns:
+        to_date_col(plan, "datum")
+    return plan
+
+
 def nacti_data():
     """
     Načte receptury a plán z Excelů a provede základní očistu.
     Receptury: sheet 'HEO - Kusovníkové vazby platné '
     Plán:      libovolný sheet (default)
+
+    Očištěné DF se drží ve snapshotu vedle sešitu; Excel se parsuje jen při změně zdroje.
     """
-    recepty = pd.read_excel(RECEPTY_FILE, sheet_name="HEO - Kusovníkové vazby platné ")
-    plan    = pd.read_excel(PLAN_FILE)
-    clean_columns(recepty)
-    clean_columns(plan)
-    if "datum" in plan.columns:
-        to_date_col(plan, "datum")
+    recepty = _load_cached(RECEPTY_FILE, f"recepty:{RECEPTY_SHEET}", _read_recepty)
+    plan    = _load_cached(PLAN_FILE, "plan", _read_plan)
     return recepty, plan
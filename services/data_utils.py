@@ -1,4 +1,5 @@
 # services/data_utils.py
+import numpy as np
 import pandas as pd
 from datetime import date
 import math
@@ -35,6 +36,9 @@ def fmt_cz_date(v):
     except Exception:
         return str(v) if v is not None else ""
 
+_TRUTHY = frozenset({"true", "t", "yes", "pravda", "y", "ano", "a", "1", "x", "✓", "✔"})
+_FALSY = frozenset({"false", "f", "no", "nepravda", "n", "ne", "0", "", "-"})
+
 def to_bool_cell_excel(v) -> bool:
     """
     Normalizace různých vstupů na bool pro Excel zápis/čtení.
@@ -64,9 +68,9 @@ def to_bool_cell_excel(v) -> bool:
 
     # Řetězce
     s = _norm_str(v)
-    if s in {"true", "t", "yes", "pravda","y", "ano", "a", "1", "x", "✓", "✔"}:
+    if s in _TRUTHY:
         return True
-    if s in {"false", "f", "no","nepravda" "n", "ne", "0", "", "-"}:
+    if s in _FALSY:
         return False
 
     # Zkusíme číselný string ("0", "0.0", "1,0", ...)
@@ -101,6 +105,149 @@ def norm_num_to_str(v) -> str:
             return ""
         return str(v).strip()
 
+# ---- Vektorové varianty (Series) – výsledek je shodný se skalárními funkcemi ----
+# Rychlá cesta řeší typické hodnoty (bool/číselné sloupce, opakující se texty,
+# celá čísla jako text); co nejde rozhodnout přesně, dopočítá skalární funkce.
+
+_INT_TEXT = r"^([+-]?)([0-9]+)(?:\.([0-9]*))?$"
+_EXACT_INT = 2 ** 53          # do této hodnoty je float → int převod přesný
+_MAX_DIGITS = 15              # text s ≤ 15 číslicemi float nepřekulatí přes celé číslo
+
+
+def _plain_numeric(s: pd.Series) -> bool:
+    """Číselný numpy dtype (bez bool a bez nullable Int64/Float64 s pd.NA)."""
+    return isinstance(s.dtype, np.dtype) and s.dtype.kind in "iuf"
+
+
+def _typed_parts(s: pd.Series):
+    """Masky str / bool / int+float buněk v object Series (ostatní jdou skalárně)."""
+    types = s.map(type)
+    return types.eq(str).to_numpy(), types.eq(bool).to_numpy(), types.isin([int, float]).to_numpy()
+
+
+def _int_text_num(a: np.ndarray, truncate: bool):
+    """Celočíselný text pro float pole: (maska přesně převedených, texty)."""
+    with np.errstate(invalid="ignore"):
+        v = np.trunc(a) if truncate else a
+        ok = np.isfinite(v) & (np.abs(v) < _EXACT_INT)
+        if not truncate:
+            ok &= v == np.floor(v)
+    return ok, v[ok].astype(np.int64).astype(str)
+
+
+def _int_text_str(u: pd.Series, truncate: bool):
+    """Celočíselný text pro stringy ("150", " 150,0 ", "-7.25" při truncate)."""
+    parts = u.str.strip().str.replace(",", ".", regex=False).str.extract(_INT_TEXT)
+    frac = parts[2].fillna("")
+    ok = parts[1].notna() & (parts[1].str.len() + frac.str.len() <= _MAX_DIGITS)
+    if not truncate:
+        ok &= frac.str.fullmatch("0*")
+    ok = ok.fillna(False).to_numpy(dtype=bool)
+    return ok, (parts[0] + parts[1])[ok].astype(np.int64).astype(str).to_numpy()
+
+
+def _text_series(s: pd.Series, scalar, truncate: bool, nan_text) -> pd.Series:
+    out = np.empty(len(s), dtype=object)
+    if _plain_numeric(s):
+        a = s.to_numpy(dtype=float)
+        ok, txt = _int_text_num(a, truncate)
+        out[ok] = txt
+        rest = ~ok
+        if nan_text is not None:
+            nan = np.isnan(a)
+            out[nan] = nan_text
+            rest &= ~nan
+        out[rest] = s[rest].map(scalar).to_numpy(dtype=object)
+        return pd.Series(out, index=s.index, name=s.name)
+
+    s = s.astype(object)
+    is_str, _, is_num = _typed_parts(s)
+    done = np.zeros(len(s), dtype=bool)
+    if is_num.any():
+        a = pd.to_numeric(s[is_num], errors="coerce").to_numpy(dtype=float)
+        ok, txt = _int_text_num(a, truncate)
+        idx = np.flatnonzero(is_num)[ok]
+        out[idx], done[idx] = txt, True
+    if is_str.any():
+        codes, uniq = pd.factorize(s[is_str])
+        u = pd.Series(uniq, dtype=object)
+        ok, txt = _int_text_str(u, truncate)
+        vals = np.empty(len(u), dtype=object)
+        vals[ok] = txt
+        vals[~ok] = u[~ok].map(scalar).to_numpy(dtype=object)
+        out[is_str], done[is_str] = vals[codes], True
+    rest = ~done
+    out[rest] = s[rest].map(scalar).to_numpy(dtype=object)
+    return pd.Series(out, index=s.index, name=s.name)
+
+
+def _str_bool_uniques(u: pd.Series) -> np.ndarray:
+    norm = (u.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+            .str.strip().str.lower())
+    res = norm.isin(_TRUTHY).to_numpy().copy()
+    rest = ~(res | norm.isin(_FALSY).to_numpy())
+    if rest.any():
+        num = pd.to_numeric(norm[rest].str.replace(",", ".", regex=False), errors="coerce")
+        parsed = num.notna().to_numpy()
+        idx = np.flatnonzero(rest)
+        res[idx[parsed]] = num[parsed].to_numpy() != 0
+        res[idx[~parsed]] = u.iloc[idx[~parsed]].map(to_bool_cell_excel).to_numpy(dtype=bool)
+    return res
+
+
+def to_bool_series(s: pd.Series) -> pd.Series:
+    """Vektorová obdoba `s.map(to_bool_cell_excel).astype(bool)`."""
+    if pd.api.types.is_bool_dtype(s) and not s.hasnans:
+        return s.astype(bool)
+    if _plain_numeric(s):
+        a = s.to_numpy(dtype=float)
+        return pd.Series(~np.isnan(a) & (a != 0), index=s.index, name=s.name)
+
+    s = s.astype(object)
+    out = np.zeros(len(s), dtype=bool)
+    is_str, is_bool, is_num = _typed_parts(s)
+    if is_str.any():
+        codes, uniq = pd.factorize(s[is_str])
+        out[is_str] = _str_bool_uniques(pd.Series(uniq, dtype=object))[codes]
+    if is_bool.any():
+        out[is_bool] = s[is_bool].astype(bool).to_numpy()
+    if is_num.any():
+        a = pd.to_numeric(s[is_num], errors="coerce").to_numpy(dtype=float)
+        ok = ~np.isnan(a)                       # NaN (i nepřevoditelné) dopočítá skalár
+        out[np.flatnonzero(is_num)[ok]] = a[ok] != 0
+        is_num[np.flatnonzero(is_num)[~ok]] = False
+    rest = ~(is_str | is_bool | is_num)
+    if rest.any():
+        out[rest] = s[rest].map(to_bool_cell_excel).to_numpy(dtype=bool)
+    return pd.Series(out, index=s.index, name=s.name)
+
+
 def normalize_key_series(s: pd.Series) -> pd.Series:
-    """Vektorová normalizace pro klíčové sloupce (SK/RC apod.)."""
-    return s.map(norm_num_to_str)
+    """Vektorová normalizace pro klíčové sloupce (SK/RC apod.) = `s.map(norm_num_to_str)`."""
+    return _text_series(s, norm_num_to_str, truncate=False, nan_text="")
+
+
+def key_txt(v) -> str:
+    """
+    Textový klíč ingrediencí: celé číslo (useknuté, "7.9" → "7") nebo ořezaný text.
+    None -> ""
+    """
+    if v is None:
+        return ""
+    try:
+        return str(int(float(str(v).replace(",", "."))))
+    except Exception:
+        return str(v).strip()
+
+
+def first_nonempty(s: pd.Series):
+    """První neprázdná hodnota skupiny (agregace názvů/jednotek); jinak ""."""
+    for x in s:
+        if str(x).strip() != "":
+            return x
+    return ""
+
+
+def key_txt_series(s: pd.Series) -> pd.Series:
+    """Vektorová obdoba `s.map(key_txt)`."""
+    return _text_series(s, key_txt, truncate=True, nan_text=None)
@@ -25,6 +25,8 @@ MSG = {
     "semis_index_map":     "Chyba mapování řádku.\nZkuste přepnout zobrazení detailů a poté zpět.",
     "semis_weekly_no_src": "Pro tento týdenní součet nebyly nalezeny žádné zdrojové řádky.\nZkontrolujte plán a zkuste jiný týden.",
     "semis_save":          "Nepodařilo se uložit změny do souboru polotovarů.\nMožná je Excel soubor otevřený jinde. Zavřete ho a zkuste akci znovu.",
+    "state_journal":       "Nepodařilo se načíst nebo zapsat deník stavů (koupeno/vyrobeno).\nStavy se tentokrát načtou z Excelů; zkontrolujte soubor stavy.jsonl.",
+    "state_db":            "Nepodařilo se otevřít nebo aktualizovat databázi plánovače (planovac.sqlite).\nAplikace pokračuje bez databáze.",
     "semis_save_weekly":   "Nepodařilo se uložit týdenní součet do souboru polotovarů.\nMožná je Excel soubor otevřený jinde. Zavřete ho a zkuste akci znovu.",
 
     # --- Ostatní ---
@@ -2,46 +2,47 @@
 from pathlib import Path
 import pandas as pd
 import services.paths as sp
-from .data_utils import to_date_col, find_col, to_bool_cell_excel
+from .data_utils import to_date_col, find_col, to_bool_series, key_txt_series
+from . import xlsx_stream as XS
 
 
-def _safe_int(v):
-    try:
-        return int(float(str(v).replace(",", ".")))
-    except Exception:
-        return None
-
-def _key_txt(v) -> str:
-    if v is None:
-        return ""
-    i = _safe_int(v)
-    return str(i) if i is not None else str(v).strip()
-
 def _normalize_keys_inplace(df: pd.DataFrame):
     """Sjednotí klíčové sloupce na stabilní typy/obsah."""
     if "datum" in df.columns:
         to_date_col(df, "datum")
     for c in ("ingredience_sk","ingredience_rc"):
         if c in df.columns:
-            df[c] = df[c].map(_key_txt)  # jako text klíč
+            df[c] = key_txt_series(df[c])  # jako text klíč
     for c in ("nazev","jednotka"):
         if c in df.columns:
             df[c] = df[c].astype(str).str.strip()
 
-def ensure_output_excel(data):
+def _write_frame(out: Path, df: pd.DataFrame, writer_engine: str, streaming) -> None:
+    """Zápis jednoho listu – buď přes pd.ExcelWriter, nebo streamem (xlsxwriter constant_memory)."""
+    if XS.streaming_enabled(streaming):
+        XS.write_sheets(out, [XS.frame_sheet("Sheet1", df)])
+        return
+    with pd.ExcelWriter(out, engine=writer_engine) as writer:
+        df.to_excel(writer, index=False)
+
+def ensure_output_excel(data, *, merge_old: bool = True):
     """Zpětná kompatibilita pro ingredience (bool sloupec 'koupeno')."""
     ensure_output_excel_generic(
        data=data,
        output_path=sp.OUTPUT_EXCEL,  # DŮLEŽITÉ: čte se vždy runtime hodnota (možná monkeypatchnutá)
        bool_col="koupeno",
+       merge_old=merge_old,
    )
-def ensure_output_excel_generic(data, output_path, bool_col="koupeno", *, writer_engine="openpyxl"):
+def ensure_output_excel_generic(data, output_path, bool_col="koupeno", *, writer_engine="openpyxl", merge_old=True,
+                                streaming=None):
     """
     Obecný zápis výsledku:
       - drží (a normalizuje) bool sloupec `bool_col`
       - merge se starým souborem, aby zůstaly zachované stavy
+        (merge_old=False: data už nesou autoritativní stav – např. z deníku – a jen se exportují)
       - unifikuje klíče (datum, ingredience_sk/rc, nazev, jednotka) → bez dtype konfliktů
       - zapisuje POUZE přes xlsxwriter v 'with' bloku (žádné visící file-handles)
+      - streaming=True (nebo FG_XLSX_STREAM=1): jednoprůchodový zápis s konstantní pamětí
     """
     # --- příjem nových dat ---
     if isinstance(data, pd.DataFrame):
@@ -57,14 +58,16 @@ def ensure_output_excel_generic(data, output_path, bool_col="koupeno", *, writer
     new_k = find_col(df_new, [bool_col]) or bool_col
     if new_k not in df_new.columns:
         df_new[new_k] = False
-    df_new[new_k] = df_new[new_k].map(to_bool_cell_excel).astype(bool)
+    df_new[new_k] = to_bool_series(df_new[new_k])
 
-    # --- když neexistuje starý soubor → rovnou zapiš (po přejmenování sloupce) ---
-    try:
-        df_old = pd.read_excel(output_path)
-        has_old = True
-    except Exception:
-        has_old = False
+    # --- když neexistuje starý soubor (nebo se nemerguje) → rovnou zapiš (po přejmenování sloupce) ---
+    has_old = False
+    if merge_old:
+        try:
+            df_old = pd.read_excel(output_path)
+            has_old = True
+        except Exception:
+            has_old = False
 
     out = Path(output_path)
     out.parent.mkdir(parents=True, exist_ok=True)
@@ -72,12 +75,11 @@ def ensure_output_excel_generic(data, output_path, bool_col="koupeno", *, writer
     if not has_old:
         if new_k != bool_col:
             df_new = df_new.rename(columns={new_k: bool_col})
-        df_new[bool_col] = df_new[bool_col].map(to_bool_cell_excel).astype(bool)
+        df_new[bool_col] = to_bool_series(df_new[bool_col])
         _normalize_keys_inplace(df_new)
 
         # Bezpečný zápis – vždy přes xlsxwriter
-        with pd.ExcelWriter(out, engine=writer_engine) as writer:
-            df_new.to_excel(writer, index=False)
+        _write_frame(out, df_new, writer_engine, streaming)
         return
 
     # --- máme stará data → merge ---
@@ -88,7 +90,7 @@ def ensure_output_excel_generic(data, output_path, bool_col="koupeno", *, writer
     old_k = find_col(df_old, [bool_col]) or bool_col
     if old_k not in df_old.columns:
         df_old[old_k] = False
-    df_old[old_k] = df_old[old_k].map(to_bool_cell_excel).astype(bool)
+    df_old[old_k] = to_bool_series(df_old[old_k])
 
     # KLÍČE: jen identifikační sloupce (NE množství apod.)
     preferred_keys = ["datum", "ingredience_sk", "ingredience_rc", "nazev", "jednotka"]
@@ -124,7 +126,7 @@ def ensure_output_excel_generic(data, output_path, bool_col="koupeno", *, writer
     if new_k in merged.columns:
         merged[bool_col] = merged[bool_col] | merged[new_k]
 
-    merged[bool_col] = merged[bool_col].map(to_bool_cell_excel).astype(bool)
+    merged[bool_col] = to_bool_series(merged[bool_col])
 
     # úklid pomocných sloupců
     for c in [old_suff, old_k, new_k]:
@@ -134,5 +136,4 @@ def ensure_output_excel_generic(data, output_path, bool_col="koupeno", *, writer
     _normalize_keys_inplace(merged)
 
     # Bezpečný zápis – vždy přes xlsxwriter
-    with pd.ExcelWriter(out, engine=writer_engine) as writer:
-        merged.to_excel(writer, index=False)
+    _write_frame(out, merged, writer_engine, streaming)
@@ -1,5 +1,6 @@
 # services/graph_builder.py
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 from typing import Dict, List
 from services.graph_model import Graph, Node, Edge, NodeId, Demand
@@ -73,6 +74,84 @@ def build_nodes_from_recipes(recepty: pd.DataFrame) -> Dict[NodeId, Node]:
     return nodes
 
 
+def _int_keys(s: pd.Series) -> pd.Series:
+    """_safe_int po sloupcích: převod jen přes unikátní hodnoty (SK/RC se v kusovníku hodně opakují)."""
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    mapped = np.array([_safe_int(u) for u in uniques], dtype=object)
+    return pd.Series(mapped[codes], index=s.index, dtype=object)
+
+
+def build_nodes_from_recipes_columnar(recepty: pd.DataFrame) -> Dict[NodeId, Node]:
+    """
+    Sloupcová varianta build_nodes_from_recipes – vrací shodný slovník uzlů (pořadí uzlů,
+    jména, jednotky i pořadí hran). Klíče, jména a jednotky se odvodí groupby operacemi
+    nad "událostmi" (rodič, dítě pro každý řádek), Node/Edge objekty vznikají až na konci.
+    """
+    r = _prepare_recepty(recepty)
+
+    raw = recepty.copy()
+    clean_columns(raw)
+    p_sk_col  = find_col(raw, ["SK", "sk"])
+    p_reg_col = find_col(raw, ["Reg. č.", "Reg. č", "Reg.č.", "reg. č.", "reg. č", "reg c", "reg.c"])
+    p_nm_col  = find_col(raw, ["Název 1", "Nazev 1", "Název", "Nazev"])
+
+    # jména rodičů z "Název 1" – poslední neprázdný výskyt vyhrává (stejně jako dict v řádkové verzi)
+    name_map = pd.DataFrame(columns=["sk", "rc", "_nm"])
+    if p_sk_col and p_reg_col and p_nm_col:
+        nm = pd.DataFrame({
+            "sk": _int_keys(raw[p_sk_col]),
+            "rc": _int_keys(raw[p_reg_col]),
+            "_nm": [str(v or "").strip() for v in raw[p_nm_col].tolist()],
+        })
+        nm = nm[nm["sk"].notna() & nm["rc"].notna() & (nm["_nm"] != "")]
+        name_map = nm.drop_duplicates(["sk", "rc"], keep="last")
+
+    n = len(r)
+    p_sk, p_rc = _int_keys(r["_P_SK"]), _int_keys(r["_P_REG"])
+    c_sk, c_rc = _int_keys(r["_C_SK"]), _int_keys(r["_C_REG"])
+    if n and (p_sk.isna() | p_rc.isna() | c_sk.isna() | c_rc.isna()).any():
+        raise KeyError("Nevalidní SK/RC v receptuře")
+
+    def _col(name: str) -> pd.Series:
+        v = r[name] if name in r.columns else ""
+        return pd.Series(v, index=r.index, dtype=object)
+
+    # události v pořadí zpracování: řádek i → (rodič, dítě)
+    pos = np.arange(n)
+    ev = pd.concat([
+        pd.DataFrame({"_ord": pos * 2,     "sk": p_sk.values, "rc": p_rc.values,
+                      "_given": _col("_P_NAME").values, "_unit": ""}),
+        pd.DataFrame({"_ord": pos * 2 + 1, "sk": c_sk.values, "rc": c_rc.values,
+                      "_given": _col("_C_NAME").values, "_unit": _col("_UNIT").values}),
+    ], ignore_index=True).sort_values("_ord", kind="mergesort")
+
+    # kandidát jména: vlastní jméno, jinak mapa z "Název 1"
+    ev = ev.merge(name_map, on=["sk", "rc"], how="left", sort=False)
+    given = ev["_given"].map(lambda v: str(v).strip() if v else "")
+    ev["_cand"] = given.where(given != "", ev["_nm"].fillna(""))
+    ev["_fallback"] = ev["sk"].astype(str) + "-" + ev["rc"].astype(str)
+
+    # první použitelné jméno (fallback se může přepsat lepším jménem) a první neprázdná jednotka
+    named = ev[(ev["_cand"] != "") & (ev["_cand"] != ev["_fallback"])]
+    first_name = named.groupby(["sk", "rc"], sort=False)["_cand"].first()
+    with_unit = ev[ev["_unit"].map(bool)]
+    first_unit = with_unit.groupby(["sk", "rc"], sort=False)["_unit"].first()
+
+    nodes: Dict[NodeId, Node] = {}
+    name_d, unit_d = first_name.to_dict(), first_unit.to_dict()
+    for sk, rc in ev[["sk", "rc"]].drop_duplicates().itertuples(index=False, name=None):
+        nid = (int(sk), int(rc))
+        unit = unit_d.get((sk, rc))
+        nodes[nid] = Node(id=nid, name=name_d.get((sk, rc), f"{sk}-{rc}"),
+                          unit=(str(unit) if unit is not None else None))
+
+    qty = r["_QTY"].tolist() if n else []
+    for ps, pr, cs, cr, q in zip(p_sk.tolist(), p_rc.tolist(), c_sk.tolist(), c_rc.tolist(), qty):
+        nodes[(ps, pr)].edges.append(Edge(child=(cs, cr), per_unit_qty=float(q or 0)))
+
+    return nodes
+
+
 def expand_plan_to_demands(plan: pd.DataFrame, nodes: Dict[NodeId, Node]) -> List[Demand]:
     """Z plánu (400-rc, datum, množství) vytvoří demands na FINÁLy pro dané dny."""
     clean_columns(plan)
@@ -31,3 +31,23 @@ class Demand:
 class Graph:
     nodes: Dict[NodeId, Node] = field(default_factory=dict)
     demands: List[Demand] = field(default_factory=list)
+    # Cache rozpadů na jednotku kořene: (druh, uzel) -> [(potomek, množství na 1 ks), ...]
+    # Plní ji projekce; nový graf = prázdná cache, při změně hran volej invalidate_explosions().
+    explosions: Dict[Tuple[str, NodeId], List[Tuple[NodeId, float]]] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+    # Reverzní index list -> předci SK 300 pro readiness (services/readiness.py), staví se líně
+    readiness_index: Optional[object] = field(default=None, repr=False, compare=False)
+    # Verze stavů uzlů (bought/produced); graph_store ji zvyšuje při každé změně příznaku.
+    # Memo readiness (readiness_memo = (verze, {klíč: výsledek})) platí jen pro stejnou verzi.
+    state_version: int = field(default=0, compare=False)
+    readiness_memo: Optional[Tuple[int, Dict]] = field(default=None, repr=False, compare=False)
+
+    def invalidate_explosions(self) -> None:
+        """Zahoď vše odvozené ze struktury hran (rozpady i readiness index)."""
+        self.explosions.clear()
+        self.readiness_index = None
+        self.readiness_memo = None
+
+    def bump_state(self) -> None:
+        self.state_version += 1
@@ -1,17 +1,24 @@
 # services/graph_store.py
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import Optional, Tuple, Set, Iterable
+import os
+import atexit
+from typing import Dict, List, Optional, Tuple, Set, Iterable
 import pandas as pd
 from datetime import date, datetime
+from pathlib import Path
 from services import error_messages as ERR
 from services.paths import OUTPUT_EXCEL, OUTPUT_SEMI_EXCEL
 from services.excel_service import ensure_output_excel
 from services.semi_excel_service import ensure_output_semis_excel
+from services.persist_queue import WriteBehindQueue
+from services.state_journal import StateJournal
+import services.paths as sp
 
 
 # ============== JEDINÝ ZDROJ PRAVDY: GRAF ==============
 from services.graph_model import Graph, NodeId, WorkKey
+from services.readiness import note_bought
 
 _G: Optional[Graph] = None
 
@@ -22,12 +29,41 @@ _ING_DF: Optional[pd.DataFrame] = None               # ingredience (DataFrame)
 _SEMIS_PRE: Optional[pd.DataFrame] = None            # polotovary – přehled
 _SEMIS_DET: Optional[pd.DataFrame] = None            # polotovary – detaily
 
+# Index řádků projekcí: (datum, SK, RC) -> pozice v _ING_DF / _SEMIS_PRE.
+# Změna příznaku koupeno/vyrobeno nemění množství → přepíše se jen sloupec u těchto řádků.
+_ING_ROWS: Dict[Tuple[object, int, int], List[int]] = {}
+_SEMIS_ROWS: Dict[Tuple[object, int, int], List[int]] = {}
+
+# Zápisy do Excelu po kliknutí jdou přes write-behind frontu (paměť se mění hned,
+# soubor se zapíše debounced na pozadí; flush_pending() při zavření okna / konci aplikace).
+def _persist_debounce_s() -> float:
+    """FG_PERSIST_DEBOUNCE_MS v sekundách; neplatná hodnota nesmí shodit import → výchozích 500 ms."""
+    try:
+        ms = float(os.environ.get("FG_PERSIST_DEBOUNCE_MS", "500"))
+    except ValueError:
+        ms = 500.0
+    return ms / 1000.0 if ms >= 0 else 0.5
+
+_PERSIST = WriteBehindQueue(debounce_s=_persist_debounce_s())
+_PERSIST_MSG = {
+    "ingredients": ("results_save", "Chyba při ukládání ingrediencí."),
+    "semis": ("semis_save", "Chyba při ukládání polotovarů."),
+}
+
 # Stavové per-řádek (datum, SK, RC) – to je to, co uživatel „odklikává“ v GUI:
 #  - ingredience: koupeno
 #  - polotovary: vyrobeno (naplánováno)
 _BOUGHT_KEYS: Set[Tuple[object, int, int]] = set()   # (datum, ingredience_sk, ingredience_rc)
 _PRODUCED_SEMIS_KEYS: Set[Tuple[object, int, int]] = set()  # (datum, polotovar_sk=300, polotovar_rc)
 
+# Autoritativní uložení těchto množin: append-only deník (services/state_journal.py).
+# None = deník vypnutý (FG_NO_JOURNAL=1) nebo nedostupný → Excel merge jako dřív.
+_JOURNAL: Optional[StateJournal] = None
+
+# Volitelný SQLite backend (FG_STORE=sqlite): graf + stavy v DB, projekce SQL agregací.
+# Pro stavy zastupuje _JOURNAL (stejné rozhraní).
+_DB = None  # Optional[SqliteStore]
+
 
 # ----------------------------- Pomocné -------------------------------------------------
 def _to_date(v) -> object:
@@ -60,9 +96,9 @@ def _key_triplet(dt, sk, rc) -> Tuple[object, int, int]:
 # ----------------------------- Build grafu a projekce -----------------------------------
 def _build_graph() -> Graph:
     from services.data_loader import nacti_data
-    from services.graph_builder import build_nodes_from_recipes, expand_plan_to_demands, attach_status_from_excels
+    from services.graph_builder import build_nodes_from_recipes_columnar, expand_plan_to_demands, attach_status_from_excels
     recepty, plan = nacti_data()
-    nodes = build_nodes_from_recipes(recepty)
+    nodes = build_nodes_from_recipes_columnar(recepty)
     g = Graph(nodes=nodes, demands=expand_plan_to_demands(plan, nodes))
     # přenést stavy z dřívějších Excelů do uzlů (globální list bought / semi produced)
     try:
@@ -71,71 +107,109 @@ def _build_graph() -> Graph:
         pass
     return g
 
+def _row_index(df: pd.DataFrame, sk_col: str, rc_col: str) -> Dict[Tuple[object, int, int], List[int]]:
+    """(datum, SK, RC) -> pozice řádků v df (klíče normalizované přes _key_triplet)."""
+    rows: Dict[Tuple[object, int, int], List[int]] = {}
+    if df.empty:
+        return rows
+    for pos, (dt, sk, rc) in enumerate(zip(df["datum"], df[sk_col], df[rc_col])):
+        try:
+            k = _key_triplet(dt, sk, rc)
+        except Exception:
+            continue
+        rows.setdefault(k, []).append(pos)
+    return rows
+
+def _flags_from_keys(n: int, rows: Dict[Tuple[object, int, int], List[int]], keys: Set[Tuple[object, int, int]]) -> List[bool]:
+    flags = [False] * n
+    for k, positions in rows.items():
+        if k in keys:
+            for pos in positions:
+                flags[pos] = True
+    return flags
+
 def _recompute_ingredients_df(g: Graph) -> pd.DataFrame:
     # projekce ingrediencí ze stromu
+    global _ING_ROWS
     from services.projections.ingredients_projection import to_ingredients_df
-    df = to_ingredients_df(g)
+    df = _DB.ingredients_df() if _DB is not None else to_ingredients_df(g)
     # doplň per-řádek koupeno dle _BOUGHT_KEYS (GUI filtruje podle tohoto sloupce)
-    if not df.empty:
-        df["koupeno"] = df.apply(
-            lambda r: (_key_triplet(r.get("datum"), r.get("ingredience_sk"), r.get("ingredience_rc")) in _BOUGHT_KEYS),
-            axis=1
-        )
-    else:
-        df["koupeno"] = []
+    _ING_ROWS = _row_index(df, "ingredience_sk", "ingredience_rc")
+    df["koupeno"] = _flags_from_keys(len(df), _ING_ROWS, _BOUGHT_KEYS)
     return df
 
 def _recompute_semis_dfs(g: Graph) -> Tuple[pd.DataFrame, pd.DataFrame]:
     # projekce polotovarů ze stromu
+    global _SEMIS_ROWS
     from services.projections.semis_projection import to_semis_dfs
-    pre, det = to_semis_dfs(g)
+    pre, det = _DB.semis_dfs() if _DB is not None else to_semis_dfs(g)
     # přepiš 'vyrobeno' podle per-řádkových klíčů (datum, 300, rc)
+    # (detaily sloupec 'vyrobeno' nepotřebují; necháme bez úprav)
+    _SEMIS_ROWS = _row_index(pre, "polotovar_sk", "polotovar_rc")
     if not pre.empty:
         pre = pre.copy()
-        pre["vyrobeno"] = pre.apply(
-            lambda r: (_key_triplet(r.get("datum"), r.get("polotovar_sk"), r.get("polotovar_rc")) in _PRODUCED_SEMIS_KEYS),
-            axis=1
-        )
-    if not det.empty:
-        # detaily sloupec 'vyrobeno' nepotřebují; necháme bez úprav
-        pass
+        pre["vyrobeno"] = _flags_from_keys(len(pre), _SEMIS_ROWS, _PRODUCED_SEMIS_KEYS)
     return pre, det
 
-
-# ----------------------------- API: Inicializace / Reload -------------------------------
-def init_on_startup():
+def _patch_flags(df: Optional[pd.DataFrame], rows: Dict[Tuple[object, int, int], List[int]],
+                 col: str, changed: Iterable[Tuple[object, int, int]], keys: Set[Tuple[object, int, int]]) -> bool:
     """
-    Start:
-      1) postav graf,
-      2) spočítej projekce,
-      3) načti staré True stavy z Excelů do _BOUGHT_KEYS / _PRODUCED_SEMIS_KEYS,
-      4) sestav projekce (s doplněnými True) a ulož je do Excelů,
-      5) nastav cache (lazy – držíme DF v paměti, ale víme je rychle přepočítat).
+    Přepíše sloupec příznaku jen u řádků změněných klíčů (O(změněné řádky)).
+    Vrací False, když projekce ještě neexistuje – pak se musí přepočítat celá.
     """
-    global _G, _DIRTY_ING, _DIRTY_SEMIS, _ING_DF, _SEMIS_PRE, _SEMIS_DET
-    global _BOUGHT_KEYS, _PRODUCED_SEMIS_KEYS
-
-    try:
-        _G = _build_graph()
-    except Exception as e:
-        ERR.show_error(ERR.MSG.get("graph_init", "Chyba při sestavení grafu."), e)
-        _G = Graph()
+    if df is None or col not in df.columns:
+        return False
+    j = df.columns.get_loc(col)
+    for k in changed:
+        for pos in rows.get(k, ()):
+            df.iat[pos, j] = k in keys
+    return True
+
+
+def _close_db() -> None:
+    """Zavři spojení SQLite (i WAL) předtím, než se _DB zahodí nebo nahradí."""
+    global _DB
+    if _DB is not None:
+        try:
+            _DB.close()
+        except Exception:
+            pass
+    _DB = None
 
-    # 3) načti staré True z Excelů do per-řádkových množin
-    _BOUGHT_KEYS = set()
+def _open_db():
+    """SQLite backend, pokud je zapnutý (FG_STORE=sqlite); spojení se drží přes reload."""
+    global _DB
+    if os.environ.get("FG_STORE", "").strip().lower() != "sqlite":
+        _close_db()
+        return None
+    if _DB is None or Path(_DB.path) != Path(sp.STATE_DB):
+        from services.sqlite_store import SqliteStore
+        _close_db()
+        _DB = SqliteStore(sp.STATE_DB)
+    return _DB
+
+def _open_journal():
+    if os.environ.get("FG_NO_JOURNAL") == "1":
+        return None
+    if _DB is not None:
+        return _DB
+    return StateJournal(sp.STATE_JOURNAL)
+
+def _load_keys_from_excels() -> Tuple[Set[Tuple[object, int, int]], Set[Tuple[object, int, int]]]:
+    """Staré True z ingredience.xlsx / polotovary.xlsx (režim bez deníku a první start)."""
+    from services.data_utils import to_date_col
+    bought: Set[Tuple[object, int, int]] = set()
     try:
         ing_old = pd.read_excel(OUTPUT_EXCEL).fillna("")
         if not ing_old.empty and "koupeno" in ing_old.columns:
-            from services.data_utils import to_date_col
             to_date_col(ing_old, "datum")
             for _, r in ing_old.iterrows():
                 if str(r.get("koupeno", "")).strip().lower() in ("1","true","yes","ano","✓","x"):
-                    k = _key_triplet(r.get("datum"), r.get("ingredience_sk"), r.get("ingredience_rc"))
-                    _BOUGHT_KEYS.add(k)
+                    bought.add(_key_triplet(r.get("datum"), r.get("ingredience_sk"), r.get("ingredience_rc")))
     except Exception:
         pass
 
-    _PRODUCED_SEMIS_KEYS = set()
+    produced: Set[Tuple[object, int, int]] = set()
     try:
         semi_old = None
         try:
@@ -143,25 +217,72 @@ def init_on_startup():
         except Exception:
             semi_old = pd.read_excel(OUTPUT_SEMI_EXCEL).fillna("")
         if semi_old is not None and not semi_old.empty and "vyrobeno" in semi_old.columns:
-            from services.data_utils import to_date_col
             to_date_col(semi_old, "datum")
             for _, r in semi_old.iterrows():
                 if str(r.get("vyrobeno", "")).strip().lower() in ("1","true","yes","ano","✓","x"):
-                    k = _key_triplet(r.get("datum"), r.get("polotovar_sk"), r.get("polotovar_rc"))
-                    _PRODUCED_SEMIS_KEYS.add(k)
+                    produced.add(_key_triplet(r.get("datum"), r.get("polotovar_sk"), r.get("polotovar_rc")))
     except Exception:
         pass
+    return bought, produced
+
+
+# ----------------------------- API: Inicializace / Reload -------------------------------
+def init_on_startup():
+    """
+    Start:
+      1) postav graf,
+      2) spočítej projekce,
+      3) přehraj deník stavů do _BOUGHT_KEYS / _PRODUCED_SEMIS_KEYS
+         (první start bez deníku: import starých True z Excelů),
+      4) sestav projekce (s doplněnými True) a exportuj je do Excelů,
+      5) nastav cache (lazy – držíme DF v paměti, ale víme je rychle přepočítat).
+    """
+    global _G, _DIRTY_ING, _DIRTY_SEMIS, _ING_DF, _SEMIS_PRE, _SEMIS_DET
+    global _BOUGHT_KEYS, _PRODUCED_SEMIS_KEYS, _JOURNAL, _DB
+
+    # čekající zápisy musí být v Excelech dřív, než z nich načteme staré stavy
+    flush_pending()
+
+    try:
+        _G = _build_graph()
+    except Exception as e:
+        ERR.show_error(ERR.MSG.get("graph_init", "Chyba při sestavení grafu."), e)
+        _G = Graph()
+
+    # SQLite backend: do DB jen rozdíl proti minulému stavu
+    try:
+        if _open_db() is not None:
+            _DB.sync_graph(_G)
+    except Exception as e:
+        ERR.show_error(ERR.MSG.get("state_db", "Chyba databáze stavů."), e)
+        _close_db()
+
+    # 3) stavy z deníku (autoritativní); bez deníku jednorázový import starých True z Excelů
+    _JOURNAL = _open_journal()
+    try:
+        if _JOURNAL is not None and _JOURNAL.exists():
+            st = _JOURNAL.replay()
+            _BOUGHT_KEYS, _PRODUCED_SEMIS_KEYS = st["bought"], st["produced"]
+            _JOURNAL.compact()
+        else:
+            _BOUGHT_KEYS, _PRODUCED_SEMIS_KEYS = _load_keys_from_excels()
+            if _JOURNAL is not None:
+                _JOURNAL.reset({"bought": _BOUGHT_KEYS, "produced": _PRODUCED_SEMIS_KEYS})
+    except Exception as e:
+        ERR.show_error(ERR.MSG.get("state_journal", "Chyba deníku stavů."), e)
+        _JOURNAL = None
+        _BOUGHT_KEYS, _PRODUCED_SEMIS_KEYS = _load_keys_from_excels()
 
     # 4) spočítej projekce, doplň stavy a zapiš do Excelů
     try:
         _ING_DF = _recompute_ingredients_df(_G)
-        ensure_output_excel(_ING_DF)
+        ensure_output_excel(_ING_DF, merge_old=_JOURNAL is None)
     except Exception as e:
         ERR.show_error(ERR.MSG.get("results_save", "Chyba při ukládání ingrediencí."), e)
 
     try:
         _SEMIS_PRE, _SEMIS_DET = _recompute_semis_dfs(_G)
-        ensure_output_semis_excel(_SEMIS_PRE, _SEMIS_DET)
+        ensure_output_semis_excel(_SEMIS_PRE, _SEMIS_DET, merge_old=_JOURNAL is None)
     except Exception as e:
         ERR.show_error(ERR.MSG.get("semis_save", "Chyba při ukládání polotovarů."), e)
 
@@ -194,39 +315,46 @@ def get_semis_dfs() -> Tuple[pd.DataFrame, pd.DataFrame]:
     return _SEMIS_PRE.copy(), _SEMIS_DET.copy()
 
 
-# ----------------------------- API: Mutátory (GUI je volá při kliknutí) ----------------
-def set_ingredient_bought(dt, sk, rc, *, bought: bool = True) -> None:
-    """Označ/odznač danou ingredienci pro konkrétní datum jako koupenou + aktualizuj runtime graf."""
-    global _DIRTY_ING, _BOUGHT_KEYS, _G
-    k = _key_triplet(dt, sk, rc)
-
-    if bought:
-        _BOUGHT_KEYS.add(k)
-    else:
-        _BOUGHT_KEYS.discard(k)
+# ----------------------------- API: Persist (write-behind) ------------------------------
+def _persist_ingredients(df: pd.DataFrame) -> None:
+    # modulový lookup při zápisu (testy monkeypatchují ensure_output_excel)
+    merge_old = _JOURNAL is None  # s deníkem je Excel jen export (bez čtení a merge starého souboru)
+    _PERSIST.submit("ingredients", lambda: ensure_output_excel(df, merge_old=merge_old))
+    _report_persist_errors()
 
-    # --- důležité: přepiš stav v živém grafu, aby readiness fungovala hned ---
-    try:
-        i_sk = _to_int(sk)
-        i_rc = _to_int(rc)
-        nid = (i_sk if i_sk is not None else int(sk),
-               i_rc if i_rc is not None else int(rc))
-        g = get_graph()
-        node = g.nodes.get(nid)
-        if node is not None:
-            node.bought = bool(bought)
-    except Exception:
-        # nechceme shodit GUI kvůli drobné nekonzistenci; persist i tak proběhne
-        pass
+def _persist_semis(pre: pd.DataFrame, det: pd.DataFrame) -> None:
+    merge_old = _JOURNAL is None
+    _PERSIST.submit("semis", lambda: ensure_output_semis_excel(pre, det, merge_old=merge_old))
+    _report_persist_errors()
 
-    # invalidace projekce ingrediencí + persist do Excelu
-    _DIRTY_ING = True
-    df = get_ingredients_df()
+def _journal(kind: str, keys: List[Tuple[object, int, int]], value: bool) -> None:
+    """Zapiš změnu stavů do deníku (hned, synchronně – je to jen append řádku)."""
+    if _JOURNAL is None or not keys:
+        return
     try:
-        ensure_output_excel(df)  # merge udrží True i při drobných změnách
+        _JOURNAL.append(kind, keys, value)
     except Exception as e:
-        ERR.show_error(ERR.MSG.get("results_save", "Chyba při ukládání ingrediencí."), e)
+        ERR.show_error(ERR.MSG.get("state_journal", "Chyba deníku stavů."), e)
+
+def _report_persist_errors() -> None:
+    """Chyby zápisů z pracovního vlákna ukaž až tady (volá se z GUI vlákna)."""
+    for key, e in _PERSIST.pop_errors():
+        msg_key, fallback = _PERSIST_MSG.get(key, ("unhandled_exception", "Chyba při ukládání."))
+        ERR.show_error(ERR.MSG.get(msg_key, fallback), e)
+
+def flush_pending() -> None:
+    """Zapiš čekající změny do Excelů hned (zavření okna, reload, konec aplikace)."""
+    _PERSIST.flush()
+    _report_persist_errors()
+
+def persist_metrics() -> dict:
+    """Metriky write-behind fronty: queue_depth, submitted, coalesced, writes, errors, latence (ms)."""
+    return _PERSIST.metrics()
 
+atexit.register(_PERSIST.flush)
+
+
+# ----------------------------- API: Mutátory (GUI je volá při kliknutí) ----------------
 def set_ingredient_bought(dt, sk, rc, *, bought: bool = True) -> None:
     """Označ/odznač danou ingredienci pro konkrétní datum jako koupenou + okamžitě uprav runtime graf."""
     global _DIRTY_ING, _BOUGHT_KEYS
@@ -250,27 +378,36 @@ def set_ingredient_bought(dt, sk, rc, *, bought: bool = True) -> None:
         node = g.nodes.get(nid)
         if node is not None:
             node.bought = bool(bought)
+            note_bought(g, nid, bool(bought))
     except Exception:
         # nechceme kvůli nekonzistenci shodit GUI; persist proběhne i tak
         pass
 
-    # 3) invalidace a persist ingrediencí do Excelu
-    _DIRTY_ING = True
-    df = get_ingredients_df()
-    try:
-        ensure_output_excel(df)
-    except Exception as e:
-        ERR.show_error(ERR.MSG.get("results_save", "Chyba při ukládání ingrediencí."), e)
+    # 3) přepiš koupeno jen u dotčených řádků projekce a persistni do Excelu
+    _journal("bought", [k], bought)
+    if not _patch_flags(_ING_DF, _ING_ROWS, "koupeno", (k,), _BOUGHT_KEYS):
+        _DIRTY_ING = True
+    _persist_ingredients(get_ingredients_df())
 
 
-def set_ingredients_bought_many(keys: Iterable[Tuple[object, int, int]], *, bought: bool = True) -> None:
-    """Hromadně (např. více řádků): keys = (datum, sk, rc). Aktualizuje i runtime graf a persistne najednou."""
+def set_ingredients_bought_many(keys: Iterable[Tuple[object, int, int]], *, bought: bool = True,
+                                export: Optional[pd.DataFrame] = None) -> None:
+    """
+    Hromadně (např. více řádků): keys = (datum, sk, rc). Aktualizuje i runtime graf a persistne najednou.
+    export: tabulka, která se zapíše do ingredience.xlsx místo projekce (GUI zobrazující obsah sešitu).
+    """
     global _DIRTY_ING, _BOUGHT_KEYS
 
     # 1) uprav množinu koupených + runtime graf
     g = get_graph()
+    changed: List[Tuple[object, int, int]] = []
     for dt, sk, rc in keys:
-        k = _key_triplet(dt, sk, rc)
+        try:
+            k = _key_triplet(dt, sk, rc)
+        except Exception:
+            # pokračuj, ať hromadná operace doběhne
+            continue
+        changed.append(k)
         if bought:
             _BOUGHT_KEYS.add(k)
         else:
@@ -286,17 +423,16 @@ def set_ingredients_bought_many(keys: Iterable[Tuple[object, int, int]], *, boug
             node = g.nodes.get(nid)
             if node is not None:
                 node.bought = bool(bought)
+                note_bought(g, nid, bool(bought))
         except Exception:
             # pokračuj, ať hromadná operace doběhne
             pass
 
-    # 2) invalidace + jeden persist pro výkon
-    _DIRTY_ING = True
-    df = get_ingredients_df()
-    try:
-        ensure_output_excel(df)
-    except Exception as e:
-        ERR.show_error(ERR.MSG.get("results_save", "Chyba při ukládání ingrediencí."), e)
+    # 2) přepis koupeno u dotčených řádků + jeden persist pro výkon
+    _journal("bought", changed, bought)
+    if not _patch_flags(_ING_DF, _ING_ROWS, "koupeno", changed, _BOUGHT_KEYS):
+        _DIRTY_ING = True
+    _persist_ingredients(get_ingredients_df() if export is None else export)
 
 def set_semi_produced(dt, sk, rc, *, produced: bool = True) -> None:
     """Označ/odznač daný polotovar pro konkrétní datum jako vyrobený (naplánováno)."""
@@ -307,14 +443,37 @@ def set_semi_produced(dt, sk, rc, *, produced: bool = True) -> None:
     else:
         _PRODUCED_SEMIS_KEYS.discard(k)
 
-    _DIRTY_SEMIS = True
-    pre, det = get_semis_dfs()
-    try:
-        ensure_output_semis_excel(pre, det)
-    except Exception as e:
-        ERR.show_error(ERR.MSG.get("semis_save", "Chyba při ukládání polotovarů."), e)
+    _journal("produced", [k], produced)
+    get_graph().bump_state()
+    if not _patch_flags(_SEMIS_PRE, _SEMIS_ROWS, "vyrobeno", (k,), _PRODUCED_SEMIS_KEYS):
+        _DIRTY_SEMIS = True
+    _persist_semis(*get_semis_dfs())
 
-def set_semis_produced_many(keys: Iterable[Tuple[object, int, int]], *, produced: bool = True) -> None:
-    """Hromadně (agregace týdne) – keys = (datum, sk, rc)."""
+def set_semis_produced_many(keys: Iterable[Tuple[object, int, int]], *, produced: bool = True,
+                            export: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None) -> None:
+    """
+    Hromadně (agregace týdne) – keys = (datum, sk, rc). Jedna úprava množiny, jeden refresh, jeden persist.
+    export: (Prehled, Detaily) pro polotovary.xlsx místo projekce (GUI zobrazující obsah sešitu).
+    """
+    global _DIRTY_SEMIS
+
+    # 1) uprav množinu vyrobených
+    changed: List[Tuple[object, int, int]] = []
     for dt, sk, rc in keys:
-        set_semi_produced(dt, sk, rc, produced=produced)
+        try:
+            k = _key_triplet(dt, sk, rc)
+        except Exception:
+            # pokračuj, ať hromadná operace doběhne
+            continue
+        changed.append(k)
+    if produced:
+        _PRODUCED_SEMIS_KEYS.update(changed)
+    else:
+        _PRODUCED_SEMIS_KEYS.difference_update(changed)
+
+    # 2) přepis vyrobeno u dotčených řádků + jeden persist pro výkon
+    _journal("produced", changed, produced)
+    get_graph().bump_state()
+    if not _patch_flags(_SEMIS_PRE, _SEMIS_ROWS, "vyrobeno", changed, _PRODUCED_SEMIS_KEYS):
+        _DIRTY_SEMIS = True
+    _persist_semis(*(get_semis_dfs() if export is None else export))
@@ -16,3 +16,8 @@ PLAN_FILE    = BASE_DIR / "plan.xlsx"
 
 OUTPUT_EXCEL      = BASE_DIR / "ingredience.xlsx"
 OUTPUT_SEMI_EXCEL = BASE_DIR / "polotovary.xlsx"
+
+# deník stavů koupeno/vyrobeno (autoritativní; Excely výše jsou export)
+STATE_JOURNAL     = BASE_DIR / "stavy.jsonl"
+# volitelný SQLite backend graph_store (FG_STORE=sqlite)
+STATE_DB          = BASE_DIR / "planovac.sqlite"
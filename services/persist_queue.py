@@ -0,0 +1,135 @@
+# services/persist_queue.py
+"""
+Write-behind fronta pro zápisy do Excelu.
+
+Mutace v graph_store mění paměť okamžitě; zápis souboru se sem jen zařadí pod klíčem
+(např. "ingredients"). Další zápis se stejným klíčem před flushem nahradí předchozí
+(coalescing) – na disk jde vždy jen poslední snapshot. Pracovní vlákno čeká `debounce_s`
+od posledního zařazení (nejvýš `max_delay_s` od prvního) a pak vše zapíše najednou.
+
+flush() zapíše čekající položky synchronně ve volajícím vlákně (zavření okna, konec aplikace).
+Synchronní režim (bez vlákna): sync=True, nebo FG_SYNC_PERSIST=1 / PL_TEST_MODE=1.
+"""
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _env_sync() -> bool:
+    return os.environ.get("FG_SYNC_PERSIST") == "1" or os.environ.get("PL_TEST_MODE") == "1"
+
+
+class WriteBehindQueue:
+    def __init__(self, debounce_s: float = 0.5, max_delay_s: float = 3.0, *, sync: Optional[bool] = None):
+        self.debounce_s = float(debounce_s)
+        self.max_delay_s = float(max_delay_s)
+        self._sync = sync
+
+        self._lock = threading.Condition()
+        self._run_lock = threading.Lock()     # drží se po dobu zápisu dávky (worker i flush)
+        self._pending: Dict[str, Callable[[], None]] = {}
+        self._first_ts: Dict[str, float] = {}  # první zařazení klíče od posledního zápisu
+        self._last_submit = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+        self._errors: List[Tuple[str, Exception]] = []
+        self._stats = {
+            "submitted": 0,
+            "coalesced": 0,
+            "writes": 0,
+            "errors": 0,
+            "last_latency_ms": 0.0,   # zařazení -> zapsáno
+            "max_latency_ms": 0.0,
+            "last_write_ms": 0.0,     # doba samotného zápisu
+        }
+
+    # ---------------------------------------------------------------- API
+    def is_sync(self) -> bool:
+        return _env_sync() if self._sync is None else bool(self._sync)
+
+    def submit(self, key: str, fn: Callable[[], None]) -> None:
+        """Zařadí zápis pod klíčem; čekající zápis se stejným klíčem se nahradí."""
+        now = time.monotonic()
+        with self._lock:
+            self._stats["submitted"] += 1
+            if key in self._pending:
+                self._stats["coalesced"] += 1
+            else:
+                self._first_ts[key] = now
+            self._pending[key] = fn
+            self._last_submit = now
+            if not self.is_sync():
+                self._ensure_thread()
+                self._lock.notify_all()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Synchronně zapíše vše čekající (a počká na právě běžící dávku workeru)."""
+        with self._run_lock:
+            self._run_batch(self._take_all())
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            out = dict(self._stats)
+            out["queue_depth"] = len(self._pending)
+        return out
+
+    def pop_errors(self) -> List[Tuple[str, Exception]]:
+        """Chyby zápisů od posledního volání (pro zobrazení v GUI vlákně)."""
+        with self._lock:
+            errs, self._errors = self._errors, []
+        return errs
+
+    # ---------------------------------------------------------------- interní
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name="fg-write-behind", daemon=True)
+            self._thread.start()
+
+    def _take_all(self) -> List[Tuple[str, Callable[[], None], float]]:
+        with self._lock:
+            batch = [(k, fn, self._first_ts.pop(k, time.monotonic())) for k, fn in self._pending.items()]
+            self._pending.clear()
+        return batch
+
+    def _run_batch(self, batch) -> None:
+        for key, fn, first_ts in batch:
+            t0 = time.monotonic()
+            try:
+                fn()
+            except Exception as e:
+                print(f"[ERROR] Zápis '{key}' selhal: {e}", file=sys.stderr, flush=True)
+                with self._lock:
+                    self._stats["errors"] += 1
+                    self._errors.append((key, e))
+                continue
+            t1 = time.monotonic()
+            with self._lock:
+                self._stats["writes"] += 1
+                self._stats["last_write_ms"] = (t1 - t0) * 1000.0
+                self._stats["last_latency_ms"] = (t1 - first_ts) * 1000.0
+                self._stats["max_latency_ms"] = max(self._stats["max_latency_ms"], self._stats["last_latency_ms"])
+
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._lock.wait()
+                # debounce: čekej na klid, ale ne déle než max_delay_s od prvního zařazení
+                while self._pending:
+                    now = time.monotonic()
+                    oldest = min(self._first_ts.values(), default=now)
+                    due = min(self._last_submit + self.debounce_s, oldest + self.max_delay_s)
+                    if now >= due:
+                        break
+                    self._lock.wait(due - now)
+            with self._run_lock:
+                self._run_batch(self._take_all())
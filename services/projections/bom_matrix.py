@@ -0,0 +1,140 @@
+# services/projections/bom_matrix.py
+"""
+Maticový rozpad plánu: požadavky (finály × dny) × kusovník.
+
+Kusovník se zkompiluje do řídké matice v CSR tvaru (NumPy pole indptr/indices/data):
+řádek = kořen požadavku (finál), sloupec = cílový uzel (nákupní list nebo SK 300),
+hodnota = množství na 1 ks kořene. Rozpad všech požadavků je pak jedna vektorová
+operace (repeat + gather) místo Python smyček přes g.demands a node.edges.
+
+Řádky matice se skládají z vektorů v g.explosions (viz projekce), takže druh rozpadu
+(listy / polotovary) určuje předaná funkce `vector_fn(g, root)`.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.graph_model import Graph, NodeId
+
+VectorFn = Callable[[Graph, NodeId], List[Tuple[NodeId, float]]]
+
+
+@dataclass
+class BomMatrix:
+    """CSR kusovník: roots[i] -> sloupce indices[indptr[i]:indptr[i+1]] s množstvím data[...]"""
+    roots: List[NodeId]
+    root_index: Dict[NodeId, int]
+    cols: List[NodeId]
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+
+
+@dataclass
+class BomExpansion:
+    """
+    Rozpad všech požadavků (jeden záznam = požadavek × nenulová položka jeho řádku).
+    Pořadí záznamů odpovídá pořadí g.demands a pořadí položek ve vektoru kořene.
+    """
+    demand_idx: np.ndarray   # index do g.demands
+    col_idx: np.ndarray      # index do cols
+    qty: np.ndarray          # množství (qty požadavku × množství na 1 ks)
+    cols: List[NodeId]
+
+    def per_col(self, values) -> np.ndarray:
+        """Hodnoty zadané per sloupec (cols) rozprostře na záznamy rozpadu."""
+        return _gather(values, self.col_idx)
+
+    def per_demand(self, values) -> np.ndarray:
+        """Hodnoty zadané per požadavek (g.demands) rozprostře na záznamy rozpadu."""
+        return _gather(values, self.demand_idx)
+
+    def collapse(self, demand_codes: np.ndarray) -> "BomExpansion":
+        """
+        Sečte záznamy se stejným (kód požadavku, sloupec) – typicky kód = den.
+        demand_idx výsledku ukazuje na první požadavek skupiny (pro per_demand hodnoty).
+        """
+        if self.qty.size == 0:
+            return self
+        key = np.asarray(demand_codes, dtype=np.int64)[self.demand_idx] * len(self.cols) + self.col_idx
+        uniq, first, inv = np.unique(key, return_index=True, return_inverse=True)
+        qty = np.bincount(inv, weights=self.qty, minlength=len(uniq))
+        return BomExpansion(self.demand_idx[first], self.col_idx[first], qty, self.cols)
+
+
+def _gather(values, idx: np.ndarray) -> np.ndarray:
+    # dtype se odvodí z krátkého seznamu (stejně jako u DF z řádků), záznamy se pak jen indexují
+    return pd.Series(list(values)).to_numpy()[idx]
+
+
+def compile_bom(g: Graph, vector_fn: VectorFn, roots: List[NodeId]) -> BomMatrix:
+    """Zkompiluje řádky pro zadané kořeny do CSR (sloupce v pořadí prvního výskytu)."""
+    col_index: Dict[NodeId, int] = {}
+    indptr = np.zeros(len(roots) + 1, dtype=np.int64)
+    indices: List[int] = []
+    data: List[float] = []
+    for i, root in enumerate(roots):
+        for nid, per_unit in vector_fn(g, root):
+            j = col_index.setdefault(nid, len(col_index))
+            indices.append(j)
+            data.append(per_unit)
+        indptr[i + 1] = len(indices)
+
+    return BomMatrix(
+        roots=list(roots),
+        root_index={r: i for i, r in enumerate(roots)},
+        cols=list(col_index),
+        indptr=indptr,
+        indices=np.asarray(indices, dtype=np.int64),
+        data=np.asarray(data, dtype=float),
+    )
+
+
+def expand_demands(g: Graph, vector_fn: VectorFn) -> BomExpansion:
+    """Rozpadne všechny g.demands najednou (CSR řádky vybrané kořenem požadavku)."""
+    roots = list(dict.fromkeys(d.node for d in g.demands))
+    bom = compile_bom(g, vector_fn, roots)
+
+    n = len(g.demands)
+    if n == 0 or bom.indices.size == 0:
+        empty_i = np.zeros(0, dtype=np.int64)
+        return BomExpansion(empty_i, empty_i, np.zeros(0, dtype=float), bom.cols)
+
+    row = np.fromiter((bom.root_index[d.node] for d in g.demands), dtype=np.int64, count=n)
+    dem_qty = np.fromiter((d.qty for d in g.demands), dtype=float, count=n)
+
+    starts = bom.indptr[row]
+    counts = bom.indptr[row + 1] - starts
+    total = int(counts.sum())
+
+    demand_idx = np.repeat(np.arange(n, dtype=np.int64), counts)
+    # pozice v CSR: začátek řádku + pořadí uvnitř řádku
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    pos = np.repeat(starts, counts) + offsets
+
+    return BomExpansion(
+        demand_idx=demand_idx,
+        col_idx=bom.indices[pos],
+        qty=dem_qty[demand_idx] * bom.data[pos],
+        cols=bom.cols,
+    )
+
+
+def day_codes(g: Graph) -> Tuple[np.ndarray, pd.Index]:
+    """Kód dne per požadavek (pd.factorize nad d.key[0]; chybějící datum má vlastní kód)."""
+    codes, days = pd.factorize(pd.Series([d.key[0] for d in g.demands], dtype=object), use_na_sentinel=False)
+    return codes.astype(np.int64), pd.Index(days)
+
+
+def requirement_table(g: Graph, vector_fn: VectorFn) -> pd.DataFrame:
+    """
+    Tabulka den × cílový uzel (součet množství). Index = datum, sloupce = (SK, RC).
+    """
+    codes, days = day_codes(g)
+    exp = expand_demands(g, vector_fn).collapse(codes)
+    out = np.zeros((len(days), len(exp.cols)), dtype=float)
+    out[codes[exp.demand_idx], exp.col_idx] = exp.qty
+    return pd.DataFrame(out, index=days, columns=pd.MultiIndex.from_tuples(exp.cols, names=["sk", "rc"]))
@@ -1,7 +1,9 @@
 # services/projections/ingredients_projection.py
 from __future__ import annotations
 import pandas as pd
+from typing import Dict, List, Tuple
 from services.graph_model import Graph, NodeId
+from services.projections.bom_matrix import day_codes, expand_demands
 
 
 def _first3_int(x) -> int | None:
@@ -42,6 +44,43 @@ def _is_purchase_leaf(node, nid: NodeId) -> bool:
     return True
 
 
+def _leaf_vector(g: Graph, root: NodeId) -> List[Tuple[NodeId, float]]:
+    """
+    Rozpad 1 ks uzlu `root` do nákupních listů: [(list, množství na 1 ks), ...].
+    Výsledek se drží v g.explosions, takže opakované finály se nerozpadají znovu.
+    """
+    key = ("leaf", root)
+    vec = g.explosions.get(key)
+    if vec is not None:
+        return vec
+
+    acc: Dict[NodeId, float] = {}
+    stack: List[Tuple[NodeId, float]] = [(root, 1.0)]
+    while stack:
+        nid, qty = stack.pop()
+        node = g.nodes.get(nid)
+        if not node:
+            continue
+
+        # Pokud má hrany, pokračujeme rozpadem
+        if getattr(node, "edges", None):
+            for e in node.edges:
+                per_unit = float(e.per_unit_qty or 0.0)
+                if per_unit == 0.0:
+                    continue
+                stack.append((e.child, qty * per_unit))
+            continue
+
+        # Leaf – zvaž, zda je to skutečně nákupní položka (vyloučit 300/400)
+        if not _is_purchase_leaf(node, nid):
+            continue
+        acc[nid] = acc.get(nid, 0.0) + qty
+
+    vec = list(acc.items())
+    g.explosions[key] = vec
+    return vec
+
+
 def to_ingredients_df(g: Graph) -> pd.DataFrame:
     """
     Z grafu udělej DF pro vysledek.xlsx:
@@ -51,48 +90,26 @@ def to_ingredients_df(g: Graph) -> pd.DataFrame:
     - explicitně vylučuje SK300/400 (polotovary a hotové výrobky),
     - 'koupeno' nenutíme z grafu; nastavíme výchozí False a Excel merge případně zachová True.
     """
-    rows = []
-
-    # Projdi všechny finální požadavky a rozpadni je do listových (nákupních) uzlů
-    for d in g.demands:  # demands na finálech
-        stack: list[tuple[NodeId, float]] = [(d.node, d.qty)]
-        while stack:
-            nid, qty = stack.pop()
-            node = g.nodes.get(nid)
-            if not node:
-                continue
-
-            # Pokud má hrany, pokračujeme rozpadem
-            if getattr(node, "edges", None):
-                for e in node.edges:
-                    per_unit = float(e.per_unit_qty or 0.0)
-                    if per_unit == 0.0:
-                        continue
-                    stack.append((e.child, qty * per_unit))
-                continue
-
-            # Leaf – zvaž, zda je to skutečně nákupní položka (vyloučit 300/400)
-            if not _is_purchase_leaf(node, nid):
-                continue
-
-            sk, rc = nid
-            rows.append({
-                "datum": d.key[0],  # datum z požadavku
-                "ingredience_sk": sk,
-                "ingredience_rc": rc,
-                "nazev": getattr(node, "name", "") or "",
-                "potreba": qty,
-                "jednotka": getattr(node, "unit", "") or "",
-                # 'koupeno' doplníme až po agregaci (default False)
-            })
+    # Každý finál se rozpadá jen jednou (vektor na 1 ks v g.explosions),
+    # všechny požadavky pak najednou přes CSR kusovník: qty × vektor, sečteno po dnech
+    exp = expand_demands(g, _leaf_vector).collapse(day_codes(g)[0])
 
     # Když nic nevzniklo, vrať prázdnou tabulku se správnými sloupci
-    if not rows:
+    if exp.qty.size == 0:
         return pd.DataFrame(columns=[
             "datum", "ingredience_sk", "ingredience_rc", "nazev", "potreba", "jednotka", "koupeno"
         ])
 
-    df = pd.DataFrame(rows)
+    col_nodes = [g.nodes[nid] for nid in exp.cols]
+    df = pd.DataFrame({
+        "datum": exp.per_demand([d.key[0] for d in g.demands]),  # datum z požadavku
+        "ingredience_sk": exp.per_col([nid[0] for nid in exp.cols]),
+        "ingredience_rc": exp.per_col([nid[1] for nid in exp.cols]),
+        "nazev": exp.per_col([getattr(n, "name", "") or "" for n in col_nodes]),
+        "potreba": exp.qty,
+        "jednotka": exp.per_col([getattr(n, "unit", "") or "" for n in col_nodes]),
+        # 'koupeno' doplníme až po agregaci (default False)
+    })
 
     # Agregace přes klíče bez 'koupeno' (flag se udržuje přes merge v excel_service)
     df["_pot"] = pd.to_numeric(df["potreba"], errors="coerce").fillna(0.0)
@@ -1,8 +1,10 @@
 # services/semis_projection.py
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 from typing import List, Tuple
 from services.graph_model import Graph, NodeId
+from services.projections.bom_matrix import expand_demands
 
 
 def _first3_int(x) -> int | None:
@@ -26,67 +28,91 @@ def _fallback_name(name: str, sk, rc) -> str:
     return n if n else f"{sk}-{rc}"
 
 
-def _collect_semis_300(g: Graph) -> List[dict]:
+def _semis_vector(g: Graph, root: NodeId) -> List[Tuple[NodeId, float]]:
     """
-    Projde všechny požadavky (FINÁLy 400) a nasbírá polotovary (SK 300).
-    K polotovaru doplní i PŮVODNÍ VÝROBEK (400): vyrobek_sk/rc/nazev,
-    aby je mělo UI v detailu k dispozici.
+    Polotovary (SK 300) pod 1 ks uzlu `root`: [(polotovar, množství na 1 ks), ...].
+    Pod SK 300 se nesestupuje. Každá cesta = jedna položka (detaily drží řádek per cesta).
+    Výsledek se drží v g.explosions.
     """
-    rows: List[dict] = []
-
-    for d in g.demands:
-        datum = d.key[0] if isinstance(d.key, (tuple, list)) and len(d.key) > 0 else None
+    key = ("semis300", root)
+    vec = g.explosions.get(key)
+    if vec is not None:
+        return vec
+
+    vec = []
+    stack: List[Tuple[NodeId, float]] = [(root, 1.0)]
+    while stack:
+        nid, qty = stack.pop()
+        node = g.nodes.get(nid)
+        if not node:
+            continue
 
-        # identita a jméno kořenového výrobku (400)
-        root_final_nid = d.node
-        root_final = g.nodes.get(root_final_nid)
-        if not root_final:
+        if _cat_from_node_or_nid(node, nid) == 300:
+            vec.append((nid, qty))
             continue
-        try:
-            vf_sk, vf_rc = root_final_nid  # (400, rc)
-        except Exception:
+
+        # Leaf (nákup) – nepatří do polotovarů
+        if not getattr(node, "edges", None):
             continue
-        vf_name = _fallback_name(getattr(root_final, "name", ""), vf_sk, vf_rc)
-
-        # rozpad
-        stack: List[Tuple[NodeId, float]] = [(d.node, d.qty)]
-        while stack:
-            nid, qty = stack.pop()
-            node = g.nodes.get(nid)
-            if not node:
-                continue
 
-            cat = _cat_from_node_or_nid(node, nid)
-
-            if cat == 300:
-                sk, rc = nid
-                rows.append({
-                    "datum": datum,
-                    "polotovar_sk": sk,
-                    "polotovar_rc": rc,
-                    "polotovar_nazev": _fallback_name(getattr(node, "name", ""), sk, rc),
-                    "potreba": qty,
-                    "jednotka": getattr(node, "unit", "") or "",
-                    "vyrobeno": bool(getattr(node, "produced", False)),
-                    # >>> pro detail hotového výrobku:
-                    "vyrobek_sk": vf_sk,
-                    "vyrobek_rc": vf_rc,
-                    "vyrobek_nazev": vf_name,
-                })
+        # jinak pokračuj v rozpadu
+        for e in getattr(node, "edges", []) or []:
+            per_unit = float(e.per_unit_qty or 0.0)
+            if per_unit == 0.0:
                 continue
+            stack.append((e.child, qty * per_unit))
 
-            # Leaf (nákup) – nepatří do polotovarů
-            if not getattr(node, "edges", None):
-                continue
+    g.explosions[key] = vec
+    return vec
 
-            # jinak pokračuj v rozpadu
-            for e in getattr(node, "edges", []) or []:
-                per_unit = float(e.per_unit_qty or 0.0)
-                if per_unit == 0.0:
-                    continue
-                stack.append((e.child, qty * per_unit))
 
-    return rows
+def _collect_semis_300(g: Graph) -> pd.DataFrame:
+    """
+    Projde všechny požadavky (FINÁLy 400) a nasbírá polotovary (SK 300).
+    K polotovaru doplní i PŮVODNÍ VÝROBEK (400): vyrobek_sk/rc/nazev,
+    aby je mělo UI v detailu k dispozici.
+
+    Rozpad jde najednou přes CSR kusovník (vektor na 1 ks finálu je v cache grafu);
+    výsledek = jeden řádek na požadavek × cestu k polotovaru (pořadí jako g.demands).
+    """
+    exp = expand_demands(g, _semis_vector)
+
+    # identita a jméno kořenového výrobku (400) per požadavek
+    datum, vf_sk, vf_rc, vf_name, valid = [], [], [], [], []
+    for d in g.demands:
+        datum.append(d.key[0] if isinstance(d.key, (tuple, list)) and len(d.key) > 0 else None)
+        root_final = g.nodes.get(d.node)
+        try:
+            sk, rc = d.node  # (400, rc)
+        except Exception:
+            root_final = None
+            sk = rc = None
+        vf_sk.append(sk)
+        vf_rc.append(rc)
+        vf_name.append(_fallback_name(getattr(root_final, "name", ""), sk, rc) if root_final else "")
+        valid.append(bool(root_final))
+
+    keep = np.asarray(valid, dtype=bool)[exp.demand_idx] if len(valid) else np.zeros(0, dtype=bool)
+    if not keep.any():
+        return pd.DataFrame()
+    if not keep.all():
+        exp.demand_idx, exp.col_idx, exp.qty = exp.demand_idx[keep], exp.col_idx[keep], exp.qty[keep]
+
+    col_nodes = [g.nodes[nid] for nid in exp.cols]
+    return pd.DataFrame({
+        "datum": exp.per_demand(datum),
+        "polotovar_sk": exp.per_col([nid[0] for nid in exp.cols]),
+        "polotovar_rc": exp.per_col([nid[1] for nid in exp.cols]),
+        "polotovar_nazev": exp.per_col([_fallback_name(getattr(n, "name", ""), nid[0], nid[1])
+                                        for nid, n in zip(exp.cols, col_nodes)]),
+        "potreba": exp.qty,
+        "jednotka": exp.per_col([getattr(n, "unit", "") or "" for n in col_nodes]),
+        "vyrobeno": exp.per_col([bool(getattr(n, "produced", False)) for n in col_nodes]),
+        # >>> pro detail hotového výrobku:
+        "vyrobek_sk": exp.per_demand(vf_sk),
+        "vyrobek_rc": exp.per_demand(vf_rc),
+        "vyrobek_nazev": exp.per_demand(vf_name),
+    })
 
 
 def to_semis_dfs(g: Graph) -> tuple[pd.DataFrame, pd.DataFrame]:
@@ -97,18 +123,16 @@ def to_semis_dfs(g: Graph) -> tuple[pd.DataFrame, pd.DataFrame]:
       - df_det (detaily s vazbou na VÝROBEK 400):
         datum | polotovar_sk | polotovar_rc | vyrobek_sk | vyrobek_rc | vyrobek_nazev | mnozstvi | jednotka
     """
-    rows = _collect_semis_300(g)
+    df = _collect_semis_300(g)
 
     pre_cols = ["datum", "polotovar_sk", "polotovar_rc", "polotovar_nazev", "potreba", "jednotka", "vyrobeno"]
     det_cols = ["datum", "polotovar_sk", "polotovar_rc",
                 "vyrobek_sk", "vyrobek_rc", "vyrobek_nazev",
                 "mnozstvi", "jednotka"]
 
-    if not rows:
+    if df.empty:
         return pd.DataFrame(columns=pre_cols), pd.DataFrame(columns=det_cols)
 
-    df = pd.DataFrame(rows)
-
     # ---------- Přehled ----------
     df["_pot"] = pd.to_numeric(df["potreba"], errors="coerce").fillna(0.0)
     df_pre = (
@@ -1,6 +1,6 @@
 # services/readiness.py
 from __future__ import annotations
-from typing import Set, List
+from typing import Dict, FrozenSet, List, Optional, Set
 from services.graph_model import Graph, WorkKey, NodeId
 
 def _all_descendant_leaves_bought(g: Graph, root: NodeId) -> bool:
@@ -22,10 +22,153 @@ def _all_descendant_leaves_bought(g: Graph, root: NodeId) -> bool:
                 st.append(e.child)
     return True
 
+class ReadinessIndex:
+    """
+    Reverzní index pro readiness polotovarů (SK 300):
+      - leaf_to_semis: list -> všichni předci SK 300,
+      - unbought: SK 300 -> počet nekoupených listů v podstromu.
+    Polotovar je ready ⇔ unbought == 0 (O(1)). Změnu node.bought je nutné ohlásit
+    přes set_bought() (graph_store to dělá v set_ingredient(s)_bought).
+    List = uzel bez hran (stejně jako _all_descendant_leaves_bought).
+    """
+
+    def __init__(self, g: Graph):
+        memo: Dict[NodeId, FrozenSet[NodeId]] = {}
+        self.leaf_to_semis: Dict[NodeId, List[NodeId]] = {}
+        self.unbought: Dict[NodeId, int] = {}
+        self._bought: Dict[NodeId, bool] = {}
+
+        for nid in g.nodes:
+            if nid[0] != 300:
+                continue
+            leaves = self._leaves(g, nid, memo)
+            for leaf in leaves:
+                self.leaf_to_semis.setdefault(leaf, []).append(nid)
+                if leaf not in self._bought:
+                    self._bought[leaf] = bool(g.nodes[leaf].bought)
+            self.unbought[nid] = sum(1 for leaf in leaves if not self._bought[leaf])
+
+    @staticmethod
+    def _leaves(g: Graph, root: NodeId, memo: Dict[NodeId, FrozenSet[NodeId]]) -> FrozenSet[NodeId]:
+        """Množina listů pod uzlem (memo sdílené mezi polotovary; cyklus = bez příspěvku)."""
+        if root in memo:
+            return memo[root]
+        on_stack = {root}
+        stack: List[tuple] = [(root, iter(g.nodes[root].edges))]
+        acc: Dict[NodeId, Set[NodeId]] = {root: set()}
+        while stack:
+            nid, it = stack[-1]
+            e = next(it, None)
+            if e is None:
+                stack.pop()
+                on_stack.discard(nid)
+                node = g.nodes[nid]
+                memo[nid] = frozenset(acc.pop(nid)) if node.edges else frozenset([nid])
+                if stack:
+                    acc[stack[-1][0]].update(memo[nid])
+                continue
+            child = e.child
+            if child not in g.nodes or child in on_stack:
+                continue
+            if child in memo:
+                acc[nid].update(memo[child])
+                continue
+            on_stack.add(child)
+            acc[child] = set()
+            stack.append((child, iter(g.nodes[child].edges)))
+        return memo[root]
+
+    def is_ready(self, nid: NodeId) -> Optional[bool]:
+        """True/False pro indexovaný SK 300, jinak None (volající spadne na DFS)."""
+        n = self.unbought.get(nid)
+        return None if n is None else n == 0
+
+    def set_bought(self, leaf: NodeId, bought: bool) -> None:
+        """Přepočet čítačů předků po změně stavu listu (O(počet předků))."""
+        prev = self._bought.get(leaf)
+        if prev is None or prev == bool(bought):
+            return
+        self._bought[leaf] = bool(bought)
+        delta = -1 if bought else 1
+        for semi in self.leaf_to_semis.get(leaf, ()):
+            self.unbought[semi] += delta
+
+
+def readiness_index(g: Graph) -> ReadinessIndex:
+    """Index grafu (postaví se při prvním dotazu, drží se na g.readiness_index)."""
+    idx = getattr(g, "readiness_index", None)
+    if not isinstance(idx, ReadinessIndex):
+        idx = ReadinessIndex(g)
+        g.readiness_index = idx
+    return idx
+
+
+def note_bought(g: Graph, nid: NodeId, bought: bool) -> None:
+    """
+    Ohlášení změny node.bought: čítače indexu (pokud už existuje, jinak se postaví
+    z aktuálních stavů) + nová verze stavů (zneplatní memo).
+    """
+    idx = getattr(g, "readiness_index", None)
+    if isinstance(idx, ReadinessIndex):
+        idx.set_bought(nid, bought)
+    g.bump_state()
+
+
+def _memo(g: Graph) -> Dict:
+    """Memo výsledků readiness pro aktuální g.state_version (jiná verze = prázdné memo)."""
+    memo = g.readiness_memo
+    if memo is None or memo[0] != g.state_version:
+        memo = (g.state_version, {})
+        g.readiness_memo = memo
+    return memo[1]
+
+
+def _ready_semis_of_final(g: Graph, final_id: NodeId) -> List[int]:
+    """RC přímých SK 300 pod finálem, které jsou ready (nezávisí na datu → memo per finál)."""
+    memo = _memo(g)
+    key = ("semis", final_id)
+    if key not in memo:
+        out: List[int] = []
+        for e in g.nodes[final_id].edges:
+            child = g.nodes.get(e.child)
+            if not child:
+                continue
+            if child.id[0] == 300:      # přímý potomek SK300
+                if is_semi_ready(g, child.id):
+                    out.append(child.id[1])
+        memo[key] = out
+    return memo[key]
+
+
+def _final_ready_to_pack(g: Graph, final_id: NodeId) -> bool:
+    memo = _memo(g)
+    key = ("pack", final_id)
+    if key not in memo:
+        final = g.nodes[final_id]
+        ok = bool(final.produced)
+        if ok:
+            for e in final.edges:
+                child = g.nodes.get(e.child)
+                if child and not child.edges:     # přímý list pod 400
+                    if not child.bought:
+                        ok = False; break
+        memo[key] = ok
+    return memo[key]
+
+
+def is_semi_ready(g: Graph, nid: NodeId) -> bool:
+    """Ready polotovaru: O(1) z indexu pro SK 300, jinak DFS přes podstrom."""
+    if nid not in g.nodes:
+        return False
+    ready = readiness_index(g).is_ready(nid)
+    return _all_descendant_leaves_bought(g, nid) if ready is None else ready
+
+
 def compute_ready_semis_under_finals(g: Graph) -> Set[WorkKey]:
     """
     (datum, 300, rc) je ready, pokud je daný 300 přímo dítětem FINÁLU 400
     v požadovaném dni a všechny listy v jeho podstromu jsou koupené.
+    Výsledek per finál se memoizuje do další změny stavů (g.state_version).
     """
     ready: Set[WorkKey] = set()
     for d in g.demands:                 # demands máme jen pro FINAL 400
@@ -35,33 +178,22 @@ def compute_ready_semis_under_finals(g: Graph) -> Set[WorkKey]:
         if not final:
             continue
         dt = d.key[0]
-        for e in final.edges:
-            child = g.nodes.get(e.child)
-            if not child:
-                continue
-            if child.id[0] == 300:      # přímý potomek SK300
-                if _all_descendant_leaves_bought(g, child.id):
-                    ready.add((dt, 300, child.id[1]))
+        for rc in _ready_semis_of_final(g, d.node):
+            ready.add((dt, 300, rc))
     return ready
 
 def compute_ready_pack(g: Graph) -> Set[WorkKey]:
     """
     (datum, 400, rc) je ready-to-pack, pokud FINÁL je vyrobený a všechny jeho
     přímé listové děti (obaly/ingredience přímo pod 400) mají bought=True.
+    Výsledek per finál se memoizuje do další změny stavů (g.state_version).
     """
     ready: Set[WorkKey] = set()
     for d in g.demands:
         if d.node[0] != 400:
             continue
-        final = g.nodes.get(d.node)
-        if not final or not final.produced:
+        if d.node not in g.nodes:
             continue
-        ok = True
-        for e in final.edges:
-            child = g.nodes.get(e.child)
-            if child and not child.edges:     # přímý list pod 400
-                if not child.bought:
-                    ok = False; break
-        if ok:
+        if _final_ready_to_pack(g, d.node):
             ready.add(d.key)
     return ready
@@ -4,11 +4,13 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Optional, List
 
+import numpy as np
 import pandas as pd
 
 import services.paths as sp
-from services.data_utils import find_col, to_date_col, to_bool_cell_excel, norm_num_to_str
+from services.data_utils import find_col, to_date_col, to_bool_series, normalize_key_series
 from services import error_messages as ERR
+from services import xlsx_stream as XS
 
 # Exporty pro testy – monkeypatch očekává tyto symboly
 try:
@@ -42,6 +44,10 @@ DETAIL_COLS = [
 ]
 
 
+# hlavička listu „Polotovary“ (6. sloupec = jednotka, bez nadpisu)
+POLOTOVARY_HEADER = ["Datum", "SK", "Reg.č.", "Polotovar", "Množství", None, "Vyrobeno", "Poznámka"]
+
+
 def _ensure_cols(df: pd.DataFrame, cols: List[str]):
     for c in cols:
         if c not in df.columns:
@@ -57,7 +63,7 @@ def _normalize_keys_inplace(df: pd.DataFrame) -> None:
     """Stabilní string klíče pro SK/RC, trim názvů/jednotek."""
     for c in ("polotovar_sk", "polotovar_rc", "vyrobek_sk", "vyrobek_rc"):
         if c in df.columns:
-            df[c] = df[c].map(norm_num_to_str)
+            df[c] = normalize_key_series(df[c])
     for c in ("polotovar_nazev", "vyrobek_nazev", "jednotka"):
         if c in df.columns:
             df[c] = df[c].astype(str).str.strip()
@@ -100,7 +106,7 @@ def _normalize_main(df: pd.DataFrame) -> pd.DataFrame:
     _ensure_cols(d, CORE_COLS)
     to_date_col(d, "datum")
     d["potreba"] = pd.to_numeric(d["potreba"], errors="coerce").fillna(0.0).astype(float)
-    d["vyrobeno"] = d["vyrobeno"].map(to_bool_cell_excel).astype(bool)
+    d["vyrobeno"] = to_bool_series(d["vyrobeno"])
     _normalize_keys_inplace(d)
     return d[CORE_COLS]
 
@@ -169,7 +175,7 @@ def _merge_preserve_vyrobeno(df_new: pd.DataFrame, df_old: Optional[pd.DataFrame
     # Sloupce vyrobeno/potreba na korektní typy
     if "vyrobeno" not in old.columns:
         old["vyrobeno"] = False
-    old["vyrobeno"] = old["vyrobeno"].map(to_bool_cell_excel).astype(bool)
+    old["vyrobeno"] = to_bool_series(old["vyrobeno"])
     old["potreba"] = pd.to_numeric(old.get("potreba", 0.0), errors="coerce").fillna(0.0).astype(float)
 
     # Klíče sjednotíme na ty, které používá df_new (kanon)
@@ -191,7 +197,7 @@ def _merge_preserve_vyrobeno(df_new: pd.DataFrame, df_old: Optional[pd.DataFrame
     merged = pd.merge(df_new, old_sub, on=key_cols, how="left")
 
     # držení starého True: OR přes původní vyrobeno + pravidlo 50 %
-    merged["vyrobeno"] = merged.get("vyrobeno", False).map(to_bool_cell_excel).astype(bool)
+    merged["vyrobeno"] = to_bool_series(merged.get("vyrobeno", False))
 
     new_q = pd.to_numeric(merged.get("potreba", 0.0), errors="coerce").fillna(0.0)
     old_q = pd.to_numeric(merged.get("potreba_old", 0.0), errors="coerce").fillna(0.0)
@@ -200,7 +206,7 @@ def _merge_preserve_vyrobeno(df_new: pd.DataFrame, df_old: Optional[pd.DataFrame
     keep_mask = rel <= 0.5
 
     merged["vyrobeno"] = merged["vyrobeno"] | (keep_mask & merged.get("vyrobeno_old", False).fillna(False))
-    merged["vyrobeno"] = merged["vyrobeno"].map(to_bool_cell_excel).astype(bool)
+    merged["vyrobeno"] = to_bool_series(merged["vyrobeno"])
 
     for c in ("vyrobeno_old", "potreba_old"):
         if c in merged.columns:
@@ -218,6 +224,80 @@ def _read_old_prehl(output_path: Path) -> Optional[pd.DataFrame]:
         except Exception:
             return None
 
+def _col(df: pd.DataFrame, name: str, default="") -> pd.Series:
+    return df[name] if name in df.columns else pd.Series(default, index=df.index, dtype=object)
+
+
+def _polotovary_frame(df_pre: pd.DataFrame, df_det: pd.DataFrame) -> pd.DataFrame:
+    """
+    Blok listu „Polotovary“ (bez hlavičky) jako jeden DataFrame:
+    master řádek z Prehledu a hned pod ním jeho podřádky „↳ “ z Detailů
+    (párování podle (datum, polotovar_rc), pořadí masterů i detailů zůstává).
+
+    Sloupce odpovídají POLOTOVARY_HEADER; pomocné _m/_k/_d určují pořadí
+    (index masteru, druh řádku 0=master/1=dítě, pořadí detailu).
+    """
+    cols = list(range(len(POLOTOVARY_HEADER)))
+    if df_pre is None or df_pre.empty:
+        return pd.DataFrame(columns=cols)
+
+    pre = df_pre.reset_index(drop=True)
+    names = _col(pre, "polotovar_nazev")
+    masters = pd.DataFrame({
+        0: _col(pre, "datum"),
+        1: _col(pre, "polotovar_sk"),
+        2: _col(pre, "polotovar_rc"),
+        3: names.where(names.astype(bool), _col(pre, "nazev")),    # `nazev or nazev_alt`
+        4: _col(pre, "potreba"),
+        5: _col(pre, "jednotka"),
+        6: _col(pre, "vyrobeno", False).astype(bool).astype(object),
+        7: "",
+        "_m": np.arange(len(pre)),
+        "_k": 0,
+        "_d": -1,
+    })
+    if df_det is None or df_det.empty:
+        return masters.drop(columns=["_m", "_k", "_d"])
+
+    det = df_det.reset_index(drop=True)
+    det = pd.DataFrame({
+        "datum": _col(det, "datum"),
+        "polotovar_rc": _col(det, "polotovar_rc"),
+        2: _col(det, "vyrobek_rc"),
+        3: ("↳ " + _col(det, "vyrobek_nazev").astype(str)).str.strip(),
+        4: _col(det, "mnozstvi"),
+        5: _col(det, "jednotka"),
+        "_d": np.arange(len(det)),
+    })
+    keys = pd.DataFrame({"datum": masters[0], "polotovar_rc": masters[2], "_m": masters["_m"]})
+    children = keys.merge(det, on=["datum", "polotovar_rc"], how="inner")
+    children[0], children[1], children[6], children[7], children["_k"] = "", "", None, None, 1
+
+    masters.loc[masters["_m"].isin(children["_m"]), 7] = "(obsahuje rozpad)"
+    out = pd.concat([masters, children[masters.columns]], ignore_index=True)
+    out = out.sort_values(["_m", "_k", "_d"], kind="stable")
+    return out.drop(columns=["_m", "_k", "_d"]).reset_index(drop=True)
+
+
+def _write_excel_stream(output_path: Path, df_pre: pd.DataFrame, df_det: pd.DataFrame) -> None:
+    """
+    Všechny tři listy v jednom průchodu přes xlsxwriter (constant_memory):
+    Prehled → Detaily → Polotovary, bez „ping“ zápisu a bez znovuotevření souboru.
+    Rozložení listů i hlavičky jsou stejné jako u _write_excel.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    pre = df_pre if not df_pre.empty else pd.DataFrame(columns=CORE_COLS)
+    det = df_det if not df_det.empty else pd.DataFrame(columns=DETAIL_COLS)
+    try:
+        XS.write_sheets(output_path, [
+            XS.frame_sheet("Prehled", pre),
+            XS.frame_sheet("Detaily", det),
+            ("Polotovary", POLOTOVARY_HEADER, XS.frame_rows(_polotovary_frame(df_pre, df_det))),
+        ])
+    except Exception as e:
+        ERR.show_error(ERR.MSG.get("semis_save", "Chyba při ukládání polotovarů."), e)
+
+
 def _write_excel(output_path: Path, df_pre: pd.DataFrame, df_det: pd.DataFrame) -> None:
     """
     Zapíše 'Prehled' a 'Detaily'. Navíc vytvoří i třetí list 'Polotovary'
@@ -275,39 +355,12 @@ def _write_excel(output_path: Path, df_pre: pd.DataFrame, df_det: pd.DataFrame)
         except Exception:
             pass
 
-        header = ["Datum", "SK", "Reg.č.", "Polotovar", "Množství", sixth_blank, "Vyrobeno", "Poznámka"]
+        header = list(POLOTOVARY_HEADER)
+        header[5] = sixth_blank
         ws.append(header)
 
-        # mapování detailů podle (datum, polotovar_rc)
-        det_map = {}
-        if not df_det.empty:
-            for _, r in df_det.iterrows():
-                key = (r.get("datum", ""), r.get("polotovar_rc", ""))
-                det_map.setdefault(key, []).append(r)
-
-        # hlavní řádky + podřádky
-        for _, r in (df_pre if not df_pre.empty else pd.DataFrame(columns=CORE_COLS)).iterrows():
-            dt = r.get("datum", "")
-            sk = r.get("polotovar_sk", "")
-            rc = r.get("polotovar_rc", "")
-            nm = r.get("polotovar_nazev", "") or r.get("nazev", "")
-            pot = r.get("potreba", "")
-            mj = r.get("jednotka", "")
-            vyr = bool(r.get("vyrobeno", False))
-
-            children = det_map.get((dt, rc), []) or []
-            note = "(obsahuje rozpad)" if len(children) > 0 else ""
-
-            # MASTER
-            ws.append([dt, sk, rc, nm, pot, mj, vyr, note])
-
-            # CHILDREN: prefix „↳ “ v názvu
-            for det in children:
-                vyrobek_rc = det.get("vyrobek_rc", "")
-                vyrobek_nm = det.get("vyrobek_nazev", "")
-                mnoz = det.get("mnozstvi", "")
-                mj2 = det.get("jednotka", "")
-                ws.append(["", "", vyrobek_rc, f"↳ {vyrobek_nm}".strip(), mnoz, mj2, None, None])
+        for row in XS.frame_rows(_polotovary_frame(df_pre, df_det)):
+            ws.append(row)
 
         wb.save(output_path)
     except Exception:
@@ -319,11 +372,16 @@ def ensure_output_semis_excel(
     df_main: Optional[pd.DataFrame],
     df_details: Optional[pd.DataFrame] = None,
     output_path: Optional[str | Path] = None,
+    *,
+    merge_old: bool = True,
+    streaming: Optional[bool] = None,
 ) -> None:
     """
     Vytvoří/aktualizuje Excel s polotovary.
       - Listy: 'Prehled' a 'Detaily' vždy existují (i prázdné s hlavičkou)
       - 'vyrobeno' se zachová jako OR (staré True ∨ nové True) pro stejné klíče
+        (merge_old=False: 'vyrobeno' v df_main je autoritativní, starý soubor se nečte)
+      - streaming=True (nebo FG_XLSX_STREAM=1): jeden průchod přes xlsxwriter constant_memory
       - „Polotovary“ list: ['Datum','SK','Reg.č.','Polotovar','Množství', (prázdné), 'Vyrobeno','Poznámka']
     """
     out = Path(output_path) if output_path is not None else Path(sp.OUTPUT_SEMI_EXCEL)
@@ -333,8 +391,11 @@ def ensure_output_semis_excel(
     df_det = _normalize_det(df_details)
 
     # merge vyrobeno se starým Prehledem
-    old_pre = _read_old_prehl(out)
+    old_pre = _read_old_prehl(out) if merge_old else None
     df_pre_final = _merge_preserve_vyrobeno(df_pre, old_pre)
 
     # zápis
-    _write_excel(out, df_pre_final, df_det)
+    if XS.streaming_enabled(streaming):
+        _write_excel_stream(out, df_pre_final, df_det)
+    else:
+        _write_excel(out, df_pre_final, df_det)
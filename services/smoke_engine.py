@@ -14,7 +14,7 @@ from services.smoke_rules import (
     CapacityProvider, TableCapacity,
     Constraint,
     BiltongRule, SingleProductPerSlotRule, CapacityByRawRule,
-    AutoMergePolicy,
+    AutoMergePolicy, SlotItems,
     default_raw_mass_extractor, is_biltong_name,
 )
 
@@ -114,7 +114,8 @@ class RuleEngine:
     def prefill(self, items: List[HasItemAttrs], days: int, smokers: int, rows: int,
                 *, confirm_cb: Optional[ConfirmCallback]=None) -> Dict[CellKey, List[HasItemAttrs]]:
 
-        grid: Dict[CellKey, List[HasItemAttrs]] = {(d,s,r): [] for d in range(days) for s in range(1,smokers+1) for r in range(1,rows+1)}
+        # SlotItems = list s agregáty slotu (syrová hmota, klíče) → kontroly pravidel O(1)
+        grid: Dict[CellKey, List[HasItemAttrs]] = {(d,s,r): SlotItems() for d in range(days) for s in range(1,smokers+1) for r in range(1,rows+1)}
 
         # 1) Agregace: sečti stejné polotovary (RC/SK/Name/Unit) podle HOTOVÉHO množství
         def pkey(it): return (getattr(it,"rc",""), getattr(it,"sk",""), getattr(it,"name",""), getattr(it,"unit",""))
@@ -208,6 +209,17 @@ class RuleEngine:
 
         return grid
 
+    # ---------- SOLVER (alternativa k PREFILL) ----------
+    def solve(self, items: List[HasItemAttrs], days: int, smokers: int, rows: int,
+              *, time_budget_s: float = 2.0, seed: Optional[int] = 0, weights=None):
+        """
+        Local search nad stejnými pravidly jako prefill; vrací SolveResult
+        (grid, skóre, skóre greedy prefillu). Nikdy nevrátí horší grid než prefill.
+        """
+        from services.smoke_solver import LocalSearchSolver
+        return LocalSearchSolver(self, time_budget_s=time_budget_s, seed=seed,
+                                 weights=weights).solve(items, days, smokers, rows)
+
         # ---------- MOVE (interaktivní přesun nebo swap) ----------
     def try_move(self, grid: Dict[CellKey, List[HasItemAttrs]], src: CellKey, dst: CellKey,
                  *, confirm_cb: Optional[ConfirmCallback], allow_split_on_move: bool = True
@@ -224,7 +236,7 @@ class RuleEngine:
         dst_items = list(grid[dst])
 
         # Kandidáti a zbytky (aby se nic "neztratilo")
-        cand_dst: List[HasItemAttrs] = []   # co půjde do dst ze src
+        cand_dst: List[HasItemAttrs] = SlotItems()   # co půjde do dst ze src
         keep_in_src: List[HasItemAttrs] = []  # zbytky ze src (když splitujeme při přesunu do dst)
 
         for it in src_items:
@@ -239,7 +251,7 @@ class RuleEngine:
             else:
                 return False, (res.violation or RuleViolation("R-UNKNOWN","Pravidlo zamítlo přesun","Přesun nelze provést.",{}))
 
-        cand_src: List[HasItemAttrs] = []   # co půjde do src z dst
+        cand_src: List[HasItemAttrs] = SlotItems()   # co půjde do src z dst
         keep_in_dst: List[HasItemAttrs] = []  # zbytky z dst (když splitujeme při přesunu do src)
 
         for it in dst_items:
@@ -257,8 +269,10 @@ class RuleEngine:
         # Finální přiřazení – ŽÁDNÉ KLONOVÁNÍ:
         #  - do dst jde to, co jsme sestavili ze src, + zbytky z původního dst
         #  - do src jde to, co jsme sestavili z dst, + zbytky z původního src
-        grid[dst] = cand_dst + keep_in_dst
-        grid[src] = cand_src + keep_in_src
+        cand_dst.extend(keep_in_dst)
+        cand_src.extend(keep_in_src)
+        grid[dst] = cand_dst
+        grid[src] = cand_src
 
         # Auto-merge po obou stranách (sloučí rozdělené části stejného polotovaru)
         if self.merge_policy:
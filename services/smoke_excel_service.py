@@ -1,8 +1,14 @@
 from __future__ import annotations
+from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Optional, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, FrozenSet, Optional, List, Sequence, Tuple
 
+import hashlib
 import os
+import pickle
+import time
 import unicodedata
 import pandas as pd
 from openpyxl import load_workbook
@@ -29,9 +35,7 @@ def _fmt_cz_date(d: date) -> str:
     return f"{d.day:02d}.{d.month:02d}.{d.year}"
 
 # ---------- robustní výběr listu ----------
-def _pick_worksheet(tpl_path: str, sheet_name: Optional[str]) -> Worksheet:
-    wb = load_workbook(tpl_path, data_only=True, read_only=False)
-
+def _select_sheet(wb, sheet_name: Optional[str]) -> Worksheet:
     # 1) jméno listu, pokud je zadáno a existuje
     if sheet_name:
         try:
@@ -54,6 +58,10 @@ def _pick_worksheet(tpl_path: str, sheet_name: Optional[str]) -> Worksheet:
     names = list(getattr(wb, "sheetnames", []))
     raise ValueError(f"V šabloně se nepodařilo najít žádný pracovní list. Dostupné listy: {names or '— žádné —'}")
 
+def _pick_worksheet(tpl_path: str, sheet_name: Optional[str]) -> Worksheet:
+    wb = load_workbook(tpl_path, data_only=True, read_only=False)
+    return _select_sheet(wb, sheet_name)
+
 # ---------- autodetekce layoutu (počet udíren + řádky dní) ----------
 def _detect_layout(ws: Worksheet) -> Tuple[int, List[int]]:
     """
@@ -80,6 +88,45 @@ def _detect_layout(ws: Worksheet) -> Tuple[int, List[int]]:
         raise ValueError("V šabloně jsem nenašel řádek s hlavičkami ('Pořadové číslo' v blocích).")
     return smokers, header_rows
 
+# ---------- cache layoutu šablony (podle hashe souboru) ----------
+@dataclass(frozen=True)
+class _Layout:
+    smokers: int
+    header_rows: Tuple[int, ...]
+    merged: FrozenSet[Tuple[int, int]]     # buňky uvnitř sloučení (mimo levý-horní roh) – read-only
+
+_LAYOUTS: Dict[Tuple[str, Optional[str]], _Layout] = {}      # (sha1 šablony, list) -> layout
+_HASHES: Dict[Tuple[str, int, int], str] = {}                # (cesta, mtime_ns, velikost) -> sha1
+
+def _file_hash(path: str) -> str:
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    h = _HASHES.get(key)
+    if h is None:
+        with open(path, "rb") as f:
+            h = hashlib.sha1(f.read()).hexdigest()
+        _HASHES[key] = h
+    return h
+
+def _merged_cells(ws: Worksheet) -> FrozenSet[Tuple[int, int]]:
+    out = set()
+    for rng in ws.merged_cells.ranges:
+        for r in range(rng.min_row, rng.max_row + 1):
+            for c in range(rng.min_col, rng.max_col + 1):
+                if (r, c) != (rng.min_row, rng.min_col):
+                    out.add((r, c))
+    return frozenset(out)
+
+def _template_layout(tpl_path: str, sheet_name: Optional[str], ws: Worksheet) -> _Layout:
+    """Detekce layoutu jen jednou na obsah šablony (změna souboru = nový hash)."""
+    key = (_file_hash(tpl_path), sheet_name)
+    lay = _LAYOUTS.get(key)
+    if lay is None:
+        smokers, header_rows = _detect_layout(ws)
+        lay = _Layout(smokers, tuple(header_rows), _merged_cells(ws))
+        _LAYOUTS[key] = lay
+    return lay
+
 # ---------- bezpečné zapsání (ignoruje merged read-only) ----------
 def _safe_set(ws: Worksheet, row: int, col: int, value) -> None:
     try:
@@ -116,12 +163,9 @@ def _display_name(rw) -> str:
         return f"400-{rc}"
     return name
 
-    
-def write_smoke_plan_excel(path: str,
-                           plan_df: pd.DataFrame,
-                           week_monday: Optional[date] = None,
-                           sheet_name: Optional[str] = None,
-                           template_path: Optional[str] = None) -> None:
+
+# ---------- zápis jednoho týdne ----------
+def _prepare_plan_df(plan_df: pd.DataFrame) -> pd.DataFrame:
     # ---- vstupní DF: striktně DataFrame + doplněné sloupce ----
     if not isinstance(plan_df, pd.DataFrame):
         raise TypeError("plan_df must be a pandas DataFrame")
@@ -131,43 +175,37 @@ def write_smoke_plan_excel(path: str,
         if c not in df.columns:
             df[c] = pd.NA
     df["datum"] = pd.to_datetime(df["datum"], errors="coerce").dt.date
+    return df
 
+def _resolve_week(df: pd.DataFrame, week_monday: Optional[date]) -> date:
     if week_monday is None:
         valid_dates = [d for d in df["datum"] if d is not None]
         week_monday = (min(valid_dates) if valid_dates else date.today())
+    return week_monday
 
-    # ---- načti šablonu + vyber list ----
+def _open_template(template_path: Optional[str], sheet_name: Optional[str]) -> Tuple[Worksheet, _Layout]:
+    # ---- načti šablonu + vyber list; layout (udírny, řádky dnů, sloučené buňky) z cache ----
     from services.smoke_paths import smoke_template_path
     tpl = template_path or str(smoke_template_path())
     if not os.path.exists(tpl):
         raise FileNotFoundError(f"Šablona nenalezena: {tpl}")
     ws = _pick_worksheet(tpl, sheet_name)
+    return ws, _template_layout(tpl, sheet_name, ws)
 
-    # ---- auto-detekce: počet udíren a řádky dnů ----
-    smokers_in_template, header_rows = _detect_layout(ws)
+def _fill_week(ws: Worksheet, layout: _Layout, df: pd.DataFrame, week_monday: date) -> None:
+    """
+    Vyplní list šablony jedním týdnem. Zapisuje VŠECHNY nadpisy dnů i všechny buňky slotů
+    (vyplnit / vyčistit), takže tentýž list jde přepsat dalším týdnem (hromadný export).
+    """
+    smokers_in_template = layout.smokers
     # počet dnů – vezmeme, kolik bloků je v šabloně (obvykle 6 nebo 7)
-    day_count = min(len(header_rows), len(WEEKDAYS_7))
-    header_rows = header_rows[:day_count]
+    day_count = min(len(layout.header_rows), len(WEEKDAYS_7))
+    header_rows = layout.header_rows[:day_count]
+    merged = layout.merged
 
-    # ---- vyčisti data + nastav nadpisy dnů ----
-    for day_idx, hdr in enumerate(header_rows):
-        title_row = max(1, hdr - 4)
-        day_date = week_monday + timedelta(days=day_idx)
-        _safe_set(ws, title_row, 1, f"{WEEKDAYS_7[day_idx]} {_fmt_cz_date(day_date)}")
-
-        for s in range(smokers_in_template):
-            start = 1 + s * BLOCK_COLS
-            name_c, note_c, dose_c, = start + 1, start + 2, start + 3
-            for i in range(1, ROWS_PER_SMOKER + 1):
-                rr = hdr + i
-                _safe_set(ws, rr, name_c, "")
-                _safe_set(ws, rr, note_c, "")   # vždy prázdné
-                _safe_set(ws, rr, dose_c, "")
-                # SHIFT NEPÍŠEME (ve vzoru je často vertikálně sloučený) → zůstane prázdný
-
-    # ---- zápis dat (ignorujeme udírny/pozice, které v šabloně nejsou) ----
-    df["_udirna"] = pd.to_numeric(df["udirna"], errors="coerce").fillna(0).astype(int)
-    df["_pozice"] = pd.to_numeric(df["pozice"], errors="coerce").fillna(0).astype(int)
+    def _set(row: int, col: int, value) -> None:
+        if (row, col) not in merged:
+            _safe_set(ws, row, col, value)
 
     def _safe_str(val) -> str:
         try:
@@ -177,11 +215,9 @@ def write_smoke_plan_excel(path: str,
             pass
         return "" if val is None else str(val)
 
-        # --- nahraď tuto funkci (už bez fallbacku na množství) ---
     def _dose_from_row(rw) -> str:
         return _safe_str(rw.get("davka"))
 
-    # --- přidej tuto novou pomocnou funkci ---
     def _note_from_row(rw) -> str:
         qty = rw.get("mnozstvi")
         unit = _safe_str(rw.get("jednotka"))
@@ -190,33 +226,121 @@ def write_smoke_plan_excel(path: str,
         # když není číslo, ale je jednotka, dej aspoň jednotku; jinak prázdné
         return unit if unit else ""
 
-
-    # mapa datumů v rámci týdne (podle počtu dnů v šabloně)
+    # ---- index plánu: (den, udírna, pozice) -> první řádek (místo masky pro každý slot) ----
     day_dates = {i: (week_monday + timedelta(days=i)) for i in range(day_count)}
-
+    day_of = {d: i for i, d in day_dates.items()}
+    udirna = pd.to_numeric(df["udirna"], errors="coerce").fillna(0).astype(int).tolist()
+    pozice = pd.to_numeric(df["pozice"], errors="coerce").fillna(0).astype(int).tolist()
+    slots: Dict[Tuple[int, int, int], dict] = {}
+    for rw, s, pos in zip(df.to_dict("records"), udirna, pozice):
+        d = day_of.get(rw["datum"])
+        if d is not None:
+            slots.setdefault((d, s, pos), rw)
+
+    # ---- jeden průchod: nadpis dne + každý slot (vyčistit / zapsat) ----
+    # (udírny/pozice, které v šabloně nejsou, se ignorují; SHIFT nepíšeme – ve vzoru
+    #  je často vertikálně sloučený)
     for day_idx, hdr in enumerate(header_rows):
-        cur_date = day_dates.get(day_idx)
-        day_rows = df[df["datum"] == cur_date] if cur_date else df.iloc[0:0]
+        title_row = max(1, hdr - 4)
+        _set(title_row, 1, f"{WEEKDAYS_7[day_idx]} {_fmt_cz_date(day_dates[day_idx])}")
 
         for s in range(1, smokers_in_template + 1):
             start = 1 + (s - 1) * BLOCK_COLS
             name_c, note_c, dose_c = start + 1, start + 2, start + 3
-
             for pos in range(1, ROWS_PER_SMOKER + 1):
-                rec = day_rows[(day_rows["_udirna"] == s) & (day_rows["_pozice"] == pos)]
-                if rec.empty:
-                    continue
-                rw = rec.iloc[0]
-
-                display_name = _display_name(rw)
-                note = _note_from_row(rw)     # <<< nově
-                dose = _dose_from_row(rw)     # jen davka, bez fallbacku
-
                 rr = hdr + pos
-                _safe_set(ws, rr, name_c, display_name)
-                _safe_set(ws, rr, note_c, note)   
-                _safe_set(ws, rr, dose_c, dose)   # dávka jen když je, jinak prázdné
+                rw = slots.get((day_idx, s, pos))
+                if rw is None:
+                    _set(rr, name_c, "")
+                    _set(rr, note_c, "")
+                    _set(rr, dose_c, "")
+                    continue
+                _set(rr, name_c, _display_name(rw))
+                _set(rr, note_c, _note_from_row(rw))
+                _set(rr, dose_c, _dose_from_row(rw))   # dávka jen když je, jinak prázdné
 
 
+def write_smoke_plan_excel(path: str,
+                           plan_df: pd.DataFrame,
+                           week_monday: Optional[date] = None,
+                           sheet_name: Optional[str] = None,
+                           template_path: Optional[str] = None) -> None:
+    df = _prepare_plan_df(plan_df)
+    week_monday = _resolve_week(df, week_monday)
+    ws, layout = _open_template(template_path, sheet_name)
+    _fill_week(ws, layout, df, week_monday)
     # uložit kopii šablony s doplněnými daty
     ws.parent.save(path)
+
+
+# ---------- hromadný export víc týdnů ----------
+@dataclass
+class WeekExport:
+    week_monday: date
+    path: str
+    seconds: float          # vyplnění + uložení týdne (bez jednorázového načtení šablony)
+
+def _export_chunk(jobs: List[Tuple[date, pd.DataFrame, str]],
+                  template_path: Optional[str], sheet_name: Optional[str]) -> List[WeekExport]:
+    """Šablona se načte jednou; týdny se do téhož listu přepisují a ukládají postupně."""
+    ws, layout = _open_template(template_path, sheet_name)
+    out: List[WeekExport] = []
+    for monday, plan_df, path in jobs:
+        t0 = time.perf_counter()
+        df = _prepare_plan_df(plan_df)
+        monday = _resolve_week(df, monday)
+        _fill_week(ws, layout, df, monday)
+        ws.parent.save(path)
+        out.append(WeekExport(monday, str(path), time.perf_counter() - t0))
+    return out
+
+def write_smoke_plans_excel(weeks: Sequence[Tuple[date, pd.DataFrame, str]],
+                            sheet_name: Optional[str] = None,
+                            template_path: Optional[str] = None,
+                            workers: int = 1) -> List[WeekExport]:
+    """
+    Zapíše víc týdnů, každý do vlastního souboru: weeks = [(pondělí, plan_df, cesta), ...].
+    workers > 1 → týdny se rozdělí mezi procesy (každý načte šablonu jednou).
+    Vrací časy jednotlivých týdnů ve stejném pořadí. Když pool procesů nejde spustit
+    (BrokenProcessPool / OSError), zapíše se vše sériově.
+    """
+    jobs = list(weeks)
+    n = max(1, min(int(workers or 1), len(jobs)))
+    if n == 1:
+        return _export_chunk(jobs, template_path, sheet_name)
+
+    idx_chunks = [list(range(i, len(jobs), n)) for i in range(n)]
+    try:
+        with ProcessPoolExecutor(max_workers=n) as pool:
+            parts = list(pool.map(_export_chunk, [[jobs[j] for j in idx] for idx in idx_chunks],
+                                  [template_path] * n, [sheet_name] * n))
+    except (OSError, BrokenProcessPool, pickle.PicklingError):
+        return _export_chunk(jobs, template_path, sheet_name)
+
+    # výsledky podle indexu jobu (cesty se mohou opakovat)
+    out: List[Optional[WeekExport]] = [None] * len(jobs)
+    for idx, part in zip(idx_chunks, parts):
+        for j, e in zip(idx, part):
+            out[j] = e
+    return out
+
+def write_smoke_plans_workbook(path: str,
+                               weeks: Sequence[Tuple[date, pd.DataFrame]],
+                               sheet_name: Optional[str] = None,
+                               template_path: Optional[str] = None) -> List[WeekExport]:
+    """Všechny týdny do JEDNOHO sešitu: list šablony se v paměti naklonuje na každý týden (list „YYYY-MM-DD“)."""
+    ws, layout = _open_template(template_path, sheet_name)
+    wb = ws.parent
+    out: List[WeekExport] = []
+    for monday, plan_df in weeks:
+        t0 = time.perf_counter()
+        df = _prepare_plan_df(plan_df)
+        monday = _resolve_week(df, monday)
+        copy = wb.copy_worksheet(ws)
+        copy.title = f"{monday:%Y-%m-%d}"
+        _fill_week(copy, layout, df, monday)
+        out.append(WeekExport(monday, str(path), time.perf_counter() - t0))
+    if out:
+        wb.remove(ws)        # prázdný list šablony pryč; ostatní listy šablony zůstávají
+    wb.save(path)
+    return out
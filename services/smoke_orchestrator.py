@@ -1,11 +1,12 @@
 from __future__ import annotations
-from datetime import date
-from typing import Optional, Tuple
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from typing import List, Optional, Sequence, Tuple
 import pandas as pd
 
-from services.smoke_plan_service import SmokePlan, CapacityAwarePrefillStrategy, dataframe_to_items, next_monday
+from services.smoke_plan_service import SmokePlan, CapacityAwarePrefillStrategy, Item, dataframe_to_items, next_monday
 from services.smoke_capacity import CapacityRules
-from services.smoke_excel_service import write_smoke_plan_excel
+from services.smoke_excel_service import WeekExport, write_smoke_plan_excel, write_smoke_plans_excel
 from services.smoke_paths import smoke_plan_excel_path, smoke_template_path
 
 def compute_week_monday(base: Optional[date] = None) -> date:
@@ -30,12 +31,126 @@ def plan_and_save(selected_items_df: pd.DataFrame,
     """
     week_monday = week_monday or compute_week_monday()
     plan_df = build_plan_df(selected_items_df, week_monday, rules)
+    return plan_df, _save_week(plan_df, week_monday)
+
+
+def _save_week(plan_df: pd.DataFrame, week_monday: date) -> str:
     out_path = smoke_plan_excel_path(week_monday)
     write_smoke_plan_excel(
         str(out_path),
         plan_df,
         week_monday=week_monday,
-        sheet_name=None,                  
+        sheet_name=None,
         template_path=str(smoke_template_path()),
     )
-    return plan_df, str(out_path)
+    return str(out_path)
+
+
+def save_weeks(plans: Sequence[Tuple[date, pd.DataFrame]], workers: int = 1) -> List[WeekExport]:
+    """
+    Uloží víc týdnů najednou (každý do plan_uzeni_YYYY_MM_DD.xlsx) – šablona se načte
+    jednou (na proces); workers > 1 = paralelně. Vrací časy jednotlivých týdnů.
+    """
+    jobs = [(monday, df, str(smoke_plan_excel_path(monday))) for monday, df in plans]
+    return write_smoke_plans_excel(jobs, sheet_name=None, template_path=str(smoke_template_path()),
+                                   workers=workers)
+
+
+# ------------------------- víc týdnů (rolling horizon) -------------------------
+@dataclass
+class PendingItem:
+    item: Item
+    due: Optional[date]                 # termín (datum z polotovarů); None = hned
+    remaining: Optional[float]          # zbývá naplánovat (None = položka bez množství)
+
+
+@dataclass
+class WeekPlan:
+    week_monday: date
+    plan_df: pd.DataFrame
+    path: Optional[str] = None
+    carried: List[PendingItem] = field(default_factory=list)   # zbytek do dalšího týdne
+    beyond_horizon: List[PendingItem] = field(default_factory=list)   # jen poslední týden: termín za horizontem
+
+    @property
+    def overdue(self) -> List[PendingItem]:
+        """Přenesené položky, jejichž termín už tímto týdnem uplynul."""
+        end = self.week_monday + timedelta(days=7)
+        return [p for p in self.carried if p.due is None or p.due < end]
+
+
+def _backlog_items(semis_df: pd.DataFrame) -> List[PendingItem]:
+    """Nevyrobené řádky polotovarů -> položky s termínem, seřazené podle termínu (EDF)."""
+    df = semis_df
+    if "vyrobeno" in df.columns:
+        df = df[~df["vyrobeno"].fillna(False).astype(bool)]
+    if "mnozstvi" not in df.columns and "potreba" in df.columns:
+        df = df.rename(columns={"potreba": "mnozstvi"})
+    if df.empty:
+        return []
+
+    items = dataframe_to_items(df)
+    dues = (pd.to_datetime(df["datum"], errors="coerce").dt.date.tolist()
+            if "datum" in df.columns else [None] * len(items))
+    dues = [None if pd.isna(d) else d for d in dues]
+    pending = [PendingItem(it, d, it.mnozstvi) for it, d in zip(items, dues)]
+    pending.sort(key=lambda p: p.due or date.min)   # stabilní: v rámci dne pořadí řádků
+    return pending
+
+
+def plan_horizon(semis_df: pd.DataFrame,
+                 weeks: int = 6,
+                 start_monday: Optional[date] = None,
+                 rules: Optional[CapacityRules] = None,
+                 save: bool = True,
+                 workers: int = 1) -> List[WeekPlan]:
+    """
+    Plán uzení na několik týdnů dopředu (např. backlog z graph_store.get_semis_dfs()).
+
+    Týden po týdnu: do plánu jdou položky s termínem do konce týdne (nejdřív nejstarší)
+    + nenaplánovaný zbytek z minulých týdnů; co se nevejde, přechází do dalšího týdne.
+    Položky s termínem za horizontem se neplánují – vrací se v beyond_horizon posledního
+    týdne. Každý týden se uloží do plan_uzeni_YYYY_MM_DD.xlsx hromadně přes save_weeks
+    (save=False = jen výpočet).
+    """
+    start_monday = start_monday or compute_week_monday()
+    backlog = _backlog_items(semis_df)
+    strategy = CapacityAwarePrefillStrategy(rules)
+
+    out: List[WeekPlan] = []
+    pending: List[PendingItem] = []
+    nxt = 0
+    for w in range(max(int(weeks), 0)):
+        monday = start_monday + timedelta(weeks=w)
+        week_end = monday + timedelta(days=7)
+        while nxt < len(backlog) and (backlog[nxt].due is None or backlog[nxt].due < week_end):
+            pending.append(backlog[nxt])
+            nxt += 1
+
+        plan = SmokePlan(monday, capacity_rules=rules)
+        strategy.run(plan, [replace(p.item, mnozstvi=p.remaining) for p in pending])
+        placed = plan.placed_per_item()
+
+        # zbytek: prefill vkládá položky v pořadí `pending` → umístění se páruje po položkách
+        carried: List[PendingItem] = []
+        for i, p in enumerate(pending):
+            qty, parts = placed[i] if i < len(placed) else (0.0, 0)
+            if p.remaining is None:
+                if not parts:
+                    carried.append(p)
+                continue
+            rest = p.remaining - qty
+            if rest > 1e-9:
+                carried.append(PendingItem(p.item, p.due, rest))
+
+        plan_df = plan.to_dataframe()
+        out.append(WeekPlan(monday, plan_df, None, carried))
+        pending = list(carried)
+
+    if out:
+        out[-1].beyond_horizon = backlog[nxt:]
+
+    if save and out:
+        for wp, exp in zip(out, save_weeks([(wp.week_monday, wp.plan_df) for wp in out], workers=workers)):
+            wp.path = exp.path
+    return out
@@ -15,9 +15,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Protocol, Tuple
+from typing import Dict, List, Mapping, Optional, Protocol, Tuple
 
 import math
+import numpy as np
 import pandas as pd
 
 from services.smoke_capacity import CapacityRules
@@ -78,7 +79,8 @@ def _first_non_empty(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
     return None
 
 
-def _ensure_item_id(row: pd.Series) -> str:
+def _ensure_item_id(row: Mapping, label: object = "x") -> str:
+    """ID položky z řádku (Series nebo dict záznamu); `label` = index řádku pro fallback."""
     if "polotovar_id" in row and pd.notna(row["polotovar_id"]):
         return str(row["polotovar_id"])
     parts = []
@@ -87,7 +89,7 @@ def _ensure_item_id(row: pd.Series) -> str:
             parts.append(str(row[key]))
     if parts:
         return "|".join(parts)
-    return f"rowidx:{getattr(row, 'name', 'x')}"
+    return f"rowidx:{getattr(row, 'name', label)}"
 
 
 def next_monday(base: Optional[date] = None) -> date:
@@ -97,8 +99,47 @@ def next_monday(base: Optional[date] = None) -> date:
     return d + timedelta(days=days_ahead)
 
 
+def plan_slot_index(plan_df: pd.DataFrame, week_monday: date) -> Dict[Tuple[int, int, int], int]:
+    """
+    Index slotů plánu: (day_idx, smoker_idx, row_idx) -> index řádku plan_df.
+
+    Den se počítá od `week_monday` z `datum`, udírna/pozice jsou ve storage 1-based.
+    Při duplicitě platí první řádek (jako dřívější maska). Souřadnice se úpravami
+    obsahu slotu (swap, poznámka, dávka) nemění – stačí ho postavit při načtení plánu.
+    """
+    if plan_df is None or plan_df.empty or not {"datum", "udirna", "pozice"} <= set(plan_df.columns):
+        return {}
+    dt = pd.to_datetime(plan_df["datum"], errors="coerce").dt.normalize()
+    day = (dt - pd.Timestamp(week_monday)).dt.days
+    smoker = pd.to_numeric(plan_df["udirna"], errors="coerce") - 1
+    row = pd.to_numeric(plan_df["pozice"], errors="coerce") - 1
+    ok = (day.notna() & smoker.notna() & row.notna()).to_numpy()
+
+    index: Dict[Tuple[int, int, int], int] = {}
+    for key, label in zip(
+        zip(day[ok].astype(int), smoker[ok].astype(int), row[ok].astype(int)),
+        plan_df.index[ok],
+    ):
+        index.setdefault(key, int(label))
+    return index
+
+
 # -------------------------------- model --------------------------------
+_ITEM_COLS = [
+    "polotovar_id", "polotovar_id_base", "polotovar_nazev",
+    "mnozstvi", "jednotka", "poznamka", "meat_type", "part_index",
+]
+
+
 class SmokePlan:
+    """
+    Mřížka plánu uložená v polích:
+      - `_cells[day, smoker, row]` = index do `_items` (-1 = volný slot),
+      - `_free` = bitmapa volných slotů (bytearray, 1 = volno) v pořadí plnění
+        day -> row -> smoker; obsazenost slotu je O(1) a další volný slot od kurzoru
+        najde bytearray.find v C místo průchodu mřížkou v Pythonu.
+    """
+
     def __init__(self, week_monday: date,
                  smokers: int = SMOKERS_COUNT,
                  rows_per_smoker: int = ROWS_PER_SMOKER,
@@ -109,15 +150,45 @@ class SmokePlan:
         self.days = DAYS_PER_WEEK
         self.rules = capacity_rules or CapacityRules()
 
-        self._grid: Dict[Tuple[int, int, int], Item] = {}
+        self._items: List[Item] = []
+        self._cells = np.full((self.days, self.smokers, self.rows_per_smoker), -1, dtype=np.int32)
+        self._free = bytearray(b"\x01") * self.total_slots
+
+    # ------------------- mřížka -------------------
+    @property
+    def total_slots(self) -> int:
+        return self.days * self.smokers * self.rows_per_smoker
+
+    def _pos(self, day_idx: int, smoker_idx: int, row_idx: int) -> int:
+        """Pozice slotu v pořadí plnění (smoker nejrychleji, pak row, pak day)."""
+        return (day_idx * self.rows_per_smoker + row_idx) * self.smokers + smoker_idx
+
+    def _slot_at(self, pos: int) -> Slot:
+        rest, smoker_idx = divmod(pos, self.smokers)
+        day_idx, row_idx = divmod(rest, self.rows_per_smoker)
+        return Slot(day_idx, smoker_idx, row_idx)
+
+    def item_at(self, slot: Slot) -> Optional[Item]:
+        i = int(self._cells[slot.day_idx, slot.smoker_idx, slot.row_idx])
+        return self._items[i] if i >= 0 else None
+
+    def free_mask(self) -> np.ndarray:
+        """Bool pole (day, smoker, row): True = volný slot."""
+        return self._cells < 0
 
     def free_slots(self, day_idx: int, smoker_idx: int) -> List[Slot]:
-        slots = []
-        for r in range(self.rows_per_smoker):
-            key = (day_idx, smoker_idx, r)
-            if key not in self._grid:
-                slots.append(Slot(day_idx, smoker_idx, r))
-        return slots
+        rows = np.flatnonzero(self._cells[day_idx, smoker_idx] < 0)
+        return [Slot(day_idx, smoker_idx, int(r)) for r in rows]
+
+    def next_free_slot(self, day_idx: int = 0, smoker_idx: int = 0, row_idx: int = 0) -> Optional[Slot]:
+        """První volný slot od kurzoru (včetně) v pořadí day -> row -> smoker, s přetočením na začátek."""
+        start = self._pos(day_idx, smoker_idx, row_idx) % self.total_slots
+        if self._free[start] and start == self._pos(day_idx, smoker_idx, row_idx):
+            return Slot(day_idx, smoker_idx, row_idx)   # kurzor stojí na volném slotu (běžný případ prefillu)
+        pos = self._free.find(1, start)
+        if pos < 0:
+            pos = self._free.find(1, 0, start)
+        return self._slot_at(pos) if pos >= 0 else None
 
     def place(self, item: Item, slot: Slot) -> bool:
         if not (0 <= slot.day_idx < self.days):
@@ -126,39 +197,51 @@ class SmokePlan:
             return False
         if not (0 <= slot.row_idx < self.rows_per_smoker):
             return False
-        key = slot.key()
-        if key in self._grid:
+        pos = self._pos(slot.day_idx, slot.smoker_idx, slot.row_idx)
+        if not self._free[pos]:
             return False  # pro prefill nechceme swap, pouze prázdné
-        self._grid[key] = item
+        self._cells[slot.day_idx, slot.smoker_idx, slot.row_idx] = len(self._items)
+        self._items.append(item)
+        self._free[pos] = 0
         return True
 
+    def placed_per_item(self) -> List[Tuple[float, int]]:
+        """
+        (naplánované množství, počet částí) pro každou vloženou položku prefillu, v pořadí vkládání –
+        pro přenos zbytku do dalšího týdne. Části jedné položky jdou za sebou a číslují se od 1
+        (položka bez množství = jedna část bez čísla), nová položka tedy začíná částí 1 nebo None.
+        """
+        out: List[Tuple[float, int]] = []
+        for it in self._items:
+            if it.part_index is None or it.part_index == 1 or not out:
+                out.append((0.0, 0))
+            qty, n = out[-1]
+            out[-1] = (qty + float(it.mnozstvi or 0.0), n + 1)
+        return out
+
+    # ------------------- výstup -------------------
+    def _columns(self) -> Dict[str, list]:
+        """Sloupce plánu (slot po slotu v pořadí day -> smoker -> row) složené po sloupcích."""
+        per_day = self.smokers * self.rows_per_smoker
+        cells = self._cells.reshape(-1) + 1          # 0 = prázdný slot
+        cols: Dict[str, list] = {
+            "datum": [self.week_monday + timedelta(days=d) for d in range(self.days) for _ in range(per_day)],
+            "den": [CZECH_WEEKDAYS[d] for d in range(self.days) for _ in range(per_day)],
+            "udirna": np.tile(np.repeat(np.arange(1, self.smokers + 1), self.rows_per_smoker), self.days).tolist(),
+            "pozice": np.tile(np.arange(1, self.rows_per_smoker + 1), self.days * self.smokers).tolist(),
+        }
+        for attr in _ITEM_COLS:
+            vals = np.empty(len(self._items) + 1, dtype=object)
+            vals[1:] = [getattr(it, attr, None) for it in self._items]
+            cols[attr] = vals[cells].tolist()
+        return cols
+
     def to_records(self) -> List[Dict]:
-        rows: List[Dict] = []
-        for day in range(self.days):
-            day_date = self.week_monday + timedelta(days=day)
-            den = CZECH_WEEKDAYS[day]
-            for smoker in range(self.smokers):
-                for row in range(self.rows_per_smoker):
-                    key = (day, smoker, row)
-                    item = self._grid.get(key)
-                    rows.append({
-                        "datum": day_date,
-                        "den": den,
-                        "udirna": smoker + 1,
-                        "pozice": row + 1,
-                        "polotovar_id": getattr(item, "polotovar_id", None) if item else None,
-                        "polotovar_id_base": getattr(item, "polotovar_id_base", None) if item else None,
-                        "polotovar_nazev": getattr(item, "polotovar_nazev", None) if item else None,
-                        "mnozstvi": getattr(item, "mnozstvi", None) if item else None,
-                        "jednotka": getattr(item, "jednotka", None) if item else None,
-                        "poznamka": getattr(item, "poznamka", None) if item else None,
-                        "meat_type": getattr(item, "meat_type", None) if item else None,
-                        "part_index": getattr(item, "part_index", None) if item else None,
-                    })
-        return rows
+        cols = self._columns()
+        return [dict(zip(cols, vals)) for vals in zip(*cols.values())]
 
     def to_dataframe(self) -> pd.DataFrame:
-        return pd.DataFrame.from_records(self.to_records())
+        return pd.DataFrame(self._columns())
 
 
 # ---------------------------- strategie ----------------------------
@@ -194,31 +277,16 @@ class CapacityAwarePrefillStrategy:
                     if day >= plan.days:
                         day = 0
 
-        total_slots = plan.days * plan.smokers * plan.rows_per_smoker
+        total_slots = plan.total_slots
 
         def find_next_free_slot() -> Optional[Slot]:
             """Najdi další volný slot od aktuálního kurzoru s pořadím day->smoker->row."""
             nonlocal day, smoker, row
-            scanned = 0
-            d, s, r = day, smoker, row
-            while scanned < total_slots:
-                slot = Slot(d, s, r)
-                if slot.key() not in plan._grid:
-                    # nastav sdílený kurzor na nalezený slot (aby next_cursor navázal správně)
-                    day, smoker, row = d, s, r
-                    return slot
-                # posun v pořadí: smoker -> row -> day
-                s += 1
-                if s >= plan.smokers:
-                    s = 0
-                    r += 1
-                    if r >= plan.rows_per_smoker:
-                        r = 0
-                        d += 1
-                        if d >= plan.days:
-                            d = 0
-                scanned += 1
-            return None
+            slot = plan.next_free_slot(day, smoker, row)
+            if slot is not None:
+                # nastav sdílený kurzor na nalezený slot (aby next_cursor navázal správně)
+                day, smoker, row = slot.day_idx, slot.smoker_idx, slot.row_idx
+            return slot
 
         used_slots = 0
 
@@ -282,9 +350,10 @@ def dataframe_to_items(df: pd.DataFrame) -> List[Item]:
     note_col = _first_non_empty(df, ["poznamka", "pozn"]) or "poznamka"
     type_col = _first_non_empty(df, ["meat_type", "druh", "druh_masa", "skupina"])  # volitelné
 
+    # záznamy jako dict místo iterrows (bez stavby Series na každý řádek)
     items: List[Item] = []
-    for _, row in df.iterrows():
-        base_id = _ensure_item_id(row)
+    for label, row in zip(df.index, df.to_dict("records")):
+        base_id = _ensure_item_id(row, label)
         items.append(
             Item(
                 polotovar_id_base=base_id,
@@ -62,6 +62,81 @@ class TableCapacity(CapacityProvider):
             return float(self.base_per_smoker[smoker_idx-1])
         return float(self.base_per_smoker[-1]) if self.base_per_smoker else 0.0
 
+# --------- Obsah slotu s agregáty ----------
+def product_key(it) -> Tuple[str, str, str, str]:
+    """Klíč polotovaru (RC, SK, název, MJ) – stejný pro pravidla i auto-merge."""
+    return (str(getattr(it,"rc","") or ""), str(getattr(it,"sk","") or ""),
+            str(getattr(it,"name","") or ""), str(getattr(it,"unit","") or ""))
+
+class SlotItems(list):
+    """
+    Položky jednoho slotu (list) s cachovanými agregáty: součet syrové hmoty a počty
+    klíčů polotovarů. append agregáty jen dopočítá (O(1)), ostatní změny listu
+    (merge přes items[:] = ..., swap, mazání) je zneplatní a přepočtou se líně při
+    dalším dotazu. Pravidla tak obsah slotu neprocházejí při každé kontrole.
+    Pozn.: položky se nemění na místě (engine i merge tvoří nové instance).
+    """
+    __slots__ = ("_raw_of", "_raw_total", "_keys")
+
+    def __init__(self, items=()):
+        super().__init__(items)
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._raw_of: Optional[RawMassExtractor] = None
+        self._raw_total = 0.0
+        self._keys: Optional[Dict[Tuple[str, str, str, str], int]] = None
+
+    def raw_total(self, raw_mass_of: "RawMassExtractor") -> float:
+        if self._raw_of is not raw_mass_of:
+            self._raw_total = sum(float(raw_mass_of(it)[0] or 0.0) for it in self)
+            self._raw_of = raw_mass_of
+        return self._raw_total
+
+    def product_keys(self) -> Dict[Tuple[str, str, str, str], int]:
+        if self._keys is None:
+            keys: Dict[Tuple[str, str, str, str], int] = {}
+            for it in self:
+                k = product_key(it)
+                keys[k] = keys.get(k, 0) + 1
+            self._keys = keys
+        return self._keys
+
+    # --- inkrementální přidání ---
+    def append(self, it) -> None:
+        super().append(it)
+        if self._raw_of is not None:
+            self._raw_total += float(self._raw_of(it)[0] or 0.0)
+        if self._keys is not None:
+            k = product_key(it)
+            self._keys[k] = self._keys.get(k, 0) + 1
+
+    def extend(self, items) -> None:
+        for it in items:
+            self.append(it)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    # --- ostatní změny agregáty zneplatní ---
+    def _mutating(name):
+        base = getattr(list, name)
+        def method(self, *args, **kwargs):
+            out = base(self, *args, **kwargs)
+            self._invalidate()
+            return out
+        method.__name__ = name
+        return method
+
+    __setitem__ = _mutating("__setitem__")
+    __delitem__ = _mutating("__delitem__")
+    insert = _mutating("insert")
+    pop = _mutating("pop")
+    remove = _mutating("remove")
+    clear = _mutating("clear")
+    del _mutating
+
 # --------- Abstrakce pravidla ----------
 class Constraint(Protocol):
     def check(self, item: HasItemAttrs, slot_items: List[HasItemAttrs], smoker_idx: int, phase: Phase) -> CheckOutcome: ...
@@ -71,14 +146,16 @@ class Constraint(Protocol):
 class SingleProductPerSlotRule:
     """R-SINGLE-PRODUCT: V jednom slotu (řádek udírny v daný den) může být jen jeden polotovar."""
     def _key(self, it) -> Tuple[str, str, str, str]:
-        return (str(getattr(it,"rc","") or ""), str(getattr(it,"sk","") or ""),
-                str(getattr(it,"name","") or ""), str(getattr(it,"unit","") or ""))
+        return product_key(it)
     def check(self, item, slot_items, smoker_idx: int, phase: Phase) -> CheckOutcome:
         if not slot_items:
             return CheckOutcome(kind="OK")
 
         incoming = self._key(item)
-        present_keys = {self._key(it) for it in slot_items}
+        if isinstance(slot_items, SlotItems):
+            present_keys = set(slot_items.product_keys())
+        else:
+            present_keys = {self._key(it) for it in slot_items}
 
         # Slot už obsahuje mix → zamítni (ochrana proti starým datům)
         if len(present_keys) > 1:
@@ -162,10 +239,13 @@ class CapacityByRawRule:
         if cap <= 0:
             return CheckOutcome(kind="OK")
 
-        cur_raw = 0.0
-        for it in slot_items:
-            r, _ = self.raw_mass_of(it)
-            cur_raw += float(r or 0.0)
+        if isinstance(slot_items, SlotItems):
+            cur_raw = slot_items.raw_total(self.raw_mass_of)
+        else:
+            cur_raw = 0.0
+            for it in slot_items:
+                r, _ = self.raw_mass_of(it)
+                cur_raw += float(r or 0.0)
 
         item_raw, _ = self.raw_mass_of(item)
         if cur_raw + float(item_raw or 0.0) <= cap + 1e-9:
@@ -212,9 +292,7 @@ class AutoMergePolicy:
         if not items:
             return
 
-        def key(it):
-            return (str(getattr(it,"rc","") or ""), str(getattr(it,"sk","") or ""),
-                    str(getattr(it,"name","") or ""), str(getattr(it,"unit","") or ""))
+        key = product_key
 
         groups: Dict[Tuple[str,str,str,str], List[HasItemAttrs]] = {}
         for it in items:
@@ -0,0 +1,105 @@
+# services/smoke_scenarios.py
+# -*- coding: utf-8 -*-
+"""
+What-if porovnání kapacit udíren: RuleEngine.prefill pro víc variant
+(kapacity na slot, přepisy podle masa, vyhrazená udírna) paralelně v procesech.
+
+Výstup je tabulka (DataFrame) – jeden řádek na scénář:
+  scenar, naplanovano, nenaplanovano, vyuziti_slotu, deleni, nerovnomernost_dnu
+
+Položky se do workerů posílají jednou (initializer), scénáře pak po jednom.
+Hodnocení je stejné jako u solveru (services.smoke_solver).
+"""
+from __future__ import annotations
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from services.smoke_engine import build_default_engine
+from services.smoke_rules import HasItemAttrs
+from services.smoke_solver import LocalSearchSolver
+
+COLUMNS = ["scenar", "naplanovano", "nenaplanovano", "vyuziti_slotu", "deleni", "nerovnomernost_dnu"]
+
+
+@dataclass
+class Scenario:
+    name: str
+    base_per_smoker: List[float]
+    per_type_overrides: Dict[str, List[float]] = field(default_factory=dict)
+    reserved_smoker_index: int = 4
+
+
+def capacity_variants(base_per_smoker: Sequence[float], scales: Iterable[float],
+                      reserved_indices: Iterable[int] = (4,)) -> List[Scenario]:
+    """Scénáře „kapacita × faktor“ pro každou vyhrazenou udírnu (např. obsazení směn)."""
+    return [
+        Scenario(name=f"×{scale:g} / #{res}", base_per_smoker=[float(c) * scale for c in base_per_smoker],
+                 reserved_smoker_index=res)
+        for res in reserved_indices for scale in scales
+    ]
+
+
+# ------------------------- vyhodnocení (běží ve workeru) -------------------------
+_ITEMS: List[HasItemAttrs] = []
+_SHAPE = (6, 4, 7)
+
+
+def _init_worker(items: List[HasItemAttrs], shape) -> None:
+    global _ITEMS, _SHAPE
+    _ITEMS, _SHAPE = items, shape
+
+
+def evaluate_scenario(sc: Scenario, items: List[HasItemAttrs], days: int, smokers: int, rows: int) -> Dict[str, object]:
+    engine = build_default_engine(base_per_smoker=list(sc.base_per_smoker),
+                                  per_type_overrides=dict(sc.per_type_overrides),
+                                  reserved_smoker_index=sc.reserved_smoker_index)
+    grid = engine.prefill(items, days, smokers, rows)
+    score = LocalSearchSolver(engine).score(grid, items, days)
+
+    placed = sum(engine._get_qty(it) for cell in grid.values() for it in cell)
+    used = sum(1 for cell in grid.values() if cell)
+    return {
+        "scenar": sc.name,
+        "naplanovano": placed,
+        "nenaplanovano": score.unplaced_qty,
+        "vyuziti_slotu": used / len(grid) if grid else 0.0,
+        "deleni": score.splits,
+        "nerovnomernost_dnu": score.imbalance,
+    }
+
+
+def _evaluate_in_worker(sc: Scenario) -> Dict[str, object]:
+    return evaluate_scenario(sc, _ITEMS, *_SHAPE)
+
+
+# ------------------------- API -------------------------
+def run_scenarios(scenarios: Sequence[Scenario], items: List[HasItemAttrs],
+                  *, days: int = 6, smokers: int = 4, rows: int = 7,
+                  workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Vyhodnotí scénáře (pořadí řádků = pořadí scénářů).
+    workers=None → počet CPU; workers<=1 nebo jediný scénář → bez procesů.
+    Když pool nejde spustit (např. nepicklovatelné položky), spočítá se to postupně.
+    """
+    scenarios = list(scenarios)
+    n_workers = min(workers or os.cpu_count() or 1, len(scenarios))
+
+    rows_out: Optional[List[Dict[str, object]]] = None
+    if n_workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(list(items), (days, smokers, rows))) as pool:
+                rows_out = list(pool.map(_evaluate_in_worker, scenarios))
+        except (OSError, BrokenProcessPool, pickle.PicklingError, AttributeError):
+            rows_out = None
+    if rows_out is None:
+        rows_out = [evaluate_scenario(sc, items, days, smokers, rows) for sc in scenarios]
+
+    return pd.DataFrame(rows_out, columns=COLUMNS)
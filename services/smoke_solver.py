@@ -0,0 +1,284 @@
+# services/smoke_solver.py
+# -*- coding: utf-8 -*-
+"""
+Lokální prohledávání (local search s restarty) jako alternativa k RuleEngine.prefill.
+
+Greedy prefill plánuje polotovary podle množství a v každém kroku bere nejméně
+vytížený den/udírnu – umí tak „spálit“ velkou udírnu na malém zbytku a pak
+nechat jiný polotovar nenaplánovaný, i když přiřazení bez zbytku existuje.
+
+Řešení = pořadí polotovarů + režim výběru slotu pro každý z nich
+  - "fit":     nejmenší kapacita, do které se zbytek vejde celý (jinak největší),
+  - "balance": nejméně vytížený den/udírna (jako greedy).
+Dekodér řešení staví grid přes RuleEngine._evaluate_slot (fáze "prefill"), takže
+platí BiltongRule, SingleProductPerSlotRule i CapacityByRawRule (SPLIT = vloží se
+jen část, která se vejde). Prohledávání prohazuje pořadí / přepíná režimy
+v časovém rozpočtu a výsledek porovná s greedy prefillem (nikdy nevrátí horší).
+
+Cíl (menší = lepší): váhy × (nenaplánované množství, počet dělení, nerovnoměrnost dnů).
+"""
+from __future__ import annotations
+
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from services.smoke_rules import CellKey, HasItemAttrs, SlotItems, is_biltong_name
+
+if TYPE_CHECKING:
+    from services.smoke_engine import RuleEngine
+
+EPS = 1e-9
+ProductKey = Tuple[str, str, str, str]
+Grid = Dict[CellKey, List[HasItemAttrs]]
+
+
+def _pkey(it: HasItemAttrs) -> ProductKey:
+    return (getattr(it, "rc", ""), getattr(it, "sk", ""), getattr(it, "name", ""), getattr(it, "unit", ""))
+
+
+@dataclass
+class SolverWeights:
+    unplaced: float = 1000.0   # za jednotku nenaplánovaného množství
+    split: float = 50.0        # za každý další slot, přes který je polotovar rozdělen
+    imbalance: float = 1.0     # za jednotku rozdílu max-min zátěže dnů
+
+
+@dataclass
+class PlanScore:
+    unplaced_qty: float
+    splits: int
+    imbalance: float
+    objective: float
+
+    def as_text(self) -> str:
+        return (f"nenaplánováno {self.unplaced_qty:.2f}, dělení {self.splits}, "
+                f"nerovnoměrnost dnů {self.imbalance:.2f} (cíl {self.objective:.2f})")
+
+
+@dataclass
+class SolveResult:
+    grid: Grid
+    score: PlanScore
+    baseline: PlanScore
+    source: str            # "local" | "greedy" (greedy, pokud jej hledání nepřekonalo)
+    iterations: int
+    elapsed_s: float
+
+    @property
+    def improvement(self) -> float:
+        """O kolik je cíl lepší než greedy (>= 0)."""
+        return self.baseline.objective - self.score.objective
+
+    def report(self) -> str:
+        return (f"Solver ({self.source}, {self.iterations} iterací, {self.elapsed_s:.2f} s): {self.score.as_text()}\n"
+                f"Greedy prefill: {self.baseline.as_text()}")
+
+
+@dataclass
+class _Group:
+    base: HasItemAttrs
+    qty: float
+    meat: Optional[str]
+    pairs: List[Tuple[int, int]] = field(default_factory=list)   # povolené (den, udírna)
+    caps: Dict[int, float] = field(default_factory=dict)         # udírna -> kapacita slotu (inf = neomezená)
+
+
+class LocalSearchSolver:
+    def __init__(self, engine: "RuleEngine", *, time_budget_s: float = 2.0, seed: Optional[int] = 0,
+                 weights: Optional[SolverWeights] = None, max_iter: Optional[int] = None,
+                 restart_after: int = 200):
+        self.engine = engine
+        self.time_budget_s = float(time_budget_s)
+        self.weights = weights or SolverWeights()
+        self.max_iter = max_iter
+        self.restart_after = restart_after
+        self._rnd = random.Random(seed)
+
+    # ---------- hodnocení ----------
+    def score(self, grid: Grid, items: List[HasItemAttrs], days: int) -> PlanScore:
+        """Stejné hodnocení pro greedy i solver (poptávka = součet items podle RC/SK/název/MJ)."""
+        demand: Dict[ProductKey, float] = {}
+        for it in items:
+            k = _pkey(it)
+            demand[k] = demand.get(k, 0.0) + self.engine._get_qty(it)
+
+        placed: Dict[ProductKey, float] = {}
+        slots: Dict[ProductKey, int] = {}
+        day_load = [0.0] * days
+        for (d, _s, _r), cell in grid.items():
+            for k in {_pkey(it) for it in cell}:
+                slots[k] = slots.get(k, 0) + 1
+            for it in cell:
+                q = self.engine._get_qty(it)
+                k = _pkey(it)
+                placed[k] = placed.get(k, 0.0) + q
+                if 0 <= d < days:
+                    day_load[d] += q
+
+        unplaced = sum(max(q - placed.get(k, 0.0), 0.0) for k, q in demand.items() if q > EPS)
+        splits = sum(n - 1 for n in slots.values() if n > 1)
+        imbalance = (max(day_load) - min(day_load)) if day_load else 0.0
+        if unplaced < 1e-6:
+            unplaced = 0.0
+
+        w = self.weights
+        return PlanScore(unplaced_qty=unplaced, splits=splits, imbalance=imbalance,
+                         objective=w.unplaced * unplaced + w.split * splits + w.imbalance * imbalance)
+
+    # ---------- příprava ----------
+    def _groups(self, items: List[HasItemAttrs], days: int, smokers: int) -> List[_Group]:
+        """Agregace jako v prefill: stejné polotovary sečti podle HOTOVÉHO množství."""
+        by_key: Dict[ProductKey, _Group] = {}
+        for it in items:
+            meat = getattr(it, "meat_type", None)
+            g = by_key.setdefault(_pkey(it), _Group(base=it, qty=0.0, meat=(str(meat).lower() if meat else None)))
+            g.qty += self.engine._get_qty(it)
+            if not g.meat and meat:
+                g.meat = str(meat).lower()
+
+        reserved = self.engine.reserved_smoker_index
+        out: List[_Group] = []
+        for g in by_key.values():
+            if g.qty <= 1e-12:
+                continue
+            if is_biltong_name(getattr(g.base, "name", "") or ""):
+                allowed = [reserved] if 1 <= reserved <= smokers else []
+            else:
+                allowed = [s for s in range(1, smokers + 1) if s != reserved]
+            for s in allowed:
+                c = float(self.engine.capacity.capacity_for(s, g.meat))
+                g.caps[s] = c if c > 0 else float("inf")
+            g.pairs = [(d, s) for d in range(days) for s in allowed]
+            out.append(g)
+        return out
+
+    def _lower_bound(self, groups: List[_Group]) -> float:
+        """Dolní mez cíle: každý polotovar se dělí aspoň ceil(qty / max. kapacita) - 1×."""
+        splits = 0
+        for g in groups:
+            cap = max(g.caps.values(), default=float("inf"))
+            if math.isfinite(cap) and cap > 0:
+                splits += max(math.ceil(g.qty / cap - EPS) - 1, 0)
+        return self.weights.split * splits
+
+    # ---------- dekodér ----------
+    def _decode(self, groups: List[_Group], order: List[int], modes: List[bool],
+                days: int, smokers: int, rows: int) -> Grid:
+        eng = self.engine
+        grid: Grid = {(d, s, r): SlotItems() for d in range(days) for s in range(1, smokers + 1) for r in range(1, rows + 1)}
+        next_row = {(d, s): 1 for d in range(days) for s in range(1, smokers + 1)}
+        day_load = [0.0] * days
+        pair_load = {k: 0.0 for k in next_row}
+
+        for gi in order:
+            g = groups[gi]
+            fit_mode = modes[gi]
+            remaining = g.qty
+            blocked = set()
+
+            while remaining > EPS:
+                cands = [p for p in g.pairs if next_row[p] <= rows and p not in blocked]
+                if not cands:
+                    break
+
+                def key(p):
+                    cap = g.caps[p[1]]
+                    fits = cap >= remaining - EPS
+                    size = (cap - remaining) if fits else -cap
+                    if fit_mode:
+                        return (not fits, size, day_load[p[0]], pair_load[p])
+                    return (day_load[p[0]], pair_load[p], not fits, size)
+
+                d, s = min(cands, key=key)
+                cell = (d, s, next_row[(d, s)])
+                take = min(g.caps[s], remaining)
+                item = eng._make_item(g.base, qty=take)
+
+                res = eng._evaluate_slot(item, s, grid[cell], phase="prefill")
+                if not res.ok:
+                    if res.split_qty is None or res.split_qty <= EPS:
+                        blocked.add((d, s))     # pravidlo udírnu pro tento polotovar nepustí
+                        continue
+                    take = float(res.split_qty)
+                    item = eng._make_item(g.base, qty=take)
+
+                grid[cell].append(item)
+                if eng.merge_policy:
+                    eng.merge_policy.apply(s, grid[cell])
+                next_row[(d, s)] += 1
+                remaining -= take
+                day_load[d] += take
+                pair_load[(d, s)] += take
+        return grid
+
+    # ---------- hledání ----------
+    def _neighbour(self, order: List[int], modes: List[bool]) -> Tuple[List[int], List[bool]]:
+        order, modes = list(order), list(modes)
+        n = len(order)
+        move = self._rnd.random()
+        if n > 1 and move < 0.45:
+            i, j = self._rnd.sample(range(n), 2)
+            order[i], order[j] = order[j], order[i]
+        elif n > 1 and move < 0.8:
+            i, j = self._rnd.sample(range(n), 2)
+            order.insert(j, order.pop(i))
+        else:
+            k = self._rnd.randrange(n)
+            modes[k] = not modes[k]
+        return order, modes
+
+    def solve(self, items: List[HasItemAttrs], days: int, smokers: int, rows: int) -> SolveResult:
+        t0 = time.perf_counter()
+        deadline = t0 + self.time_budget_s
+
+        base_grid = self.engine.prefill(items, days, smokers, rows)
+        baseline = self.score(base_grid, items, days)
+
+        groups = self._groups(items, days, smokers)
+        n = len(groups)
+        best: Optional[Tuple[float, List[int], List[bool], Grid, PlanScore]] = None
+        iterations = 0
+
+        def evaluate(order, modes):
+            nonlocal iterations
+            iterations += 1
+            g = self._decode(groups, order, modes, days, smokers, rows)
+            return g, self.score(g, items, days)
+
+        # starty: pořadí podle množství (jako greedy) v obou režimech
+        by_qty = sorted(range(n), key=lambda i: groups[i].qty, reverse=True)
+        for fit in (True, False):
+            g, sc = evaluate(by_qty, [fit] * n)
+            if best is None or sc.objective < best[0]:
+                best = (sc.objective, by_qty, [fit] * n, g, sc)
+
+        bound = self._lower_bound(groups)
+        cur_obj, cur_order, cur_modes = best[0], best[1], best[2]
+        stale = 0
+        while n and time.perf_counter() < deadline and best[0] > bound + EPS:
+            if self.max_iter is not None and iterations >= self.max_iter:
+                break
+            if stale >= self.restart_after:
+                # restart: náhodné zamíchání nejlepšího řešení
+                cur_order, cur_modes = list(best[1]), list(best[2])
+                for _ in range(max(2, n // 3)):
+                    cur_order, cur_modes = self._neighbour(cur_order, cur_modes)
+                cur_obj, stale = float("inf"), 0
+
+            order, modes = self._neighbour(cur_order, cur_modes)
+            g, sc = evaluate(order, modes)
+            if sc.objective <= cur_obj:
+                stale = 0 if sc.objective < cur_obj else stale + 1
+                cur_obj, cur_order, cur_modes = sc.objective, order, modes
+                if sc.objective < best[0]:
+                    best = (sc.objective, order, modes, g, sc)
+            else:
+                stale += 1
+
+        elapsed = time.perf_counter() - t0
+        if best[0] < baseline.objective - EPS:
+            return SolveResult(best[3], best[4], baseline, "local", iterations, elapsed)
+        return SolveResult(base_grid, baseline, baseline, "greedy", iterations, elapsed)
@@ -0,0 +1,227 @@
+# services/sqlite_store.py
+"""
+Volitelný SQLite backend pro graph_store (FG_STORE=sqlite).
+
+Drží v jedné databázi:
+  - graf: nodes, edges, demands (+ rozpady na 1 ks finálu v tabulce explosion),
+  - uživatelské stavy koupeno/vyrobeno: tabulka state s indexem (datum, sk, rc).
+
+Reload (sync_graph) porovná graf s tím, co už v DB je, a zapíše jen změněné řádky.
+Projekce ingrediencí/polotovarů se počítají SQL agregací (demands ⋈ explosion ⋈ nodes)
+a vracejí stejné DataFrame jako services/projections.
+
+Pro stavy nabízí stejné rozhraní jako StateJournal (exists/replay/append/reset/compact),
+takže graph_store ji použije místo JSONL deníku.
+"""
+from __future__ import annotations
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+import pandas as pd
+
+from services.graph_model import Graph, NodeId
+from services.state_journal import KINDS, Key, _dump_date, _load_date
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    sk INTEGER NOT NULL, rc INTEGER NOT NULL,
+    name TEXT NOT NULL, unit TEXT,
+    PRIMARY KEY (sk, rc)
+);
+CREATE TABLE IF NOT EXISTS edges (
+    parent_sk INTEGER NOT NULL, parent_rc INTEGER NOT NULL, pos INTEGER NOT NULL,
+    child_sk INTEGER NOT NULL, child_rc INTEGER NOT NULL, per_unit_qty REAL NOT NULL,
+    PRIMARY KEY (parent_sk, parent_rc, pos)
+);
+CREATE TABLE IF NOT EXISTS demands (
+    datum TEXT, sk INTEGER NOT NULL, rc INTEGER NOT NULL, seq INTEGER NOT NULL, qty REAL NOT NULL,
+    PRIMARY KEY (datum, sk, rc, seq)
+);
+CREATE TABLE IF NOT EXISTS explosion (
+    kind TEXT NOT NULL, root_sk INTEGER NOT NULL, root_rc INTEGER NOT NULL, pos INTEGER NOT NULL,
+    col_sk INTEGER NOT NULL, col_rc INTEGER NOT NULL, per_unit REAL NOT NULL,
+    PRIMARY KEY (kind, root_sk, root_rc, pos)
+);
+CREATE TABLE IF NOT EXISTS state (
+    kind TEXT NOT NULL, datum TEXT NOT NULL, sk INTEGER NOT NULL, rc INTEGER NOT NULL,
+    PRIMARY KEY (kind, datum, sk, rc)
+);
+CREATE INDEX IF NOT EXISTS ix_state_key ON state (datum, sk, rc);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# název tabulky -> počet sloupců klíče (pro diff: zbytek řádku jsou hodnoty)
+# demands: (datum, sk, rc, pořadí v rámci klíče) – vložení řádku do plánu neposune klíče ostatních
+_TABLE_KEYS = {"nodes": 2, "edges": 3, "demands": 4, "explosion": 4}
+_TABLE_COLS = {
+    "nodes": ("sk", "rc", "name", "unit"),
+    "edges": ("parent_sk", "parent_rc", "pos", "child_sk", "child_rc", "per_unit_qty"),
+    "demands": ("datum", "sk", "rc", "seq", "qty"),
+    "explosion": ("kind", "root_sk", "root_rc", "pos", "col_sk", "col_rc", "per_unit"),
+}
+
+
+def _fallback_name(name, sk, rc) -> str:
+    n = (name or "").strip()
+    return n if n else f"{sk}-{rc}"
+
+
+class SqliteStore:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        cols = {r[1] for r in self.conn.execute("PRAGMA table_info(demands)")}
+        if cols and "seq" not in cols:
+            # starý tvar (klíč = pozice řádku) – tabulka je odvozená, sync_graph ji naplní znovu
+            self.conn.execute("DROP TABLE demands")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ------------------------------------------------------------ graf
+    def _graph_rows(self, g: Graph) -> Dict[str, List[tuple]]:
+        from services.projections.ingredients_projection import _leaf_vector
+        from services.projections.semis_projection import _semis_vector
+
+        rows: Dict[str, List[tuple]] = {t: [] for t in _TABLE_COLS}
+        for (sk, rc), n in g.nodes.items():
+            rows["nodes"].append((sk, rc, n.name or "", n.unit))
+            for pos, e in enumerate(n.edges):
+                rows["edges"].append((sk, rc, pos, e.child[0], e.child[1], float(e.per_unit_qty or 0.0)))
+        seq: Dict[tuple, int] = {}
+        for d in g.demands:
+            dt = d.key[0]
+            k = (None if pd.isna(dt) else _dump_date(dt), d.node[0], d.node[1])
+            n = seq.get(k, 0)
+            seq[k] = n + 1
+            rows["demands"].append((*k, n, float(d.qty)))
+        for root in dict.fromkeys(d.node for d in g.demands):
+            for kind, fn in (("leaf", _leaf_vector), ("semis300", _semis_vector)):
+                for pos, (nid, per_unit) in enumerate(fn(g, root)):
+                    rows["explosion"].append((kind, root[0], root[1], pos, nid[0], nid[1], float(per_unit)))
+        return rows
+
+    def sync_graph(self, g: Graph) -> Dict[str, int]:
+        """
+        Zapíše graf do DB jen rozdílově: smaže zmizelé/změněné řádky a vloží nové/změněné.
+        Vrací počet zapsaných (smazaných + vložených) řádků per tabulka.
+        """
+        changed: Dict[str, int] = {}
+        with self.conn:
+            for table, new_rows in self._graph_rows(g).items():
+                cols = _TABLE_COLS[table]
+                nkey = _TABLE_KEYS[table]
+                old = {r[:nkey]: r for r in self.conn.execute(f"SELECT {', '.join(cols)} FROM {table}")}
+                new = {r[:nkey]: r for r in new_rows}
+
+                delete = [k for k, r in old.items() if new.get(k) != r]
+                insert = [r for k, r in new.items() if old.get(k) != r]
+                where = " AND ".join(f"{c} IS ?" for c in cols[:nkey])   # IS: i datum NULL
+                self.conn.executemany(f"DELETE FROM {table} WHERE {where}", delete)
+                self.conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", insert
+                )
+                changed[table] = len(delete) + len(insert)
+        return changed
+
+    # ------------------------------------------------------------ projekce (SQL agregace)
+    def ingredients_df(self) -> pd.DataFrame:
+        """Jako to_ingredients_df: součet potřeby listů po (datum, sk, rc, název, jednotka)."""
+        cols = ["datum", "ingredience_sk", "ingredience_rc", "nazev", "potreba", "jednotka", "koupeno"]
+        df = pd.read_sql_query(
+            """
+            SELECT d.datum AS datum, e.col_sk AS ingredience_sk, e.col_rc AS ingredience_rc,
+                   n.name AS nazev, COALESCE(n.unit, '') AS jednotka, SUM(d.qty * e.per_unit) AS potreba
+            FROM demands d
+            JOIN explosion e ON e.kind = 'leaf' AND e.root_sk = d.sk AND e.root_rc = d.rc
+            JOIN nodes n ON n.sk = e.col_sk AND n.rc = e.col_rc
+            WHERE d.datum IS NOT NULL
+            GROUP BY d.datum, e.col_sk, e.col_rc, n.name, jednotka
+            ORDER BY d.datum, e.col_sk, e.col_rc, n.name, jednotka
+            """,
+            self.conn,
+        )
+        if df.empty:
+            return pd.DataFrame(columns=cols)
+        df["datum"] = df["datum"].map(_load_date)
+        df["potreba"] = df["potreba"].astype(float)
+        df["koupeno"] = False
+        return df[cols]
+
+    def semis_dfs(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Jako to_semis_dfs: (přehled SK 300 po datu, detaily per požadavek × cesta)."""
+        pre_cols = ["datum", "polotovar_sk", "polotovar_rc", "polotovar_nazev", "potreba", "jednotka", "vyrobeno"]
+        det_cols = ["datum", "polotovar_sk", "polotovar_rc",
+                    "vyrobek_sk", "vyrobek_rc", "vyrobek_nazev",
+                    "mnozstvi", "jednotka"]
+        det = pd.read_sql_query(
+            """
+            SELECT d.datum AS datum, e.col_sk AS polotovar_sk, e.col_rc AS polotovar_rc,
+                   n.name AS polotovar_nazev, COALESCE(n.unit, '') AS jednotka,
+                   d.sk AS vyrobek_sk, d.rc AS vyrobek_rc, f.name AS vyrobek_nazev,
+                   d.qty * e.per_unit AS mnozstvi
+            FROM demands d
+            JOIN nodes f ON f.sk = d.sk AND f.rc = d.rc
+            JOIN explosion e ON e.kind = 'semis300' AND e.root_sk = d.sk AND e.root_rc = d.rc
+            JOIN nodes n ON n.sk = e.col_sk AND n.rc = e.col_rc
+            ORDER BY d.datum, d.sk, d.rc, d.seq, e.pos
+            """,
+            self.conn,
+        )
+        if det.empty:
+            return pd.DataFrame(columns=pre_cols), pd.DataFrame(columns=det_cols)
+
+        det["datum"] = det["datum"].map(_load_date)
+        det["polotovar_nazev"] = [_fallback_name(n, sk, rc) for n, sk, rc
+                                  in zip(det["polotovar_nazev"], det["polotovar_sk"], det["polotovar_rc"])]
+        det["vyrobek_nazev"] = [_fallback_name(n, sk, rc) for n, sk, rc
+                                in zip(det["vyrobek_nazev"], det["vyrobek_sk"], det["vyrobek_rc"])]
+        det["mnozstvi"] = det["mnozstvi"].astype(float)
+
+        pre = (
+            det.groupby(["datum", "polotovar_sk", "polotovar_rc", "polotovar_nazev", "jednotka"], as_index=False)
+            ["mnozstvi"].sum().rename(columns={"mnozstvi": "potreba"})
+        )
+        pre["vyrobeno"] = False
+        return pre[pre_cols], det[det_cols]
+
+    # ------------------------------------------------------------ stavy (rozhraní jako StateJournal)
+    def exists(self) -> bool:
+        """True, když DB už drží stavy (jinak je graph_store naplní importem z Excelů)."""
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = 'state_seeded'").fetchone() is not None
+
+    def replay(self) -> Dict[str, Set[Key]]:
+        out: Dict[str, Set[Key]] = {t: set() for t in KINDS}
+        for kind, d, sk, rc in self.conn.execute("SELECT kind, datum, sk, rc FROM state"):
+            if kind in out:
+                out[kind].add((_load_date(d), int(sk), int(rc)))
+        return out
+
+    def append(self, kind: str, keys: Iterable[Key], value: bool) -> None:
+        if kind not in KINDS:
+            raise KeyError(f"Neznámý druh stavu: {kind}")
+        rows = [(kind, _dump_date(d), int(sk), int(rc)) for d, sk, rc in keys]
+        sql = ("INSERT OR IGNORE INTO state (kind, datum, sk, rc) VALUES (?, ?, ?, ?)" if value
+               else "DELETE FROM state WHERE kind = ? AND datum = ? AND sk = ? AND rc = ?")
+        with self.conn:
+            self.conn.executemany(sql, rows)
+
+    def reset(self, state: Dict[str, Set[Key]]) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM state")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('state_seeded', '1')")
+            for kind in KINDS:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO state (kind, datum, sk, rc) VALUES (?, ?, ?, ?)",
+                    [(kind, _dump_date(d), int(sk), int(rc)) for d, sk, rc in state.get(kind, ())],
+                )
+
+    def compact(self) -> None:
+        # SQLite drží jen živé klíče; WAL se přeleje do hlavního souboru
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
@@ -0,0 +1,123 @@
+# services/state_journal.py
+"""
+Append-only deník uživatelských stavů (koupeno / vyrobeno).
+
+Každé kliknutí = jeden řádek JSON na konec souboru (flush + fsync), např.:
+    {"op": "+", "t": "bought", "d": "2025-05-12", "sk": 100, "rc": 1}
+Start = přehrání deníku od začátku; poškozený poslední řádek (pád při zápisu) se přeskočí.
+Kompakce přepíše soubor jen živými klíči (atomicky přes .tmp + os.replace).
+
+Deník je autoritativní zdroj stavů; Excely (ingredience.xlsx / polotovary.xlsx) jsou jen export.
+"""
+from __future__ import annotations
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Set, Tuple
+
+Key = Tuple[object, int, int]   # (datum, SK, RC) – jako _key_triplet v graph_store
+
+KINDS = ("bought", "produced")
+
+# kompaktuj, když je v deníku víc řádků než COMPACT_FACTOR × živé klíče (a aspoň COMPACT_MIN)
+COMPACT_FACTOR = 4
+COMPACT_MIN = 1000
+
+
+def _dump_date(d) -> object:
+    return d.isoformat() if isinstance(d, date) else str(d)
+
+
+def _load_date(v) -> object:
+    try:
+        return date.fromisoformat(v)
+    except Exception:
+        return v
+
+
+class StateJournal:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.state: Dict[str, Set[Key]] = {t: set() for t in KINDS}
+        self._lines = 0
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    # ------------------------------------------------------------ čtení
+    def replay(self) -> Dict[str, Set[Key]]:
+        """Přehraje deník do self.state a vrátí kopie množin."""
+        self.state = {t: set() for t in KINDS}
+        self._lines = 0
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                        kind = rec["t"]
+                        k = (_load_date(rec["d"]), int(rec["sk"]), int(rec["rc"]))
+                    except Exception:
+                        continue
+                    if kind not in self.state:
+                        continue
+                    self._lines += 1
+                    if rec.get("op", "+") == "+":
+                        self.state[kind].add(k)
+                    else:
+                        self.state[kind].discard(k)
+        return {t: set(v) for t, v in self.state.items()}
+
+    # ------------------------------------------------------------ zápis
+    def append(self, kind: str, keys: Iterable[Key], value: bool) -> None:
+        """Zapíše změnu klíčů na konec deníku (jeden zápis + fsync pro celou dávku)."""
+        if kind not in self.state:
+            raise KeyError(f"Neznámý druh stavu: {kind}")
+        op = "+" if value else "-"
+        lines = []
+        for d, sk, rc in keys:
+            lines.append(json.dumps({"op": op, "t": kind, "d": _dump_date(d), "sk": int(sk), "rc": int(rc)},
+                                    ensure_ascii=False))
+            if value:
+                self.state[kind].add((d, sk, rc))
+            else:
+                self.state[kind].discard((d, sk, rc))
+        if not lines:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._lines += len(lines)
+
+        if self._lines > max(COMPACT_MIN, COMPACT_FACTOR * self.live_count()):
+            self.compact()
+
+    def reset(self, state: Dict[str, Set[Key]]) -> None:
+        """Nastaví stav (např. import ze starých Excelů) a uloží ho kompakcí."""
+        self.state = {t: set(state.get(t, ())) for t in KINDS}
+        self.compact()
+
+    def compact(self) -> None:
+        """Přepíše deník jen živými klíči (atomicky)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        n = 0
+        with open(tmp, "w", encoding="utf-8") as f:
+            for kind in KINDS:
+                for d, sk, rc in sorted(self.state[kind], key=lambda k: (str(k[0]), k[1], k[2])):
+                    f.write(json.dumps({"op": "+", "t": kind, "d": _dump_date(d), "sk": int(sk), "rc": int(rc)},
+                                       ensure_ascii=False) + "\n")
+                    n += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._lines = n
+
+    def live_count(self) -> int:
+        return sum(len(v) for v in self.state.values())
@@ -0,0 +1,138 @@
+# services/xlsx_stream.py
+# -*- coding: utf-8 -*-
+"""
+Jednoprůchodový zápis .xlsx přes xlsxwriter v režimu constant_memory.
+
+Listy se zapisují postupně řádek po řádku (jeden open/close souboru),
+xlsxwriter drží v paměti jen aktuální řádek → paměť nezávisí na délce listu.
+Pořadí je proto pevné: list po listu, řádky vzestupně.
+
+Zapnutí: parametr streaming=True u exportních funkcí, nebo FG_XLSX_STREAM=1.
+Bez nainstalovaného xlsxwriteru se používá původní (openpyxl) cesta.
+"""
+from __future__ import annotations
+
+import math
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xlsxwriter
+except Exception:  # pragma: no cover - volitelná závislost
+    xlsxwriter = None
+
+# po kolika řádcích se DataFrame převádí na Python hodnoty (drží paměť plochou)
+CHUNK_ROWS = 20_000
+
+Sheet = Tuple[str, Sequence[Any], Iterable[Sequence[Any]]]
+
+
+def streaming_enabled(flag: Optional[bool] = None) -> bool:
+    """Explicitní parametr má přednost; jinak FG_XLSX_STREAM=1. Vždy False bez xlsxwriteru."""
+    if xlsxwriter is None:
+        return False
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get("FG_XLSX_STREAM") == "1"
+
+
+def cell_value(v):
+    """Hodnota buňky pro xlsxwriter (NaN/NaT → prázdná buňka, numpy → Python)."""
+    if v is None or v is pd.NaT:
+        return None
+    if isinstance(v, float):
+        return None if math.isnan(v) else v
+    if isinstance(v, (str, bool, int, date)):          # date pokrývá i datetime/Timestamp
+        return v
+    if isinstance(v, np.generic):
+        return cell_value(v.item())
+    try:
+        if pd.isna(v):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(v)
+
+
+def _column_values(s: pd.Series) -> List[Any]:
+    if pd.api.types.is_bool_dtype(s) or pd.api.types.is_integer_dtype(s):
+        return s.tolist()
+    if pd.api.types.is_float_dtype(s):
+        return [None if v != v else v for v in s.tolist()]
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return [None if v is pd.NaT else v.to_pydatetime() for v in s.tolist()]
+    return [cell_value(v) for v in s.tolist()]
+
+
+def frame_rows(df: pd.DataFrame) -> Iterator[List[Any]]:
+    """Řádky DataFrame (bez indexu) jako seznamy Python hodnot – po blocích CHUNK_ROWS."""
+    for start in range(0, len(df), CHUNK_ROWS):
+        part = df.iloc[start:start + CHUNK_ROWS]
+        cols = [_column_values(part.iloc[:, i]) for i in range(part.shape[1])]
+        for row in zip(*cols):
+            yield list(row)
+
+
+def frame_sheet(name: str, df: pd.DataFrame) -> Sheet:
+    """List ve tvaru jako DataFrame.to_excel(index=False): hlavička = názvy sloupců."""
+    return name, [str(c) for c in df.columns], frame_rows(df)
+
+
+_EPOCH = datetime(1899, 12, 31)
+
+
+def excel_serial(v: date) -> float:
+    """Sériové číslo data pro Excel (systém 1900 vč. fiktivního 29. 2. 1900, jako xlsxwriter)."""
+    if not isinstance(v, datetime):
+        v = datetime(v.year, v.month, v.day)
+    delta = v.replace(tzinfo=None) - _EPOCH
+    n = delta.days + (delta.seconds + delta.microseconds / 1e6) / 86400
+    return n + 1 if n > 59 else n
+
+
+def _date_writer(date_fmt):
+    """
+    Handler pro date/datetime: převod na sériové číslo Excelu je v xlsxwriteru drahý
+    a data se v listech opakují (pár dní × tisíce řádků) → převod se cachuje.
+    """
+    serials = {}
+
+    def write(ws, row, col, value, fmt=None):
+        n = serials.get(value)
+        if n is None:
+            n = serials[value] = excel_serial(value)
+        return ws.write_number(row, col, n, fmt or date_fmt)
+
+    return write
+
+
+def write_sheets(path: str | Path, sheets: Iterable[Sheet]) -> None:
+    """Zapíše listy (název, hlavička, řádky) do jednoho sešitu v jednom průchodu."""
+    if xlsxwriter is None:
+        raise RuntimeError("xlsxwriter není k dispozici")
+    wb = xlsxwriter.Workbook(str(path), {
+        "constant_memory": True,
+        "strings_to_urls": False,
+        "strings_to_formulas": False,
+    })
+    try:
+        bold = wb.add_format({"bold": True})
+        write_date = _date_writer(wb.add_format({"num_format": "yyyy-mm-dd"}))
+        for name, header, rows in sheets:
+            ws = wb.add_worksheet(name)
+            ws.add_write_handler(date, write_date)
+            ws.add_write_handler(datetime, write_date)
+            ws.add_write_handler(pd.Timestamp, write_date)
+            write_row = ws.write_row
+            write_row(0, 0, header, bold)
+            r = 1
+            for row in rows:
+                write_row(r, 0, row)
+                r += 1
+    finally:
+        wb.close()
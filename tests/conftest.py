@@ -31,3 +31,16 @@ def tmp_output(monkeypatch, tmp_path: Path):
     monkeypatch.setattr("services.excel_service.OUTPUT_EXCEL", test_excel, raising=False)
 
     return test_excel
+
+
+@pytest.fixture(autouse=True)
+def _isolated_state_store(monkeypatch, tmp_path: Path):
+    """
+    Deník stavů (stavy.jsonl) i SQLite DB vždy do dočasné složky,
+    aby testy nepřepisovaly reálné stavy uživatele. Snapshoty sešitů
+    (*.snapshot.pkl) jsou vypnuté, ať nevznikají vedle reálných xlsx;
+    testy snapshotu si je zapínají samy nad kopiemi v tmp_path.
+    """
+    monkeypatch.setattr("services.paths.STATE_JOURNAL", tmp_path / "stavy.jsonl")
+    monkeypatch.setattr("services.paths.STATE_DB", tmp_path / "planovac.sqlite")
+    monkeypatch.setenv("FG_NO_SNAPSHOT", "1")
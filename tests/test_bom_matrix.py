@@ -0,0 +1,95 @@
+# tests/test_bom_matrix.py
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from services.graph_model import Graph, Node, Edge, Demand
+from services.projections.bom_matrix import expand_demands, requirement_table
+from services.projections.ingredients_projection import to_ingredients_df, _leaf_vector, _is_purchase_leaf
+from services.projections.semis_projection import to_semis_dfs, _semis_vector
+
+
+def _synthetic_graph(n_finals=500, n_mid=300, n_semis=600, n_leaves=2000, n_demands=10_000, seed=7):
+    """Víceúrovňový kusovník: 400 -> (300 | 200 | list), 200 -> (300 | list), 300 -> list."""
+    rnd = random.Random(seed)
+    nodes = {}
+    leaves = [(150, i) for i in range(n_leaves)]
+    semis = [(300, i) for i in range(n_semis)]
+    mids = [(200, i) for i in range(n_mid)]
+    finals = [(400, i) for i in range(n_finals)]
+    for nid in leaves:
+        nodes[nid] = Node(nid, f"L{nid[1]}", unit="kg")
+    for nid in semis:
+        nodes[nid] = Node(nid, f"S{nid[1]}", unit="kg",
+                          edges=[Edge(c, round(rnd.uniform(0.1, 2), 3)) for c in rnd.sample(leaves, 3)])
+    for nid in mids:
+        nodes[nid] = Node(nid, f"M{nid[1]}", edges=[Edge(c, round(rnd.uniform(0.1, 2), 3))
+                                                    for c in rnd.sample(semis, 1) + rnd.sample(leaves, 2)])
+    for nid in finals:
+        kids = rnd.sample(semis, 2) + rnd.sample(mids, 2) + rnd.sample(leaves, 3)
+        nodes[nid] = Node(nid, f"F{nid[1]}", edges=[Edge(c, round(rnd.uniform(0, 2), 1)) for c in kids])
+    start = date(2025, 1, 6)
+    demands = []
+    for _ in range(n_demands):
+        f = rnd.choice(finals)
+        d = start + timedelta(days=rnd.randrange(60))
+        demands.append(Demand((d, 400, f[1]), f, float(rnd.randint(1, 50))))
+    return Graph(nodes=nodes, demands=demands)
+
+
+def _loop_ingredients(g):
+    """Referenční rozpad smyčkou přes požadavky a hrany (původní algoritmus)."""
+    acc = {}
+    for d in g.demands:
+        stack = [(d.node, d.qty)]
+        while stack:
+            nid, qty = stack.pop()
+            node = g.nodes.get(nid)
+            if not node:
+                continue
+            if node.edges:
+                stack.extend((e.child, qty * e.per_unit_qty) for e in node.edges if e.per_unit_qty)
+            elif _is_purchase_leaf(node, nid):
+                acc[(d.key[0], nid)] = acc.get((d.key[0], nid), 0.0) + qty
+    return acc
+
+
+def test_expansion_keeps_demand_and_vector_order():
+    g = Graph(
+        nodes={
+            (400, 1): Node((400, 1), "A", edges=[Edge((150, 1), 2.0), Edge((150, 2), 1.0)]),
+            (400, 2): Node((400, 2), "B", edges=[Edge((150, 2), 3.0)]),
+            (150, 1): Node((150, 1), "x"),
+            (150, 2): Node((150, 2), "y"),
+        },
+        demands=[Demand(("d1", 400, 2), (400, 2), 1.0), Demand(("d1", 400, 1), (400, 1), 2.0),
+                 Demand(("d2", 400, 9), (400, 9), 5.0)],  # neznámý finál -> nic
+    )
+    exp = expand_demands(g, _leaf_vector)
+    got = [(int(i), exp.cols[c], q) for i, c, q in zip(exp.demand_idx, exp.col_idx, exp.qty)]
+    assert got == [(0, (150, 2), 3.0), (1, (150, 2), 2.0), (1, (150, 1), 4.0)]
+
+    table = requirement_table(g, _leaf_vector)
+    assert table.loc["d1", (150, 2)] == 5.0 and table.loc["d2"].sum() == 0.0
+
+
+def test_engine_matches_loop_reference_at_scale():
+    g = _synthetic_graph()
+    assert len(g.nodes) >= 3000 and len(g.demands) >= 10_000
+
+    ref = _loop_ingredients(g)
+    df = to_ingredients_df(g)
+
+    got = {(r.datum, (r.ingredience_sk, r.ingredience_rc)): r.potreba for r in df.itertuples()}
+    assert got.keys() == ref.keys()
+    np.testing.assert_allclose([got[k] for k in ref], [ref[k] for k in ref], rtol=1e-9)
+
+    # den × polotovar z matice = součet přehledu polotovarů
+    pre, det = to_semis_dfs(g)
+    table = requirement_table(g, _semis_vector)
+    piv = pre.pivot_table(index="datum", columns=["polotovar_sk", "polotovar_rc"], values="potreba", aggfunc="sum")
+    piv = piv.reindex(index=table.index, columns=table.columns).fillna(0.0)
+    np.testing.assert_allclose(piv.to_numpy(), table.to_numpy(), rtol=1e-9)
+    assert len(det) >= len(pre)
@@ -0,0 +1,55 @@
+# tests/test_data_loader_snapshot.py
+from datetime import date
+import pandas as pd
+import pytest
+
+import services.data_loader as dl
+
+
+@pytest.fixture()
+def sources(tmp_path, monkeypatch):
+    rec = tmp_path / "recepty.xlsx"
+    plan = tmp_path / "plan.xlsx"
+    with pd.ExcelWriter(rec, engine="openpyxl") as w:
+        pd.DataFrame([{
+            " SK ": 400, "Reg. č.": 111, "Název 1": "Klobása",
+            "SK.1": 150, "Reg. č..1": 555, "Název 1.1": "Sůl", "Množství": 2.0, "MJ evidence": "kg",
+        }]).to_excel(w, sheet_name=dl.RECEPTY_SHEET, index=False)
+    pd.DataFrame([{"datum": "2025-01-02", "reg.č": 111, "mnozstvi": 3}]).to_excel(plan, index=False)
+
+    monkeypatch.setattr(dl, "RECEPTY_FILE", rec)
+    monkeypatch.setattr(dl, "PLAN_FILE", plan)
+    monkeypatch.delenv("FG_NO_SNAPSHOT", raising=False)
+    dl.reset_snapshot_stats()
+    return rec, plan
+
+
+def test_cold_then_warm_start_hits_snapshot(sources):
+    rec_cold, plan_cold = dl.nacti_data()
+    assert dl.snapshot_stats() == {"hit": 0, "miss": 2}
+
+    rec_warm, plan_warm = dl.nacti_data()
+    assert dl.snapshot_stats() == {"hit": 2, "miss": 2}
+
+    pd.testing.assert_frame_equal(rec_cold, rec_warm)
+    pd.testing.assert_frame_equal(plan_cold, plan_warm)
+    assert "SK" in rec_warm.columns                       # očištěné názvy sloupců
+    assert plan_warm.loc[0, "datum"] == date(2025, 1, 2)  # datum jako date i ze snapshotu
+
+
+def test_changed_source_falls_back_to_excel(sources):
+    _, plan_path = sources
+    dl.nacti_data()
+
+    pd.DataFrame([{"datum": "2025-01-03", "reg.č": 111, "mnozstvi": 7}]).to_excel(plan_path, index=False)
+    _, plan = dl.nacti_data()
+
+    assert dl.snapshot_stats() == {"hit": 1, "miss": 3}
+    assert int(plan.loc[0, "mnozstvi"]) == 7
+
+
+def test_snapshot_can_be_disabled(sources, monkeypatch):
+    monkeypatch.setenv("FG_NO_SNAPSHOT", "1")
+    dl.nacti_data()
+    dl.nacti_data()
+    assert dl.snapshot_stats() == {"hit": 0, "miss": 4}
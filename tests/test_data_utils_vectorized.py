@@ -0,0 +1,90 @@
+# tests/test_data_utils_vectorized.py
+# Vlastnostní testy: vektorové funkce = Series.map(skalární funkce) na náhodných datech.
+import random
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.data_utils import (
+    key_txt, key_txt_series, norm_num_to_str, normalize_key_series, to_bool_cell_excel, to_bool_series,
+)
+
+WORDS = ["true", "False", "ANO", "ne", "Áno", "nepravda", "pravda", "x", "✓", "✔", "-", "", " ", "yes", "N",
+         "nan", "NaN", "inf", "-inf", "1_000", "0x10", "abc", "Polotovar A", "1e3", "1e400", ".5", "5.", "+",
+         "١٢", "00012", "12345678901234567", "2.9999999999999999", "0,0", "-0", "7,25", " 150 ", "150.0",
+         "1.000", "0.99999999999999999", "9007199254740993", "\t3\n", "1 000"]
+
+
+def _rand_str(rnd):
+    if rnd.random() < 0.5:
+        return rnd.choice(WORDS)
+    alphabet = "0123456789,.-+ eExna✓"
+    return "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 8)))
+
+
+def _rand_value(rnd):
+    kind = rnd.randrange(9)
+    if kind <= 2:
+        return _rand_str(rnd)
+    if kind == 3:
+        return rnd.choice([0, 1, -5, 2 ** 53 + 1, 10 ** 30, 150, -0])
+    if kind == 4:
+        return rnd.choice([0.0, -0.0, 1.5, 150.0, -7.9, float("nan"), float("inf"), 1e20, 2.0 ** 53, 0.1])
+    if kind == 5:
+        return rnd.choice([True, False, np.True_, np.int64(7), np.float64(2.5)])
+    if kind == 6:
+        return rnd.choice([None, pd.NaT, np.nan, pd.NA])
+    if kind == 7:
+        return rnd.choice([date(2025, 1, 6), datetime(2025, 1, 6, 12), pd.Timestamp("2025-01-06")])
+    return str(rnd.randint(0, 999))
+
+
+def _cases(n=400, seeds=range(25)):
+    for seed in seeds:
+        rnd = random.Random(seed)
+        values = [_rand_value(rnd) for _ in range(n)]
+        yield pd.Series(values, dtype=object, index=range(100, 100 + n), name="c")          # mix typů
+        yield pd.Series([v for v in values if isinstance(v, str)], dtype=object)          # jen texty
+    rnd = np.random.default_rng(1)
+    floats = rnd.normal(0, 1e6, 300)
+    floats[::7] = np.round(floats[::7])
+    floats[::11] = np.nan
+    yield pd.Series(floats)
+    yield pd.Series(rnd.integers(-2 ** 62, 2 ** 62, 300))
+    yield pd.Series(rnd.integers(0, 3, 300))
+    yield pd.Series(rnd.random(300) < 0.5)
+    yield pd.Series([True, None, False], dtype="boolean")
+    yield pd.Series([1, None, 0], dtype="Int64")
+    yield pd.Series(["ano", "ne", "1"], dtype="category")
+    yield pd.Series([], dtype=object)
+
+
+@pytest.mark.parametrize("vector, scalar", [
+    (to_bool_series, to_bool_cell_excel),
+    (normalize_key_series, norm_num_to_str),
+    (key_txt_series, key_txt),
+])
+def test_vectorized_equals_scalar_map(vector, scalar):
+    for s in _cases():
+        expected = s.astype(object).map(scalar)
+        got = vector(s)
+        assert got.index.equals(s.index) and got.name == s.name
+        assert got.tolist() == expected.tolist(), s.tolist()
+
+
+def test_results_have_expected_dtypes():
+    s = pd.Series(["ano", 150.0, None])
+    assert to_bool_series(s).dtype == bool
+    assert normalize_key_series(s).tolist() == ["ano", "150", ""]
+    assert key_txt_series(pd.Series(["7,9", -7.9, None])).tolist() == ["7", "-7", ""]
+
+
+def test_large_column_matches_map():
+    rnd = random.Random(7)
+    keys = pd.Series([rnd.choice(["150", "150.0", "88", " 300 ", "12,0", "abc"]) for _ in range(100_000)])
+    flags = pd.Series([rnd.choice(["ano", "ne", "", "x", "1", "0", True, False]) for _ in range(100_000)])
+
+    pd.testing.assert_series_equal(normalize_key_series(keys), keys.map(norm_num_to_str))
+    pd.testing.assert_series_equal(to_bool_series(flags), flags.map(to_bool_cell_excel).astype(bool))
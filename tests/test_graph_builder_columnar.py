@@ -0,0 +1,44 @@
+# tests/test_graph_builder_columnar.py
+import pandas as pd
+import pytest
+
+import services.paths as sp
+from services.data_loader import RECEPTY_SHEET
+from services.graph_builder import build_nodes_from_recipes, build_nodes_from_recipes_columnar
+
+
+def _assert_same_nodes(a, b):
+    assert list(a) == list(b), "Pořadí uzlů se musí shodovat."
+    for nid in a:
+        assert a[nid] == b[nid], f"Uzel {nid} se liší: {a[nid]} != {b[nid]}"
+
+
+def test_columnar_builder_parity_on_shipped_recepty():
+    recepty = pd.read_excel(sp.RECEPTY_FILE, sheet_name=RECEPTY_SHEET)
+    _assert_same_nodes(build_nodes_from_recipes(recepty), build_nodes_from_recipes_columnar(recepty))
+
+
+def test_columnar_builder_parity_names_units_and_fallbacks():
+    recepty = pd.DataFrame([
+        # finál bez jména v "Název 1" na prvním řádku, jméno dorazí až na druhém
+        {"SK": 400, "Reg. č.": 1, "Název 1": None,       "SK.1": 300, "Reg. č..1": 10, "Název 1.1": "Polotovar A", "Množství": 2,   "MJ evidence": "kg"},
+        {"SK": 400, "Reg. č.": 1, "Název 1": "Klobása", "SK.1": 150, "Reg. č..1": 77, "Název 1.1": "Sůl",         "Množství": 0.5, "MJ evidence": "kg"},
+        # polotovar je rodičem – jméno z "Název 1" nesmí přepsat jméno z dítěte
+        {"SK": 300, "Reg. č.": 10, "Název 1": "Jiné",   "SK.1": 150, "Reg. č..1": 78, "Název 1.1": "",            "Množství": 1,   "MJ evidence": ""},
+        {"SK": 300, "Reg. č.": 10, "Název 1": "Jiné",   "SK.1": 150, "Reg. č..1": 78, "Název 1.1": "Pepř",        "Množství": "x", "MJ evidence": "g"},
+    ])
+    a = build_nodes_from_recipes(recepty)
+    b = build_nodes_from_recipes_columnar(recepty)
+    _assert_same_nodes(a, b)
+    assert b[(150, 78)].name == "Pepř" and b[(150, 78)].unit == "g"
+    assert [e.per_unit_qty for e in b[(300, 10)].edges] == [1.0, 0.0]
+
+
+def test_columnar_builder_rejects_invalid_keys():
+    recepty = pd.DataFrame([
+        {"SK": 400, "Reg. č.": None, "SK.1": 150, "Reg. č..1": 1, "Název 1.1": "Sůl", "Množství": 1, "MJ evidence": "kg"},
+    ])
+    with pytest.raises(KeyError):
+        build_nodes_from_recipes(recepty)
+    with pytest.raises(KeyError):
+        build_nodes_from_recipes_columnar(recepty)
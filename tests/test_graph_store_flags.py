@@ -0,0 +1,100 @@
+# tests/test_graph_store_flags.py
+from datetime import date
+
+import pytest
+
+import services.graph_store as gs
+import services.projections.ingredients_projection as ip
+import services.projections.semis_projection as sp_
+from services.graph_model import Graph, Node, Edge, Demand
+
+D1, D2 = date(2025, 5, 12), date(2025, 5, 13)
+
+
+@pytest.fixture()
+def store(monkeypatch):
+    g = Graph(
+        nodes={
+            (400, 1): Node((400, 1), "Klobása", edges=[Edge((300, 5), 1.0), Edge((100, 1), 2.0)]),
+            (300, 5): Node((300, 5), "Směs", unit="kg", edges=[Edge((200, 9), 0.5)]),
+            (100, 1): Node((100, 1), "Sůl", unit="kg"),
+            (200, 9): Node((200, 9), "Cibule", unit="kg"),
+        },
+        demands=[Demand((D1, 400, 1), (400, 1), 2.0), Demand((D2, 400, 1), (400, 1), 1.0)],
+    )
+    calls = {"ing": 0, "semis": 0}
+    to_ing, to_semis = ip.to_ingredients_df, sp_.to_semis_dfs
+
+    def _ing(graph):
+        calls["ing"] += 1
+        return to_ing(graph)
+
+    def _semis(graph):
+        calls["semis"] += 1
+        return to_semis(graph)
+
+    monkeypatch.setattr(ip, "to_ingredients_df", _ing)
+    monkeypatch.setattr(sp_, "to_semis_dfs", _semis)
+    # persist do Excelu nás tu nezajímá
+    monkeypatch.setattr(gs, "ensure_output_excel", lambda df, **kw: None)
+    monkeypatch.setattr(gs, "ensure_output_semis_excel", lambda pre, det, **kw: None)
+    monkeypatch.setattr(gs, "_JOURNAL", None)
+
+    monkeypatch.setattr(gs, "_G", g)
+    monkeypatch.setattr(gs, "_BOUGHT_KEYS", set())
+    monkeypatch.setattr(gs, "_PRODUCED_SEMIS_KEYS", set())
+    monkeypatch.setattr(gs, "_DIRTY_ING", True)
+    monkeypatch.setattr(gs, "_DIRTY_SEMIS", True)
+    monkeypatch.setattr(gs, "_ING_DF", None)
+    monkeypatch.setattr(gs, "_SEMIS_PRE", None)
+    monkeypatch.setattr(gs, "_SEMIS_DET", None)
+    return calls
+
+
+def _koupeno(df):
+    return {(r.datum, r.ingredience_rc): bool(r.koupeno) for r in df.itertuples()}
+
+
+def test_bought_flag_patches_rows_without_reprojection(store):
+    gs.get_ingredients_df()
+    assert store["ing"] == 1
+
+    gs.set_ingredient_bought("2025-05-12", "100", "1")
+    gs.set_ingredients_bought_many([(D2, 200, 9), (D2, 100, 1)])
+    gs.set_ingredient_bought(D2, 100, 1, bought=False)
+
+    df = gs.get_ingredients_df()
+    assert store["ing"] == 1
+    assert _koupeno(df) == {(D1, 1): True, (D1, 9): False, (D2, 1): False, (D2, 9): True}
+    assert gs.get_graph().nodes[(100, 1)].bought is False
+
+    # stejný výsledek jako plný přepočet
+    gs._DIRTY_ING = True
+    assert _koupeno(gs.get_ingredients_df()) == _koupeno(df)
+    assert store["ing"] == 2
+
+
+def test_produced_flag_patches_rows_without_reprojection(store):
+    gs.get_semis_dfs()
+    gs.set_semi_produced(D2, 300, 5)
+
+    pre, _ = gs.get_semis_dfs()
+    assert store["semis"] == 1
+    assert dict(zip(pre["datum"], pre["vyrobeno"])) == {D1: False, D2: True}
+
+
+def test_semis_many_is_one_refresh_and_one_persist(store, monkeypatch):
+    saved = []
+    monkeypatch.setattr(gs, "ensure_output_semis_excel", lambda pre, det, **kw: saved.append(pre.copy()))
+    gs.get_semis_dfs()
+
+    gs.set_semis_produced_many([(D1, 300, 5), ("2025-05-13", "300", "5"), (D1, "x", 5)])
+
+    assert store["semis"] == 1 and len(saved) == 1
+    assert list(saved[0]["vyrobeno"]) == [True, True]
+
+
+def test_flag_before_first_projection_falls_back_to_full_recompute(store):
+    gs.set_ingredient_bought(D1, 100, 1)
+    assert store["ing"] == 1
+    assert _koupeno(gs.get_ingredients_df())[(D1, 1)] is True
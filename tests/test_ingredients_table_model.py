@@ -0,0 +1,59 @@
+# tests/test_ingredients_table_model.py
+import os
+import pandas as pd
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+
+from gui.models.ingredients_table_model import ACTION_COL, IngredientsTableModel, table_rows
+from gui import results_window as rw
+
+
+def _df():
+    return pd.DataFrame([
+        {"datum": "2025-03-02", "ingredience_sk": 11,     "ingredience_rc": 1, "nazev": "Rajčata", "potreba": 1.5, "jednotka": "kg", "koupeno": False},
+        {"datum": "2025-03-01", "ingredience_sk": "11.0", "ingredience_rc": 1, "nazev": "Rajčata", "potreba": 2.0, "jednotka": "kg", "koupeno": False},
+        {"datum": "2025-03-03", "ingredience_sk": 12,     "ingredience_rc": 9, "nazev": "Sýr",     "potreba": 0.5, "jednotka": "kg", "koupeno": True},
+        {"datum": "2025-03-04", "ingredience_sk": 13,     "ingredience_rc": 2, "nazev": "Pepř",    "potreba": 0.1, "jednotka": "kg", "koupeno": False},
+    ])
+
+
+def test_table_rows_match_widget_layout():
+    # model i widgetový layout musí ukazovat stejné řádky se stejnými zdrojovými indexy
+    for aggregate in (False, True):
+        cells, src = table_rows(_df(), "koupeno", aggregate)
+        rows, buy_map, _ = rw._build_table_layout(_df(), "koupeno", aggregate=aggregate)
+        assert list(buy_map.values()) == src
+        assert [r[3].DisplayText for r in rows[1:]] == cells["nazev"]
+
+
+def test_model_sorts_by_date_and_maps_sources():
+    m = IngredientsTableModel(_df(), "koupeno")
+    assert m.rowCount() == 3 and m.columnCount() == 7
+    # seřazeno podle data, koupený řádek chybí
+    assert [m.source_indices(r) for r in range(3)] == [[1], [0], [3]]
+    assert m.data(m.index(0, 0)) == "01.03.2025"
+    assert m.data(m.index(0, ACTION_COL)) == "Koupeno"
+    assert m.headerData(3, Qt.Horizontal) == "Název"
+
+
+def test_remove_rows_uses_model_signals():
+    m = IngredientsTableModel(_df(), "koupeno")
+    removed, resets = [], []
+    m.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    m.modelReset.connect(lambda: resets.append(1))
+
+    m.remove_rows([0, 2])
+    assert removed == [(2, 2), (0, 0)]     # odzadu, po blocích
+    assert not resets                      # žádný reset/rebuild
+    assert m.rowCount() == 1 and m.source_indices(0) == [0]
+    assert m.data(m.index(0, 3)) == "Rajčata"
+
+
+def test_set_frame_switches_aggregation_in_place():
+    m = IngredientsTableModel(_df(), "koupeno")
+    m.set_frame(_df(), "koupeno", aggregate=True)
+    assert m.rowCount() == 2
+    assert m.source_indices(0) == [0, 1]   # SK 11 a '11.0' jsou jedna skupina
+    assert m.data(m.index(0, 4)) == "3.5"
@@ -0,0 +1,54 @@
+# tests/test_persist_queue.py
+import threading
+import time
+
+from services.persist_queue import WriteBehindQueue
+
+
+def test_submits_coalesce_and_flush_writes_latest_only():
+    q = WriteBehindQueue(debounce_s=10.0, sync=False)  # worker by čekal – zapíše až flush
+    written = []
+    for i in range(5):
+        q.submit("ingredients", lambda i=i: written.append(i))
+    q.submit("semis", lambda: written.append("semis"))
+
+    assert written == []
+    assert q.queue_depth() == 2
+
+    q.flush()
+    assert written == [4, "semis"]
+    m = q.metrics()
+    assert (m["submitted"], m["coalesced"], m["writes"], m["queue_depth"]) == (6, 4, 2, 0)
+    assert m["last_latency_ms"] >= m["last_write_ms"] >= 0.0
+
+
+def test_background_worker_writes_after_debounce():
+    q = WriteBehindQueue(debounce_s=0.05, sync=False)
+    done = threading.Event()
+    q.submit("semis", done.set)
+    assert q.queue_depth() == 1
+    assert done.wait(2.0)
+    time.sleep(0.05)
+    assert q.metrics()["writes"] == 1 and q.queue_depth() == 0
+
+
+def test_errors_are_kept_for_gui_thread():
+    q = WriteBehindQueue(sync=True)
+
+    def boom():
+        raise PermissionError("soubor je otevřený")
+
+    q.submit("ingredients", boom)
+    errs = q.pop_errors()
+    assert [k for k, _ in errs] == ["ingredients"] and isinstance(errs[0][1], PermissionError)
+    assert q.pop_errors() == [] and q.metrics()["errors"] == 1
+
+
+def test_debounce_env_is_parsed_defensively(monkeypatch):
+    import services.graph_store as gs
+
+    for raw, expected in (("250", 0.25), ("0", 0.0), ("abc", 0.5), ("", 0.5), ("-5", 0.5), ("nan", 0.5)):
+        monkeypatch.setenv("FG_PERSIST_DEBOUNCE_MS", raw)
+        assert gs._persist_debounce_s() == expected
+    monkeypatch.delenv("FG_PERSIST_DEBOUNCE_MS")
+    assert gs._persist_debounce_s() == 0.5
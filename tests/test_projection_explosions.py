@@ -0,0 +1,48 @@
+# tests/test_projection_explosions.py
+from datetime import date
+
+from services.graph_model import Graph, Node, Edge, Demand
+from services.projections.ingredients_projection import to_ingredients_df
+from services.projections.semis_projection import to_semis_dfs
+
+
+def _graph():
+    # finál F(400,1) -> polotovar S(300,10) ×2 a sůl L(150,7) ×3; S -> sůl ×0.5; hrana s 0 se ignoruje
+    nodes = {
+        (400, 1): Node((400, 1), "Klobása", edges=[Edge((300, 10), 2.0), Edge((150, 7), 3.0), Edge((150, 8), 0.0)]),
+        (300, 10): Node((300, 10), "Směs", unit="kg", edges=[Edge((150, 7), 0.5)]),
+        (150, 7): Node((150, 7), "Sůl", unit="kg"),
+        (150, 8): Node((150, 8), "Pepř", unit="kg"),
+    }
+    d1, d2 = date(2025, 1, 6), date(2025, 1, 7)
+    demands = [
+        Demand((d1, 400, 1), (400, 1), 10.0),
+        Demand((d1, 400, 1), (400, 1), 2.0),
+        Demand((d2, 400, 1), (400, 1), 1.0),
+    ]
+    return Graph(nodes=nodes, demands=demands), d1, d2
+
+
+def test_ingredients_use_cached_vector_per_final():
+    g, d1, d2 = _graph()
+    df = to_ingredients_df(g)
+
+    # na 1 ks finálu: 3 + 2×0.5 = 4 kg soli; pepř (0 na ks) se neobjeví
+    assert g.explosions[("leaf", (400, 1))] == [((150, 7), 4.0)]
+    got = {(r.datum, r.ingredience_rc): r.potreba for r in df.itertuples()}
+    assert got == {(d1, 7): 48.0, (d2, 7): 4.0}
+
+
+def test_semis_keep_row_per_demand_and_reuse_cache():
+    g, d1, d2 = _graph()
+    pre, det = to_semis_dfs(g)
+
+    assert g.explosions[("semis300", (400, 1))] == [((300, 10), 2.0)]
+    assert list(det["mnozstvi"]) == [20.0, 4.0, 2.0]
+    assert {(r.datum, r.potreba) for r in pre.itertuples()} == {(d1, 24.0), (d2, 2.0)}
+
+    # změna hran bez invalidace se neprojeví (cache), po invalidaci ano
+    g.nodes[(400, 1)].edges[0].per_unit_qty = 1.0
+    assert list(to_semis_dfs(g)[1]["mnozstvi"]) == [20.0, 4.0, 2.0]
+    g.invalidate_explosions()
+    assert list(to_semis_dfs(g)[1]["mnozstvi"]) == [10.0, 2.0, 1.0]
@@ -0,0 +1,60 @@
+# tests/test_readiness_index.py
+import random
+from datetime import date
+
+import pandas as pd
+
+import services.paths as sp
+from services.data_loader import RECEPTY_SHEET
+from services.graph_builder import build_nodes_from_recipes_columnar
+from services.graph_model import Graph, Node, Edge, Demand
+from services.readiness import (
+    _all_descendant_leaves_bought,
+    compute_ready_semis_under_finals,
+    is_semi_ready,
+    note_bought,
+    readiness_index,
+)
+
+
+def test_counters_follow_bought_flips_like_dfs():
+    g = Graph(nodes=build_nodes_from_recipes_columnar(pd.read_excel(sp.RECEPTY_FILE, sheet_name=RECEPTY_SHEET)))
+    semis = [nid for nid in g.nodes if nid[0] == 300]
+    leaves = [nid for nid, n in g.nodes.items() if not n.edges]
+    readiness_index(g)
+
+    rnd = random.Random(3)
+    for leaf in leaves:               # všechno koupit, pak náhodně odkoupit
+        g.nodes[leaf].bought = True
+        note_bought(g, leaf, True)
+    for leaf in rnd.sample(leaves, len(leaves) // 10):
+        g.nodes[leaf].bought = False
+        note_bought(g, leaf, False)
+
+    got = {nid: is_semi_ready(g, nid) for nid in semis}
+    exp = {nid: _all_descendant_leaves_bought(g, nid) for nid in semis}
+    assert got == exp
+    assert any(got.values()) and not all(got.values())
+
+
+def test_ready_semis_under_finals_uses_index():
+    g = Graph(
+        nodes={
+            (400, 1): Node((400, 1), "Klobása", edges=[Edge((300, 5), 1.0), Edge((300, 6), 1.0)]),
+            (300, 5): Node((300, 5), "Směs", edges=[Edge((200, 2), 1.0), Edge((100, 1), 0.0)]),
+            (300, 6): Node((300, 6), "Lák", edges=[Edge((100, 1), 1.0)]),
+            (200, 2): Node((200, 2), "Mezi", edges=[Edge((100, 2), 1.0)]),
+            (100, 1): Node((100, 1), "Sůl", bought=True),
+            (100, 2): Node((100, 2), "Pepř"),
+        },
+        demands=[Demand((date(2025, 5, 12), 400, 1), (400, 1), 1.0)],
+    )
+    assert compute_ready_semis_under_finals(g) == {(date(2025, 5, 12), 300, 6)}
+
+    g.nodes[(100, 2)].bought = True
+    note_bought(g, (100, 2), True)
+    assert len(compute_ready_semis_under_finals(g)) == 2
+    assert readiness_index(g).leaf_to_semis[(100, 1)] == [(300, 5), (300, 6)]
+
+    g.invalidate_explosions()
+    assert g.readiness_index is None and is_semi_ready(g, (300, 5)) and not is_semi_ready(g, (300, 99))
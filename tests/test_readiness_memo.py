@@ -0,0 +1,62 @@
+# tests/test_readiness_memo.py
+from datetime import date, timedelta
+
+import services.readiness as rd
+from services.graph_model import Graph, Node, Edge, Demand
+from services.readiness import compute_ready_pack, compute_ready_semis_under_finals, note_bought
+
+
+def _plan_graph(n_finals=40, days_per_final=300):
+    nodes = {}
+    for i in range(n_finals):
+        leaves = [(100, i * 10 + j) for j in range(6)]
+        for leaf in leaves:
+            nodes[leaf] = Node(leaf, f"L{leaf[1]}", bought=(leaf[1] % 7 != 0))
+        semis = [(300, i * 10 + j) for j in range(3)]
+        for j, s in enumerate(semis):
+            nodes[s] = Node(s, f"S{s[1]}", edges=[Edge(leaves[j], 1.0), Edge(leaves[j + 3], 0.5)])
+        nodes[(400, i)] = Node((400, i), f"F{i}", produced=bool(i % 2),
+                               edges=[Edge(s, 1.0) for s in semis] + [Edge(leaves[5], 1.0)])
+    start = date(2025, 1, 6)
+    demands = [Demand((start + timedelta(days=k), 400, i), (400, i), 1.0)
+               for i in range(n_finals) for k in range(days_per_final)]
+    return Graph(nodes=nodes, demands=demands)
+
+
+def _reference(g):
+    """Bez memo: vyhodnocení per požadavek (původní chování)."""
+    semis, pack = set(), set()
+    for d in g.demands:
+        final = g.nodes[d.node]
+        for e in final.edges:
+            if e.child[0] == 300 and rd._all_descendant_leaves_bought(g, e.child):
+                semis.add((d.key[0], 300, e.child[1]))
+        if final.produced and all(g.nodes[e.child].bought for e in final.edges if not g.nodes[e.child].edges):
+            pack.add(d.key)
+    return semis, pack
+
+
+def test_memo_reuses_results_until_state_changes(monkeypatch):
+    g = _plan_graph()
+    calls = {"n": 0}
+    orig = rd.is_semi_ready
+
+    def counting(graph, nid):
+        calls["n"] += 1
+        return orig(graph, nid)
+
+    monkeypatch.setattr(rd, "is_semi_ready", counting)
+
+    ref = _reference(g)
+    got = (compute_ready_semis_under_finals(g), compute_ready_pack(g))
+
+    assert got == ref
+    assert calls["n"] == 40 * 3                      # jednou per (finál, polotovar), ne per den
+    compute_ready_semis_under_finals(g)
+    assert calls["n"] == 40 * 3                      # stejná verze stavů → celé z memo
+
+    # změna stavu listu = nová verze, výsledky se přepočítají
+    g.nodes[(100, 0)].bought = True
+    note_bought(g, (100, 0), True)
+    assert (compute_ready_semis_under_finals(g), compute_ready_pack(g)) == _reference(g)
+    assert calls["n"] == 2 * 40 * 3
@@ -19,3 +19,26 @@ def test_group_buy_map_collects_all_indices():
             found = True
             break
     assert found, "Skupina (11,X1) nemá všechny zdrojové indexy {0,1}"
+
+
+def test_mark_bought_touches_only_selected_rows_and_goes_through_graph_store(monkeypatch):
+    df = pd.DataFrame([
+        {"datum": "2025-03-01", "ingredience_sk": "11", "ingredience_rc": "1", "koupeno": False},
+        {"datum": "2025-03-02", "ingredience_sk": "11", "ingredience_rc": "1", "koupeno": False},
+        {"datum": "2025-03-03", "ingredience_sk": "12", "ingredience_rc": "9", "koupeno": False},
+    ])
+    calls = []
+    monkeypatch.setattr(rw.graph_store, "set_ingredients_bought_many",
+                        lambda keys, bought=True, export=None: calls.append((list(keys), export)))
+    # žádný přímý zápis ani re-read sešitu na klik
+    monkeypatch.setattr(pd.DataFrame, "to_excel", lambda *a, **k: (_ for _ in ()).throw(AssertionError("to_excel")))
+    monkeypatch.setattr(pd, "read_excel", lambda *a, **k: (_ for _ in ()).throw(AssertionError("read_excel")))
+
+    out = rw._mark_bought(df, "koupeno", [0, 2, 99], "excel")
+    assert out is df and df["koupeno"].tolist() == [True, False, True]
+    (keys, export), = calls
+    assert keys == [("2025-03-01", "11", "1"), ("2025-03-03", "12", "9")]
+    assert export is not df and export["koupeno"].tolist() == [True, False, True]
+
+    rw._mark_bought(df, "koupeno", [1], "cache")
+    assert calls[-1] == ([("2025-03-02", "11", "1")], None)
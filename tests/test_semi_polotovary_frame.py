@@ -0,0 +1,79 @@
+# tests/test_semi_polotovary_frame.py
+from datetime import date, timedelta
+
+import pandas as pd
+
+import services.semi_excel_service as ses
+from services.xlsx_stream import cell_value, frame_rows
+
+
+def _rows_iterrows(df_pre, df_det):
+    """Původní skládání listu „Polotovary“ po řádcích (reference)."""
+    det_map = {}
+    if not df_det.empty:
+        for _, r in df_det.iterrows():
+            det_map.setdefault((r.get("datum", ""), r.get("polotovar_rc", "")), []).append(r)
+    for _, r in df_pre.iterrows():
+        dt, rc = r.get("datum", ""), r.get("polotovar_rc", "")
+        nm = r.get("polotovar_nazev", "") or r.get("nazev", "")
+        children = det_map.get((dt, rc), []) or []
+        yield [dt, r.get("polotovar_sk", ""), rc, nm, r.get("potreba", ""), r.get("jednotka", ""),
+               bool(r.get("vyrobeno", False)), "(obsahuje rozpad)" if children else ""]
+        for det in children:
+            yield ["", "", det.get("vyrobek_rc", ""), f"↳ {det.get('vyrobek_nazev', '')}".strip(),
+                   det.get("mnozstvi", ""), det.get("jednotka", ""), None, None]
+
+
+def _expected(df_pre, df_det):
+    return [[cell_value(v) for v in row] for row in _rows_iterrows(df_pre, df_det)]
+
+
+def _frames():
+    d1, d2 = date(2025, 6, 2), date(2025, 6, 3)
+    pre = pd.DataFrame([
+        {"datum": d1, "polotovar_sk": "300", "polotovar_rc": "88", "polotovar_nazev": "A", "nazev": "x",
+         "potreba": 10.0, "jednotka": "kg", "vyrobeno": False},
+        {"datum": d2, "polotovar_sk": "300", "polotovar_rc": "88", "polotovar_nazev": "", "nazev": "Záloha",
+         "potreba": 5.0, "jednotka": "kg", "vyrobeno": True},
+        {"datum": d1, "polotovar_sk": "300", "polotovar_rc": "88", "polotovar_nazev": "A (duplicita)", "nazev": "",
+         "potreba": 1.0, "jednotka": "kg", "vyrobeno": 0},
+        {"datum": pd.NaT, "polotovar_sk": "301", "polotovar_rc": "90", "polotovar_nazev": "Bez data", "nazev": "",
+         "potreba": 2.0, "jednotka": "ks", "vyrobeno": "ano"},
+        {"datum": d2, "polotovar_sk": "302", "polotovar_rc": "91", "polotovar_nazev": "Bez rozpadu", "nazev": "",
+         "potreba": 3.0, "jednotka": "kg", "vyrobeno": False},
+    ], index=[10, 3, 7, 1, 0])                      # index nemá vliv na pořadí
+    det = pd.DataFrame([
+        {"datum": d1, "polotovar_rc": "88", "vyrobek_rc": "2", "vyrobek_nazev": "Y", "mnozstvi": 4.0, "jednotka": "kg"},
+        {"datum": d2, "polotovar_rc": "88", "vyrobek_rc": "1", "vyrobek_nazev": "X ", "mnozstvi": 3.0, "jednotka": "kg"},
+        {"datum": d1, "polotovar_rc": "88", "vyrobek_rc": "1", "vyrobek_nazev": "X", "mnozstvi": 6.0, "jednotka": "kg"},
+        {"datum": pd.NaT, "polotovar_rc": "90", "vyrobek_rc": "5", "vyrobek_nazev": "", "mnozstvi": 2.0, "jednotka": "ks"},
+        {"datum": d2, "polotovar_rc": "99", "vyrobek_rc": "7", "vyrobek_nazev": "Sirotek", "mnozstvi": 1.0, "jednotka": "kg"},
+    ], index=[4, 2, 9, 8, 5])
+    return pre, det
+
+
+def test_frame_matches_row_by_row_builder():
+    pre, det = _frames()
+    got = list(frame_rows(ses._polotovary_frame(pre, det)))
+    assert got == _expected(pre, det)
+    # duplicitní master dostane stejné děti, sirotek bez masteru se nevypíše
+    assert [r[3] for r in got].count("↳ Y") == 2 and "↳ Sirotek" not in [r[3] for r in got]
+
+
+def test_frame_without_details_or_masters():
+    pre, det = _frames()
+    for d in (None, det.iloc[:0]):
+        got = list(frame_rows(ses._polotovary_frame(pre, d)))
+        assert got == _expected(pre, pd.DataFrame())
+        assert all(r[7] == "" for r in got)
+    assert list(frame_rows(ses._polotovary_frame(pre.iloc[:0], det))) == []
+
+
+def test_frame_matches_iterrows_on_large_plan():
+    days = [date(2025, 1, 6) + timedelta(days=i % 20) for i in range(4_000)]
+    pre = ses._normalize_main(pd.DataFrame({
+        "datum": days, "polotovar_sk": "300", "polotovar_rc": [str(i // 20) for i in range(4_000)],
+        "polotovar_nazev": "P", "potreba": 1.0, "jednotka": "kg", "vyrobeno": False}))
+    det = ses._normalize_det(pre.loc[pre.index.repeat(2)].assign(vyrobek_rc="1", vyrobek_nazev="V", mnozstvi=0.5))
+
+    assert list(frame_rows(ses._polotovary_frame(pre, det))) == _expected(pre, det)
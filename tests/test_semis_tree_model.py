@@ -0,0 +1,78 @@
+# tests/test_semis_tree_model.py
+import os
+from datetime import date
+import pandas as pd
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+
+from gui.models.semis_tree_model import SELECT_COL, SemisTreeModel
+import gui.results_semis_window as rsw
+
+
+def _df_main():
+    return pd.DataFrame([
+        {"datum": date(2025, 5, 13), "polotovar_sk": 300, "polotovar_rc": 10, "polotovar_nazev": "Uzený", "potreba": 2, "jednotka": "kg", "vyrobeno": False},
+        {"datum": date(2025, 5, 12), "polotovar_sk": 300, "polotovar_rc": 10, "polotovar_nazev": "Uzený", "potreba": 3, "jednotka": "kg", "vyrobeno": False},
+        {"datum": date(2025, 5, 12), "polotovar_sk": 300, "polotovar_rc": 11, "polotovar_nazev": "Šunka", "potreba": 1, "jednotka": "kg", "vyrobeno": True},
+        {"datum": date(2025, 5, 20), "polotovar_sk": 300, "polotovar_rc": 11, "polotovar_nazev": "Šunka", "potreba": 4, "jednotka": "kg", "vyrobeno": False},
+    ])
+
+
+def _detail_map():
+    det = {"vyrobek_sk": 400, "vyrobek_rc": 77, "vyrobek_nazev": "Hotový", "mnozstvi": 2.5, "jednotka": "kg"}
+    return {
+        ("300", "10", date(2025, 5, 12)): [det, {**det, "vyrobek_rc": 78}],
+        ("300", "10", date(2025, 5, 13)): [det],
+    }
+
+
+def test_plan_rows_match_widget_layout():
+    # strom i widgetový layout staví ze stejných řádků (stejné zdrojové indexy)
+    for weekly in (False, True):
+        plan = rsw._plan_rows(_df_main(), "vyrobeno", weekly)
+        _, buy_map, _ = rsw._build_rows(_df_main(), _detail_map(), "vyrobeno", False, weekly)
+        assert [p.src for p in plan] == list(buy_map.values())
+
+
+def test_details_are_materialized_only_on_fetch():
+    m = SemisTreeModel(rsw._plan_rows(_df_main(), "vyrobeno", False), _detail_map())
+    assert m.rowCount() == 3
+    first = m.index(0, 0)
+    assert m.data(first) == "12.05.2025"
+
+    # před rozbalením: má potomky, ale žádné nejsou vytvořené
+    assert m.hasChildren(first) and m.canFetchMore(first)
+    assert m.rowCount(first) == 0
+    assert all(r.children is None for r in m._rows)
+    assert not m.hasChildren(m.index(2, 0))          # Šunka nemá detaily
+
+    m.fetchMore(first)
+    assert m.rowCount(first) == 2 and not m.canFetchMore(first)
+    child = m.index(1, 2, first)
+    assert m.data(child) == "↳ Hotový"
+    assert m.data(m.index(1, 1, first)) == "78"
+    assert m.parent(child).row() == 0
+    assert m._rows[1].children is None               # ostatní řádky pořád líné
+
+
+def test_weekly_regroup_and_selection():
+    m = SemisTreeModel(rsw._plan_rows(_df_main(), "vyrobeno", False), _detail_map())
+    m.setData(m.index(0, SELECT_COL), Qt.Checked, Qt.CheckStateRole)
+    assert m.selected_indices() == [1]
+
+    resets = []
+    m.modelReset.connect(lambda: resets.append(1))
+    m.set_rows(rsw._plan_rows(_df_main(), "vyrobeno", True))
+    assert resets == [1]
+    assert m.rowCount() == 2
+    assert m.selected_indices() == []                 # přeskupení ruší výběr
+
+    # týdenní skupina Uzený (12. + 13. 5.) má detaily obou dnů
+    uzeny = m.index(0, 0)
+    m.fetchMore(uzeny)
+    assert m.rowCount(uzeny) == 3
+    m.set_checked([0])
+    assert m.selected_indices() == [0, 1]
+    assert m.data(m.index(0, 3)) == "5,00"
@@ -0,0 +1,69 @@
+# tests/test_semis_weekly_groups.py
+from datetime import date, timedelta
+
+import pandas as pd
+
+import gui.results_semis_window as rsw
+
+
+def _plan(n_rows: int, n_semis: int = 120) -> pd.DataFrame:
+    start = date(2025, 1, 6)
+    return pd.DataFrame({
+        "datum": [start + timedelta(days=i % 84) for i in range(n_rows)],
+        "polotovar_sk": ["300"] * n_rows,
+        "polotovar_rc": [str(i % n_semis) for i in range(n_rows)],
+        "polotovar_nazev": [f"Polotovar {i % n_semis}" for i in range(n_rows)],
+        "potreba": [1.0 + (i % 5) for i in range(n_rows)],
+        "jednotka": ["kg"] * n_rows,
+        "vyrobeno": [i % 10 == 0 for i in range(n_rows)],
+    })
+
+
+def _mask_reference(df_main, col_k):
+    # původní postup: pro každou skupinu maska přes celý zdroj (O(skupiny × řádky))
+    d_src = rsw._filter_unmade(df_main.copy(), col_k)
+    for c in ["polotovar_sk", "polotovar_rc", "polotovar_nazev", "jednotka"]:
+        d_src[c] = d_src[c].fillna("").astype(str).str.strip()
+    rsw.to_date_col(d_src, "datum")
+    d_src["_dt"] = pd.to_datetime(d_src["datum"], errors="coerce")
+    d_src["_week_start"] = (d_src["_dt"] - pd.to_timedelta(d_src["_dt"].dt.weekday, unit="D")).dt.normalize()
+
+    out = []
+    for _, r in rsw._aggregate_weekly(df_main, col_k).iterrows():
+        mask = (
+            (d_src["_week_start"] == r["_week_start"])
+            & (d_src["polotovar_sk"] == r["polotovar_sk"])
+            & (d_src["polotovar_rc"] == r["polotovar_rc"])
+            & (d_src["polotovar_nazev"] == r["polotovar_nazev"])
+            & (d_src["jednotka"] == r["jednotka"])
+        )
+        out.append(list(d_src.loc[mask].index.astype(int)))
+    return out
+
+
+def test_weekly_groups_map_sources_like_mask_reference():
+    df = _plan(600, n_semis=30)
+
+    ref = _mask_reference(df, "vyrobeno")
+    g, src = rsw._weekly_groups(df, "vyrobeno")
+
+    assert [list(map(int, s)) for s in src] == ref
+    # součty skupin odpovídají zdrojovým řádkům
+    pot = pd.to_numeric(df["potreba"])
+    assert [float(pot.loc[s].sum()) for s in src] == g["potreba"].tolist()
+
+
+def test_ready_flags_evaluate_each_semi_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(rsw, "_runtime_graph", lambda: type("G", (), {"nodes": {1: None}})())
+    monkeypatch.setattr(rsw, "is_semi_ready", lambda g, nid: calls.append(nid) or nid[1] % 2 == 0)
+
+    rows = rsw._plan_rows(_plan(2_000, n_semis=40), "vyrobeno", weekly_sum=True)
+
+    # jednou na unikátní (SK, RC), ne na každou týdenní skupinu
+    assert len(calls) == len({r.main["polotovar_rc"] for r in rows}) < len(rows)
+    assert all(r.ready == (int(r.main["polotovar_rc"]) % 2 == 0) for r in rows)
+    # detaily skupiny jdou podle data
+    for r in rows[:20]:
+        days = [k[2] for k in r.detail_keys]
+        assert days == sorted(days)
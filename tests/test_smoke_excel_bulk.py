@@ -0,0 +1,104 @@
+# tests/test_smoke_excel_bulk.py
+from datetime import date, timedelta
+
+import pandas as pd
+from openpyxl import load_workbook
+
+import services.smoke_excel_service as xs
+from services.smoke_capacity import CapacityRules
+from services.smoke_plan_service import CapacityAwarePrefillStrategy, Item, SmokePlan
+from tests._smoke_test_utils import create_smoke_template
+
+START = date(2025, 9, 15)
+
+
+def _week(w: int) -> pd.DataFrame:
+    monday = START + timedelta(weeks=w)
+    plan = SmokePlan(monday, capacity_rules=CapacityRules())
+    items = [Item(f"W{w}P{i}", f"Týden {w} / {i}", mnozstvi=40.0 + 17 * i + w, jednotka="kg")
+             for i in range(10 + 5 * (w % 4))]
+    CapacityAwarePrefillStrategy(CapacityRules()).run(plan, items)
+    return plan.to_dataframe()
+
+
+def _cells(ws):
+    return [[c.value for c in row] for row in ws.iter_rows()]
+
+
+def test_quarter_export_matches_single_writes(tmp_path, monkeypatch):
+    tpl = str(create_smoke_template(tmp_path / "tpl.xlsx"))
+    weeks = [(START + timedelta(weeks=w), _week(w)) for w in range(13)]
+
+    loads = []
+    real_load = xs.load_workbook
+    monkeypatch.setattr(xs, "load_workbook", lambda *a, **k: loads.append(1) or real_load(*a, **k))
+
+    jobs = [(m, df, str(tmp_path / f"bulk_{m:%Y_%m_%d}.xlsx")) for m, df in weeks]
+    exports = xs.write_smoke_plans_excel(jobs, template_path=tpl)
+    assert len(loads) == 1                                   # šablona jen jednou
+    assert [e.week_monday for e in exports] == [m for m, _ in weeks]
+    assert all(e.seconds > 0 for e in exports)
+
+    for m, df in weeks:
+        xs.write_smoke_plan_excel(str(tmp_path / f"one_{m:%Y_%m_%d}.xlsx"), df, m, template_path=tpl)
+
+    # týdny se přepisují do téhož listu – nic z předchozího týdne nesmí zůstat
+    for m, _ in weeks:
+        a = load_workbook(tmp_path / f"bulk_{m:%Y_%m_%d}.xlsx").active
+        b = load_workbook(tmp_path / f"one_{m:%Y_%m_%d}.xlsx").active
+        assert _cells(a) == _cells(b)
+
+
+def test_parallel_export_keeps_order(tmp_path):
+    tpl = str(create_smoke_template(tmp_path / "tpl.xlsx"))
+    weeks = [(START + timedelta(weeks=w), _week(w)) for w in range(5)]
+    jobs = [(m, df, str(tmp_path / f"par_{m:%Y_%m_%d}.xlsx")) for m, df in weeks]
+
+    exports = xs.write_smoke_plans_excel(jobs, template_path=tpl, workers=2)
+
+    assert [e.path for e in exports] == [p for _, _, p in jobs]
+    for (m, df, p) in jobs:
+        xs.write_smoke_plan_excel(str(tmp_path / "ref.xlsx"), df, m, template_path=tpl)
+        assert _cells(load_workbook(p).active) == _cells(load_workbook(tmp_path / "ref.xlsx").active)
+
+
+def test_multi_sheet_workbook(tmp_path):
+    tpl = str(create_smoke_template(tmp_path / "tpl.xlsx"))
+    weeks = [(START + timedelta(weeks=w), _week(w)) for w in range(3)]
+
+    out = tmp_path / "ctvrtleti.xlsx"
+    exports = xs.write_smoke_plans_workbook(str(out), weeks, template_path=tpl)
+
+    wb = load_workbook(out)
+    assert wb.sheetnames == ["2025-09-15", "2025-09-22", "2025-09-29"]
+    assert len(exports) == 3 and all(e.path == str(out) for e in exports)
+    for (m, df), ws in zip(weeks, wb.worksheets):
+        xs.write_smoke_plan_excel(str(tmp_path / "ref.xlsx"), df, m, template_path=tpl)
+        assert _cells(ws) == _cells(load_workbook(tmp_path / "ref.xlsx").active)
+
+
+def test_results_follow_jobs_with_duplicate_paths_and_resolved_monday(tmp_path):
+    tpl = str(create_smoke_template(tmp_path / "tpl.xlsx"))
+    same = str(tmp_path / "tyden.xlsx")
+    jobs = [(START, _week(0), same), (None, _week(1), same), (START + timedelta(weeks=2), _week(2), same)]
+
+    exports = xs.write_smoke_plans_excel(jobs, template_path=tpl, workers=2)
+
+    # pondělí bez zadání se dopočítá z plánu; výsledky jdou podle pořadí jobů, ne podle cesty
+    assert [e.week_monday for e in exports] == [START + timedelta(weeks=w) for w in range(3)]
+    assert [e.path for e in exports] == [same] * 3
+
+
+def test_pool_failure_falls_back_to_serial(tmp_path, monkeypatch):
+    class _NoPool:
+        def __init__(self, *a, **k):
+            raise OSError("procesy nejdou spustit")
+
+    monkeypatch.setattr(xs, "ProcessPoolExecutor", _NoPool)
+    tpl = str(create_smoke_template(tmp_path / "tpl.xlsx"))
+    jobs = [(START + timedelta(weeks=w), _week(w), str(tmp_path / f"w{w}.xlsx")) for w in range(3)]
+
+    exports = xs.write_smoke_plans_excel(jobs, template_path=tpl, workers=3)
+
+    assert [e.path for e in exports] == [p for _, _, p in jobs]
+    assert all(load_workbook(p).active.max_row > 1 for _, _, p in jobs)
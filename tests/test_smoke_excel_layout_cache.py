@@ -0,0 +1,70 @@
+# tests/test_smoke_excel_layout_cache.py
+from datetime import date, timedelta
+
+import pandas as pd
+from openpyxl import load_workbook
+
+import services.smoke_excel_service as xs
+from tests._smoke_test_utils import create_smoke_template
+
+WEEK = date(2025, 9, 15)
+
+
+def _plan():
+    rows = []
+    for d in range(6):
+        for s in range(1, 5):
+            for p in range(1, 8):
+                if (d + s + p) % 3 == 0:
+                    rows.append({"datum": WEEK + timedelta(days=d), "udirna": s, "pozice": p,
+                                 "polotovar_nazev": f"P{d}{s}{p}", "mnozstvi": 10 * p, "jednotka": "kg"})
+    return pd.DataFrame(rows)
+
+
+def _read(path, hdr_rows, smokers=4):
+    ws = load_workbook(path).worksheets[0]
+    out = {}
+    for d, hdr in enumerate(hdr_rows):
+        for s in range(1, smokers + 1):
+            for p in range(1, 8):
+                v = ws.cell(hdr + p, 2 + (s - 1) * xs.BLOCK_COLS).value
+                if v:
+                    out[(d, s, p)] = (v, ws.cell(hdr + p, 3 + (s - 1) * xs.BLOCK_COLS).value)
+    return out
+
+
+def test_layout_detected_once_per_template_content(tmp_path, monkeypatch):
+    tpl = create_smoke_template(tmp_path / "tpl.xlsx")
+    monkeypatch.setattr(xs, "_LAYOUTS", {})            # cache je globální (jiné testy mají stejnou šablonu)
+    calls = []
+    real = xs._detect_layout
+    monkeypatch.setattr(xs, "_detect_layout", lambda ws: calls.append(1) or real(ws))
+
+    for i in range(3):
+        xs.write_smoke_plan_excel(str(tmp_path / f"o{i}.xlsx"), _plan(), WEEK, template_path=str(tpl))
+    assert len(calls) == 1
+
+    # jiná šablona (3 udírny) = jiný hash → nová detekce
+    create_smoke_template(tpl, smokers=3)
+    xs.write_smoke_plan_excel(str(tmp_path / "o3.xlsx"), _plan(), WEEK, template_path=str(tpl))
+    assert len(calls) == 2
+    assert all(s <= 3 for (_, s, _) in _read(tmp_path / "o3.xlsx", [6 + d * 17 for d in range(6)], smokers=4))
+
+
+def test_single_pass_writes_every_slot_and_clears_the_rest(tmp_path):
+    tpl = create_smoke_template(tmp_path / "tpl.xlsx")
+    wb = load_workbook(tpl)
+    ws = wb.active
+    ws.cell(6 + 2, 2).value = "stará hodnota"          # Po / U1 / poz. 2 – v plánu prázdné
+    ws.merge_cells(start_row=6 + 3, start_column=7, end_row=6 + 4, end_column=7)   # U2 / poz. 3–4
+    wb.save(tpl)
+
+    plan = _plan()
+    dup = plan.iloc[[0]].assign(polotovar_nazev="DUPLICITA")
+    xs.write_smoke_plan_excel(str(tmp_path / "out.xlsx"), pd.concat([plan, dup]), WEEK, template_path=str(tpl))
+
+    got = _read(tmp_path / "out.xlsx", [6 + d * 17 for d in range(6)])
+    expected = {(d, s, p): (f"P{d}{s}{p}", f"{10 * p} kg") for d in range(6) for s in range(1, 5)
+                for p in range(1, 8) if (d + s + p) % 3 == 0}
+    expected.pop((0, 2, 4))                              # uvnitř sloučené buňky se nepíše
+    assert got == expected
@@ -0,0 +1,97 @@
+# tests/test_smoke_horizon.py
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from services import smoke_orchestrator as smo
+from services.smoke_capacity import CapacityRules
+from tests._smoke_test_utils import create_smoke_template, open_xlsx
+
+MONDAY = date(2025, 9, 15)
+
+
+def _semis(rows):
+    # tvar jako graph_store.get_semis_dfs()[0]
+    return pd.DataFrame([
+        {"datum": d, "polotovar_sk": "300", "polotovar_rc": rc, "polotovar_nazev": f"Polotovar {rc}",
+         "potreba": q, "jednotka": "kg", "vyrobeno": done}
+        for d, rc, q, done in rows
+    ])
+
+
+def _planned(week, rc):
+    df = week.plan_df
+    return float(df.loc[df["polotovar_nazev"] == f"Polotovar {rc}", "mnozstvi"].sum())
+
+
+def test_remainder_carries_to_next_week_by_deadline():
+    rules = CapacityRules(base_per_smoker=[10.0] * 4)          # 168 slotů × 10 kg = 1680 kg / týden
+    semis = _semis([
+        (MONDAY + timedelta(days=2), "2", 1000.0, False),
+        (MONDAY - timedelta(days=3), "1", 1000.0, False),       # po termínu → plánuje se první
+        (MONDAY + timedelta(days=1), "9", 500.0, True),          # vyrobeno → neplánuje se
+        (MONDAY + timedelta(days=8), "3", 100.0, False),
+        (MONDAY + timedelta(days=30), "4", 50.0, False),         # za horizontem
+    ])
+
+    weeks = smo.plan_horizon(semis, weeks=2, start_monday=MONDAY, rules=rules, save=False)
+
+    w1, w2 = weeks
+    assert [w.week_monday for w in weeks] == [MONDAY, MONDAY + timedelta(days=7)]
+    assert _planned(w1, 1) == pytest.approx(1000.0)
+    assert _planned(w1, 2) == pytest.approx(680.0)
+    assert _planned(w1, 9) == 0.0 and _planned(w1, 3) == 0.0
+
+    # zbytek 320 kg přechází (termín uplynul) a má přednost před položkou týdne 2
+    assert [(p.item.polotovar_nazev, p.remaining) for p in w1.carried] == [("Polotovar 2", pytest.approx(320.0))]
+    assert len(w1.overdue) == 1
+    assert _planned(w2, 2) == pytest.approx(320.0)
+    assert _planned(w2, 3) == pytest.approx(100.0)
+    assert _planned(w2, 4) == 0.0 and w2.carried == []
+    # položka za horizontem se vrací, neztratí se
+    assert w1.beyond_horizon == []
+    assert [(p.item.polotovar_nazev, p.remaining) for p in w2.beyond_horizon] == [("Polotovar 4", 50.0)]
+    first = w2.plan_df.dropna(subset=["polotovar_id"]).iloc[0]
+    assert first["polotovar_nazev"] == "Polotovar 2"
+
+
+def test_items_without_quantity_are_tracked_one_by_one():
+    rules = CapacityRules(base_per_smoker=[10.0] * 4)
+    semis = _semis([
+        (MONDAY - timedelta(days=1), "1", 1670.0, False),        # 167 ze 168 slotů
+        (MONDAY, "5", None, False),                               # poslední volný slot
+        (MONDAY + timedelta(days=1), "5", None, False),           # stejné base ID, už se nevejde
+    ])
+
+    w1, w2 = smo.plan_horizon(semis, weeks=2, start_monday=MONDAY, rules=rules, save=False)
+
+    assert [(p.item.polotovar_nazev, p.due) for p in w1.carried] == [("Polotovar 5", MONDAY + timedelta(days=1))]
+    assert w2.carried == [] and w2.beyond_horizon == []
+
+
+def test_writes_one_file_per_week(monkeypatch, tmp_path):
+    template = create_smoke_template(tmp_path / "tpl.xlsx")
+    out_dir = tmp_path / "plan uzeni"
+    out_dir.mkdir()
+    monkeypatch.setattr(smo, "smoke_template_path", lambda: template)
+    monkeypatch.setattr(smo, "smoke_plan_excel_path", lambda m: out_dir / f"plan_uzeni_{m:%Y_%m_%d}.xlsx")
+
+    semis = _semis([(MONDAY + timedelta(days=7 * w), str(w), 5.0, False) for w in range(3)])
+    weeks = smo.plan_horizon(semis, weeks=3, start_monday=MONDAY)
+
+    names = [Path(w.path).name for w in weeks]
+    assert names == ["plan_uzeni_2025_09_15.xlsx", "plan_uzeni_2025_09_22.xlsx", "plan_uzeni_2025_09_29.xlsx"]
+    ws = open_xlsx(out_dir / names[1]).active
+    assert any("Pondělí 22.09.2025" in str(ws.cell(r, 1).value or "") for r in range(1, 120))
+
+
+def test_eight_week_horizon_with_large_backlog():
+    rows = [(MONDAY + timedelta(days=i % 56), str(i % 150), 40.0 + i % 300, i % 7 == 0) for i in range(3000)]
+    semis = _semis(rows)
+
+    weeks = smo.plan_horizon(semis, weeks=8, start_monday=MONDAY, save=False)
+
+    assert len(weeks) == 8
+    assert all(len(w.plan_df) == 6 * 4 * 7 for w in weeks)
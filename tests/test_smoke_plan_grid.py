@@ -0,0 +1,97 @@
+# tests/test_smoke_plan_grid.py
+import random
+from datetime import timedelta
+
+import pandas as pd
+
+from services.smoke_capacity import CapacityRules
+from services.smoke_plan_service import (
+    CZECH_WEEKDAYS,
+    CapacityAwarePrefillStrategy,
+    Item,
+    Slot,
+    SmokePlan,
+    dataframe_to_items,
+    next_monday,
+)
+
+WEEK = next_monday(pd.Timestamp("2025-09-03").date())
+
+
+def _records_reference(plan: SmokePlan) -> pd.DataFrame:
+    # původní výstup: slovník per slot -> DataFrame.from_records
+    rows = []
+    for day in range(plan.days):
+        for smoker in range(plan.smokers):
+            for row in range(plan.rows_per_smoker):
+                item = plan.item_at(Slot(day, smoker, row))
+                rec = {"datum": WEEK + timedelta(days=day), "den": CZECH_WEEKDAYS[day],
+                       "udirna": smoker + 1, "pozice": row + 1}
+                for attr in ("polotovar_id", "polotovar_id_base", "polotovar_nazev", "mnozstvi",
+                             "jednotka", "poznamka", "meat_type", "part_index"):
+                    rec[attr] = getattr(item, attr, None) if item else None
+                rows.append(rec)
+    return pd.DataFrame.from_records(rows)
+
+
+def _scan_reference(plan: SmokePlan, d: int, s: int, r: int):
+    # původní lineární průchod od kurzoru (smoker -> row -> day, s přetočením)
+    free = plan.free_mask()
+    for _ in range(plan.total_slots):
+        if free[d, s, r]:
+            return Slot(d, s, r)
+        s += 1
+        if s >= plan.smokers:
+            s, r = 0, r + 1
+            if r >= plan.rows_per_smoker:
+                r, d = 0, (d + 1) % plan.days
+    return None
+
+
+def test_dataframe_matches_record_reference():
+    rules = CapacityRules(base_per_smoker=[400, 300, 400, 400])
+    items = dataframe_to_items(pd.DataFrame([
+        {"polotovar_nazev": "A", "mnozstvi": 1000, "jednotka": "kg", "meat_type": "veprove"},
+        {"polotovar_nazev": "B", "mnozstvi": None, "jednotka": "ks"},
+    ]))
+
+    empty = SmokePlan(WEEK, capacity_rules=rules)
+    pd.testing.assert_frame_equal(empty.to_dataframe(), _records_reference(empty))
+
+    plan = SmokePlan(WEEK, capacity_rules=rules)
+    CapacityAwarePrefillStrategy(rules).run(plan, items)
+    out = plan.to_dataframe()
+    pd.testing.assert_frame_equal(out, _records_reference(plan))
+    assert plan.to_records()[0]["polotovar_nazev"] == "A"
+    assert out["polotovar_id"].notna().sum() == 4
+
+
+def test_next_free_slot_matches_linear_scan():
+    rnd = random.Random(7)
+    plan = SmokePlan(WEEK, smokers=3, rows_per_smoker=5)
+    coords = [(d, s, r) for d in range(plan.days) for s in range(3) for r in range(5)]
+    rnd.shuffle(coords)
+
+    for n, (d, s, r) in enumerate(coords):
+        assert plan.place(Item(polotovar_id_base=str(n), polotovar_nazev="x"), Slot(d, s, r))
+        assert not plan.place(Item(polotovar_id_base="dup", polotovar_nazev="x"), Slot(d, s, r))
+        for cursor in rnd.sample(coords, 5):
+            assert plan.next_free_slot(*cursor) == _scan_reference(plan, *cursor)
+        assert len(plan.free_slots(d, s)) == int(plan.free_mask()[d, s].sum())
+
+    assert plan.next_free_slot() is None
+
+
+def test_prefill_large_grid():
+    # větší konfigurace (40 udíren × 50 řádků) – dřív lineární průchod od kurzoru pro každou část
+    rules = CapacityRules(base_per_smoker=[100] * 40)
+    items = [Item(polotovar_id_base=f"P{i}", polotovar_nazev=f"P{i}", mnozstvi=250.0, meat_type="veprove")
+             for i in range(4000)]   # 4000 × 3 části = 12000 slotů
+    plan = SmokePlan(WEEK, smokers=40, rows_per_smoker=50, capacity_rules=rules)
+
+    CapacityAwarePrefillStrategy(rules).run(plan, items)
+    out = plan.to_dataframe()
+
+    assert len(out) == plan.total_slots == 12_000
+    assert out["polotovar_id"].notna().all()               # mřížka je plná
+    assert plan.next_free_slot() is None
@@ -0,0 +1,76 @@
+# tests/test_smoke_plan_index.py
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from controllers.smoke_plan_controller import SmokePlanController
+from gui.models.smoke_plan_model import SmokePlanModel
+from services.smoke_plan_service import plan_slot_index
+
+MONDAY = date(2025, 5, 12)
+
+
+def _items():
+    return pd.DataFrame([
+        {"polotovar_id": f"P{i}", "polotovar_nazev": f"Polotovar {i}", "mnozstvi": 10.0 + i, "jednotka": "kg"}
+        for i in range(12)
+    ])
+
+
+def _mask_row(df, coord):
+    # původní hledání: maska přes celý plán
+    d, s, r = coord
+    day = (pd.Timestamp(MONDAY) + pd.Timedelta(days=d)).date()
+    m = (pd.to_datetime(df["datum"]).dt.date == day) & (df["udirna"] == s + 1) & (df["pozice"] == r + 1)
+    idx = df[m].index
+    return int(idx[0]) if len(idx) else None
+
+
+def test_slot_index_matches_mask_lookup():
+    ctrl = SmokePlanController(week_monday=MONDAY)
+    plan = ctrl.prefill(_items())
+    assert len(plan) == 6 * 4 * 7
+
+    idx = plan_slot_index(plan, MONDAY)
+    for coord in [(d, s, r) for d in range(7) for s in range(5) for r in range(8)]:
+        assert idx.get(coord) == _mask_row(plan, coord)
+
+
+def test_edits_do_not_rescan_plan(monkeypatch):
+    ctrl = SmokePlanController(week_monday=MONDAY)
+    ctrl.prefill(_items())
+    model = SmokePlanModel(MONDAY)
+    model.load_from_df(ctrl.plan_df())
+
+    # po načtení už úpravy nesmí převádět datum (tj. skenovat celý DF)
+    def _boom(*a, **k):
+        raise AssertionError("úprava slotu přepočítává datum přes celý plán")
+    monkeypatch.setattr(pd, "to_datetime", _boom)
+
+    for target in (ctrl, model):
+        target.apply_move((0, 0, 0), (5, 3, 6))
+        target.set_note((5, 3, 6), "pozor")
+        target.set_dose((1, 2, 3), 4.5, "kg")
+        target.set_note((9, 9, 9), "mimo mřížku")   # neexistující slot se tiše ignoruje
+    monkeypatch.undo()
+
+    for df in (ctrl.plan_df(), model.to_dataframe()):
+        moved = df.loc[_mask_row(df, (5, 3, 6))]
+        assert moved["polotovar_id_base"] == "P0" and moved["poznamka"] == "pozor"
+        assert pd.isna(df.loc[_mask_row(df, (0, 0, 0)), "polotovar_id"])   # cílový slot byl prázdný
+        assert df.loc[_mask_row(df, (1, 2, 3)), "mnozstvi"] == pytest.approx(4.5)
+
+    assert model.cell_payload((5, 3, 6))["nazev"] == "Polotovar 0"
+    assert model.cell_payload((9, 9, 9)) == {}
+
+
+def test_load_plan_rebuilds_index():
+    ctrl = SmokePlanController(week_monday=MONDAY)
+    plan = ctrl.prefill(_items())
+    shifted = plan.sample(frac=1.0, random_state=1).reset_index(drop=True)
+    ctrl.load_plan(shifted)
+    ctrl.set_note((2, 1, 4), "x")
+    out = ctrl.plan_df()
+    assert out.loc[_mask_row(out, (2, 1, 4)), "poznamka"] == "x"
+    assert (out["poznamka"] == "x").sum() == 1
@@ -0,0 +1,68 @@
+# tests/test_smoke_scenarios.py
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+import pytest
+
+from services.smoke_scenarios import COLUMNS, Scenario, capacity_variants, run_scenarios
+
+
+@dataclass
+class _It:
+    rc: str
+    sk: str
+    name: str
+    qty: float
+    unit: str
+    source_id: str = ""
+    meat_type: Optional[str] = None
+
+
+def _items(n=60):
+    out = [_It(str(i), "300", f"Polotovar {i}", 80.0 + (i * 37) % 900, "kg") for i in range(n)]
+    out.append(_It("999", "300", "Biltong", 120.0, "kg"))
+    return out
+
+
+def test_parallel_matches_serial_and_more_capacity_helps():
+    scenarios = capacity_variants([400.0, 300.0, 400.0, 400.0], scales=[0.5, 1.0, 2.0], reserved_indices=[4, 3])
+    items = _items()
+
+    par = run_scenarios(scenarios, items, workers=3)
+    ser = run_scenarios(scenarios, items, workers=1)
+
+    assert list(par.columns) == COLUMNS
+    assert par["scenar"].tolist() == [s.name for s in scenarios]
+    pd.testing.assert_frame_equal(par, ser)
+
+    by_res = par.iloc[:3]                                  # vyhrazená #4, kapacita ×0.5 / ×1 / ×2
+    assert by_res["nenaplanovano"].is_monotonic_decreasing
+    assert by_res["deleni"].is_monotonic_decreasing
+    total = sum(it.qty for it in items)
+    assert (par["naplanovano"] + par["nenaplanovano"]).tolist() == pytest.approx([total] * len(par))
+    assert par["vyuziti_slotu"].between(0, 1).all()
+
+
+def test_overrides_and_reserved_smoker():
+    items = [_It("1", "300", "Hovězí", 600.0, "kg", meat_type="hovezi"), _It("2", "300", "Biltong", 50.0, "kg")]
+    scenarios = [
+        Scenario("zakladni", [400.0, 300.0, 400.0, 400.0]),
+        Scenario("hovezi 100", [400.0, 300.0, 400.0, 400.0], per_type_overrides={"hovezi": [100.0] * 4}),
+        Scenario("vyhrazena #1", [400.0, 300.0, 400.0, 400.0], reserved_smoker_index=1),
+    ]
+    out = run_scenarios(scenarios, items, days=1, rows=1, workers=1).set_index("scenar")
+
+    assert out.loc["zakladni", "nenaplanovano"] == 0 and out.loc["zakladni", "deleni"] == 1
+    assert out.loc["hovezi 100", "nenaplanovano"] == pytest.approx(300.0)   # 3 sloty × 100
+    # biltong jde do #1, hovězí 600 do #3 + #4 (400 + 200)
+    assert out.loc["vyhrazena #1", "nenaplanovano"] == 0 and out.loc["vyhrazena #1", "deleni"] == 1
+    assert out.loc["vyhrazena #1", "vyuziti_slotu"] == pytest.approx(3 / 4)
+
+
+def test_dozens_of_scenarios():
+    scenarios = capacity_variants([400.0, 300.0, 400.0, 400.0], scales=[0.25 * k for k in range(1, 13)],
+                                  reserved_indices=[1, 2, 3, 4])
+    out = run_scenarios(scenarios, _items(120))
+
+    assert len(out) == 48
@@ -0,0 +1,122 @@
+# tests/test_smoke_slot_items.py
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import pytest
+
+from services.smoke_engine import build_default_engine
+from services.smoke_rules import (
+    AutoMergePolicy, CapacityByRawRule, SingleProductPerSlotRule, SlotItems, TableCapacity,
+    default_raw_mass_extractor, is_biltong_name, product_key,
+)
+
+
+@dataclass
+class _It:
+    rc: str
+    sk: str
+    name: str
+    qty: float
+    unit: str
+    source_id: str = ""
+    raw_children: Optional[List[dict]] = field(default=None)
+
+
+def _it(rc="1", qty=10.0, raw=None):
+    children = [{"meat_type": "veprove", "raw": raw if raw is not None else qty * 1.2}]
+    return _It(rc, "300", f"Polotovar {rc}", qty, "kg", raw_children=children)
+
+
+def _fresh(items):
+    raw = sum(default_raw_mass_extractor(it)[0] for it in items)
+    keys = {}
+    for it in items:
+        keys[product_key(it)] = keys.get(product_key(it), 0) + 1
+    return raw, keys
+
+
+def test_aggregates_follow_list_changes():
+    slot = SlotItems([_it("1", 5.0)])
+    assert (slot.raw_total(default_raw_mass_extractor), slot.product_keys()) == _fresh(slot)
+
+    slot.append(_it("1", 7.0))
+    slot += [_it("2", 1.0)]
+    assert slot.raw_total(default_raw_mass_extractor) == pytest.approx(_fresh(slot)[0])
+    assert slot.product_keys() == _fresh(slot)[1]
+
+    for change in (lambda s: s.pop(), lambda s: s.insert(0, _it("3", 2.0)), lambda s: s.__delitem__(0),
+                   lambda s: s.__setitem__(slice(None), [_it("4", 3.0)]), lambda s: s.clear()):
+        change(slot)
+        assert slot.raw_total(default_raw_mass_extractor) == pytest.approx(_fresh(slot)[0])
+        assert slot.product_keys() == _fresh(slot)[1]
+
+    # merge policy přepisuje items[:] → agregáty se přepočtou
+    slot.extend([_it("5", 1.0), _it("5", 2.0)])
+    AutoMergePolicy().apply(1, slot)
+    assert len(slot) == 1 and slot.product_keys() == {product_key(slot[0]): 1}
+    assert slot.raw_total(default_raw_mass_extractor) == pytest.approx(_fresh(slot)[0])
+
+
+def test_rules_read_cached_aggregates():
+    calls = []
+
+    def counting(it):
+        calls.append(it)
+        return default_raw_mass_extractor(it)
+
+    cap = TableCapacity(base_per_smoker=[1e9])
+    rule = CapacityByRawRule(capacity=cap, raw_mass_of=counting, is_biltong=is_biltong_name)
+    single = SingleProductPerSlotRule()
+
+    plain = [_it("1", 1.0) for _ in range(300)]
+    slot = SlotItems(plain)
+    incoming = _it("1", 1.0)
+
+    # bez cache: každá kontrola projde celý slot
+    assert [rule.check(incoming, plain, 1, "move").kind, single.check(incoming, plain, 1, "move").kind] == ["OK", "OK"]
+    assert len(calls) >= 300
+
+    rule.check(incoming, slot, 1, "move")          # první dotaz agregáty spočítá
+    calls.clear()
+    for _ in range(50):
+        assert rule.check(incoming, slot, 1, "move").kind == "OK"
+        assert single.check(incoming, slot, 1, "move").kind == "OK"
+    assert len(calls) <= 2 * 50                     # jen příchozí položka, ne obsah slotu
+    assert single.check(_it("2", 1.0), slot, 1, "move").kind == "BLOCK"
+
+
+def test_engine_grids_keep_aggregates_through_moves():
+    eng = build_default_engine(base_per_smoker=[100.0, 100.0, 100.0, 100.0])
+    items = [_it("1", 150.0, raw=150.0), _it("2", 60.0, raw=60.0)]
+    grid = eng.prefill(items, 1, 4, 2)
+    assert all(isinstance(cell, SlotItems) for cell in grid.values())
+
+    src = next(k for k, v in grid.items() if v and v[0].rc == "2")
+    dst = next(k for k, v in grid.items() if not v and k[1] != 4)
+    ok, _ = eng.try_move(grid, src, dst, confirm_cb=None)
+    assert ok and isinstance(grid[dst], SlotItems) and isinstance(grid[src], SlotItems)
+    for cell in grid.values():
+        assert cell.raw_total(eng.raw_mass_of) == pytest.approx(_fresh(cell)[0])
+        assert cell.product_keys() == _fresh(cell)[1]
+
+
+def test_crowded_slot_checks_are_constant_time():
+    calls = []
+
+    def raw_mass_of(it):
+        calls.append(1)
+        return default_raw_mass_extractor(it)
+
+    cap = TableCapacity(base_per_smoker=[1e12])
+    rule = CapacityByRawRule(capacity=cap, raw_mass_of=raw_mass_of, is_biltong=is_biltong_name)
+    items = [_it("1", 1.0) for _ in range(2000)]
+    incoming = _it("1", 1.0)
+    slot = SlotItems(items)
+
+    assert rule.check(incoming, slot, 1, "move") == rule.check(incoming, items, 1, "move")
+
+    # seznam projde všech 2000 položek při každé kontrole, SlotItems jen jednou
+    calls.clear()
+    for _ in range(200):
+        rule.check(incoming, slot, 1, "move")
+    assert len(calls) <= 200 * 2
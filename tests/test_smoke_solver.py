@@ -0,0 +1,102 @@
+# tests/test_smoke_solver.py
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from services.smoke_engine import build_default_engine
+
+
+@dataclass
+class _It:
+    rc: str
+    sk: str
+    name: str
+    qty: float
+    unit: str
+    source_id: str = ""
+    meat_type: Optional[str] = None
+
+
+def _engine():
+    return build_default_engine(base_per_smoker=[400.0, 300.0, 300.0, 400.0])
+
+
+def _placed(grid, name):
+    return sum(it.qty for cell in grid.values() for it in cell if it.name == name)
+
+
+def test_solver_places_what_greedy_leaves_out():
+    # 1 den, 1 řádek: udírny 1..3 mají 400/300/300, #4 je pro biltong.
+    # Greedy dá 600 do #1+#2 a na 400 zbude jen #3 (300) → 100 nenaplánováno.
+    # Optimum: 400 do #1, 600 do #2+#3.
+    eng = _engine()
+    items = [_It("1", "300", "Krkovice", 600.0, "kg"), _It("2", "300", "Šunka", 400.0, "kg")]
+
+    res = eng.solve(items, days=1, smokers=4, rows=1, time_budget_s=5.0, seed=1)
+
+    assert res.baseline.unplaced_qty == pytest.approx(100.0)
+    assert res.source == "local"
+    assert res.score.unplaced_qty == 0.0 and res.score.splits == 1
+    assert res.improvement > 0
+    assert _placed(res.grid, "Šunka") == pytest.approx(400.0)
+    assert [it.name for it in res.grid[(0, 1, 1)]] == ["Šunka"]
+    assert "Greedy prefill" in res.report()
+
+
+def test_solver_honours_rules():
+    eng = _engine()
+    items = [_It(str(i), "300", f"Polotovar {i}", 150.0 + 70 * i, "kg") for i in range(8)]
+    items += [_It("99", "300", "Biltong hovězí", 250.0, "kg", meat_type="hovezi")]
+
+    res = eng.solve(items, days=3, smokers=4, rows=2, time_budget_s=0.5, seed=3)
+
+    assert res.score.objective <= res.baseline.objective
+    for (d, s, r), cell in res.grid.items():
+        assert len({it.name for it in cell}) <= 1                       # jeden polotovar na slot
+        for it in cell:
+            assert (s == 4) == ("Biltong" in it.name)                   # #4 jen biltong
+            if s != 4:
+                cap = eng.capacity.capacity_for(s, it.meat_type)
+                assert it.qty <= cap + 1e-9                             # kapacita slotu
+    # nic se nenaplánuje víc, než je poptávka
+    for it in items:
+        assert _placed(res.grid, it.name) <= it.qty + 1e-9
+
+
+def test_solver_with_short_budget_falls_back_to_greedy():
+    eng = _engine()
+    items = [_It("1", "300", "Krkovice", 200.0, "kg")]
+    res = eng.solve(items, days=2, smokers=4, rows=2, time_budget_s=0.2)
+
+    # greedy je tu optimální → vrací jeho grid
+    assert res.source == "greedy" and res.score == res.baseline
+    assert res.score.unplaced_qty == 0.0 and res.score.splits == 0
+
+
+def test_plan_window_returns_solver_report_instead_of_printing(monkeypatch, capsys):
+    import gui.smoke_plan_window as spw
+
+    items = [spw.Item(rc="1", sk="300", name="Krkovice", qty=200.0, unit="kg", source_id="")]
+    monkeypatch.setenv("FG_SMOKE_SOLVER", "local")
+    monkeypatch.setenv("FG_SMOKE_SOLVER_BUDGET_S", "0.1")
+    grid, report = spw._prefill_with_rules(items)
+
+    assert report.startswith("Solver (") and sum(len(c) for c in grid.values()) == 1
+    assert capsys.readouterr().out == ""
+
+    monkeypatch.delenv("FG_SMOKE_SOLVER")
+    assert spw._prefill_with_rules(items)[1] == ""
+
+
+def test_plan_window_ignores_malformed_solver_budget(monkeypatch):
+    import gui.smoke_plan_window as spw
+
+    budgets = []
+    monkeypatch.setattr(spw.RULES_ENGINE, "solve", lambda *a, time_budget_s, **k: budgets.append(time_budget_s)
+                        or type("R", (), {"grid": {}, "report": lambda self: "Solver ()"})())
+    monkeypatch.setenv("FG_SMOKE_SOLVER", "local")
+    for raw in ("abc", "-1", "nan", "0.5"):
+        monkeypatch.setenv("FG_SMOKE_SOLVER_BUDGET_S", raw)
+        spw._prefill_with_rules([])
+    assert budgets == [2.0, 2.0, 2.0, 0.5]
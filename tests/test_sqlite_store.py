@@ -0,0 +1,116 @@
+# tests/test_sqlite_store.py
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from services.data_loader import nacti_data
+from services.graph_builder import build_nodes_from_recipes_columnar, expand_plan_to_demands
+from services.graph_model import Graph, Node, Edge, Demand
+from services.projections.ingredients_projection import to_ingredients_df
+from services.projections.semis_projection import to_semis_dfs
+from services.sqlite_store import SqliteStore
+
+D1, D2 = date(2025, 5, 12), date(2025, 5, 13)
+
+
+def _by_demand(df):
+    # SQL řadí detaily podle klíče požadavku (datum, výrobek); v rámci klíče pořadí zůstává
+    if "vyrobek_sk" not in df.columns:
+        return df.reset_index(drop=True)
+    return df.sort_values(["datum", "vyrobek_sk", "vyrobek_rc"], kind="stable").reset_index(drop=True)
+
+
+def _assert_same_projections(g, db):
+    pd.testing.assert_frame_equal(db.ingredients_df(), to_ingredients_df(g))
+    for got, exp in zip(db.semis_dfs(), to_semis_dfs(g)):
+        pd.testing.assert_frame_equal(_by_demand(got), _by_demand(exp))
+
+
+def test_sql_projections_match_pandas_on_shipped_data(tmp_path, monkeypatch):
+    recepty, plan = nacti_data()
+    nodes = build_nodes_from_recipes_columnar(recepty)
+    g = Graph(nodes=nodes, demands=expand_plan_to_demands(plan, nodes))
+
+    db = SqliteStore(tmp_path / "planovac.sqlite")
+    db.sync_graph(g)
+    _assert_same_projections(g, db)
+
+
+def test_sync_writes_only_changed_rows(tmp_path):
+    def graph(qty):
+        nodes = {
+            (400, 1): Node((400, 1), "Klobása", edges=[Edge((300, 5), 1.0), Edge((100, 1), 2.0)]),
+            (300, 5): Node((300, 5), "Směs", unit="kg", edges=[Edge((100, 1), 0.5)]),
+            (100, 1): Node((100, 1), "Sůl", unit="kg"),
+        }
+        return Graph(nodes=nodes, demands=[Demand((D1, 400, 1), (400, 1), 2.0), Demand((D2, 400, 1), (400, 1), qty)])
+
+    db = SqliteStore(tmp_path / "planovac.sqlite")
+    first = db.sync_graph(graph(1.0))
+    assert first["nodes"] == 3 and first["demands"] == 2
+
+    assert sum(db.sync_graph(graph(1.0)).values()) == 0
+    assert db.sync_graph(graph(4.0)) == {"nodes": 0, "edges": 0, "demands": 2, "explosion": 0}  # delete + insert
+    _assert_same_projections(graph(4.0), db)
+
+    # nový řádek na začátku plánu = jeden vložený požadavek, ostatní klíče se neposunou
+    g = graph(4.0)
+    g.demands.insert(0, Demand((date(2025, 5, 11), 400, 1), (400, 1), 1.0))
+    assert db.sync_graph(g) == {"nodes": 0, "edges": 0, "demands": 1, "explosion": 0}
+    _assert_same_projections(g, db)
+
+
+def test_old_demands_table_is_rebuilt(tmp_path):
+    import sqlite3
+    path = tmp_path / "planovac.sqlite"
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE demands (id INTEGER PRIMARY KEY, datum TEXT, sk INTEGER, rc INTEGER, qty REAL)")
+    con.execute("INSERT INTO demands VALUES (0, '2025-05-12', 400, 1, 2.0)")
+    con.commit()
+    con.close()
+
+    db = SqliteStore(path)
+    g = Graph(nodes={(400, 1): Node((400, 1), "Klobása")}, demands=[Demand((D1, 400, 1), (400, 1), 2.0)])
+    assert db.sync_graph(g)["demands"] == 1
+    assert db.conn.execute("SELECT datum, sk, rc, seq, qty FROM demands").fetchall() == [("2025-05-12", 400, 1, 0, 2.0)]
+    db.close()
+
+
+def test_state_table_round_trip(tmp_path):
+    path = tmp_path / "planovac.sqlite"
+    db = SqliteStore(path)
+    assert not db.exists()
+    db.reset({"bought": {(D1, 100, 1)}, "produced": set()})
+    db.append("produced", [(D2, 300, 5)], True)
+    db.append("bought", [(D1, 100, 1)], False)
+    db.close()
+
+    db2 = SqliteStore(path)
+    assert db2.exists()
+    assert db2.replay() == {"bought": set(), "produced": {(D2, 300, 5)}}
+    with pytest.raises(KeyError):
+        db2.append("jine", [(D1, 1, 1)], True)
+
+
+def test_graph_store_closes_replaced_and_disabled_stores(tmp_path, monkeypatch):
+    import services.graph_store as gs
+
+    monkeypatch.setenv("FG_STORE", "sqlite")
+    monkeypatch.setattr(gs, "_DB", None)
+    monkeypatch.setattr(gs.sp, "STATE_DB", tmp_path / "a.sqlite")
+    first = gs._open_db()
+    closed = []
+    monkeypatch.setattr(first, "close", lambda: closed.append("a"))
+
+    # jiná cesta DB → staré spojení se zavře
+    monkeypatch.setattr(gs.sp, "STATE_DB", tmp_path / "b.sqlite")
+    second = gs._open_db()
+    assert second is not first and closed == ["a"]
+
+    # vypnutý backend → zavřít i aktuální
+    second_close = second.close
+    monkeypatch.setattr(second, "close", lambda: closed.append("b") or second_close())
+    monkeypatch.setenv("FG_STORE", "")
+    assert gs._open_db() is None and gs._DB is None and closed == ["a", "b"]
+    first.conn.close()
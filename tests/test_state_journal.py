@@ -0,0 +1,100 @@
+# tests/test_state_journal.py
+from datetime import date
+
+import services.graph_store as gs
+import services.state_journal as sj
+from services.graph_model import Graph, Node
+from services.state_journal import StateJournal
+
+D1, D2 = date(2025, 5, 12), date(2025, 5, 13)
+
+
+def test_append_replay_and_compact(tmp_path):
+    path = tmp_path / "stavy.jsonl"
+    j = StateJournal(path)
+    j.append("bought", [(D1, 100, 1), (D2, 100, 1)], True)
+    j.append("produced", [(D1, 300, 5)], True)
+    j.append("bought", [(D2, 100, 1)], False)
+
+    # poškozený poslední řádek (pád uprostřed zápisu) se přeskočí
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "+", "t": "bou')
+
+    st = StateJournal(path).replay()
+    assert st == {"bought": {(D1, 100, 1)}, "produced": {(D1, 300, 5)}}
+
+    j2 = StateJournal(path)
+    j2.replay()
+    j2.compact()
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+    assert StateJournal(path).replay() == st
+
+
+def test_auto_compaction_keeps_journal_small(tmp_path, monkeypatch):
+    monkeypatch.setattr(sj, "COMPACT_MIN", 10)
+    j = StateJournal(tmp_path / "stavy.jsonl")
+    for i in range(30):
+        j.append("bought", [(D1, 100, 1)], bool(i % 2))
+    assert len(j.path.read_text(encoding="utf-8").splitlines()) <= 10
+    assert StateJournal(j.path).replay()["bought"] == {(D1, 100, 1)}
+
+
+def test_graph_store_journals_flags_and_exports_without_merge(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(gs, "ensure_output_excel", lambda df, **kw: calls.append(kw))
+    monkeypatch.setattr(gs, "_G", Graph(nodes={(100, 1): Node((100, 1), "Sůl")}))
+    monkeypatch.setattr(gs, "_BOUGHT_KEYS", set())
+    monkeypatch.setattr(gs, "_JOURNAL", StateJournal(tmp_path / "stavy.jsonl"))
+
+    gs.set_ingredient_bought("2025-05-12", "100", "1")
+    gs.set_ingredients_bought_many([(D2, 100, 1)])
+    gs.set_ingredient_bought(D1, 100, 1, bought=False)
+
+    assert StateJournal(tmp_path / "stavy.jsonl").replay()["bought"] == {(D2, 100, 1)}
+    assert calls and all(kw == {"merge_old": False} for kw in calls)
+
+
+def test_gui_export_frame_is_persisted_and_journaled(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(gs, "ensure_output_excel", lambda df, **kw: calls.append(df))
+    monkeypatch.setattr(gs, "ensure_output_semis_excel", lambda pre, det, **kw: calls.append((pre, det)))
+    monkeypatch.setattr(gs, "_G", Graph())
+    monkeypatch.setattr(gs, "_BOUGHT_KEYS", set())
+    monkeypatch.setattr(gs, "_PRODUCED_SEMIS_KEYS", set())
+    monkeypatch.setattr(gs, "_JOURNAL", StateJournal(tmp_path / "stavy.jsonl"))
+
+    # okno v režimu „excel“ posílá zobrazenou tabulku; nečíselné RC se přeskočí
+    frame, pre, det = object(), object(), object()
+    gs.set_ingredients_bought_many([(D1, "100", "1"), (D1, "100", "X1")], export=frame)
+    gs.set_semis_produced_many([(D1, "300", "5")], export=(pre, det))
+
+    assert calls == [frame, (pre, det)]
+    assert StateJournal(tmp_path / "stavy.jsonl").replay() == {"bought": {(D1, 100, 1)}, "produced": {(D1, 300, 5)}}
+
+
+def test_startup_trusts_journal_and_reads_excels_only_when_seeding(tmp_path, monkeypatch):
+    path = tmp_path / "stavy.jsonl"
+    j = StateJournal(path)
+    j.append("bought", [(D1, 100, 1)], True)
+    j.append("bought", [(D1, 100, 1)], False)       # odznačeno, Excel se před pádem nestihl zapsat
+    monkeypatch.setattr(gs.sp, "STATE_JOURNAL", path)
+    monkeypatch.delenv("FG_NO_JOURNAL", raising=False)
+    monkeypatch.delenv("FG_STORE", raising=False)
+    monkeypatch.setattr(gs, "_build_graph", Graph)
+    monkeypatch.setattr(gs, "_load_keys_from_excels", lambda: ({(D1, 100, 1)}, {(D1, 300, 5)}))
+    monkeypatch.setattr(gs, "ensure_output_excel", lambda df, **kw: None)
+    monkeypatch.setattr(gs, "ensure_output_semis_excel", lambda pre, det, **kw: None)
+    for name in ("_G", "_JOURNAL", "_DB", "_ING_DF", "_SEMIS_PRE", "_SEMIS_DET", "_BOUGHT_KEYS", "_PRODUCED_SEMIS_KEYS",
+                 "_ING_ROWS", "_SEMIS_ROWS", "_DIRTY_ING", "_DIRTY_SEMIS"):
+        monkeypatch.setattr(gs, name, getattr(gs, name))
+
+    # existující deník je autoritativní – staré True z Excelu odznačení nepřebije
+    gs.init_on_startup()
+    assert gs._BOUGHT_KEYS == set() and gs._PRODUCED_SEMIS_KEYS == set()
+    assert StateJournal(path).replay() == {"bought": set(), "produced": set()}
+
+    # první start bez deníku: True z Excelů se naimportují a deník se jimi založí
+    path.unlink()
+    gs.init_on_startup()
+    assert gs._BOUGHT_KEYS == {(D1, 100, 1)}
+    assert StateJournal(path).replay() == {"bought": {(D1, 100, 1)}, "produced": {(D1, 300, 5)}}
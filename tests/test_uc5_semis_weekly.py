@@ -122,7 +122,7 @@ class CaptureExcelWrites:
         self.writer_opened = False
         self.saved_main = None
         self.saved_det = None
-        self.last_plain_saved = None  # fallback režim v _save_semi_excel
+        self.last_plain_saved = None  # plain ping v ensure_output_semis_excel
         self.saved_by_sheet = {}      # pro ensure_output_semis_excel
         self.ensure_mode = False
 
@@ -148,7 +148,7 @@ class CaptureExcelWrites:
                 self.saved_by_sheet[sheet_name] = df.copy()
                 return None
 
-            # Jinak očekáváme cestu (OUTPUT_SEMI_EXCEL) – to používá _save_semi_excel
+            # Jinak očekáváme cestu (OUTPUT_SEMI_EXCEL) – to používá ensure_output_semis_excel
             if isinstance(path_or_writer, (str, bytes)) or getattr(path_or_writer, "__fspath__", None):
                 self.last_plain_saved = df.copy()
                 return None
@@ -247,7 +247,7 @@ def test_uc5_weekly_grouping_click_marks_all_in_week(monkeypatch, weekly_source_
     # Spusť okno
     semis.open_semis_results()
 
-    # Po kliknutí by _save_semi_excel volal DataFrame.to_excel(...), což jsme zachytili do last_plain_saved
+    # Po kliknutí by ensure_output_semis_excel volal DataFrame.to_excel(...), což jsme zachytili do last_plain_saved
     saved = captured.last_plain_saved
     assert isinstance(saved, pd.DataFrame), "Nebyl zachycen zápis df_main do Excelu."
 
@@ -0,0 +1,110 @@
+# tests/test_xlsx_stream.py
+import tracemalloc
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+import services.excel_service as es
+import services.semi_excel_service as ses
+import services.xlsx_stream as XS
+
+
+def _semis(n):
+    days = [date(2025, 6, 2) + timedelta(days=i % 12) for i in range(n)]
+    main = pd.DataFrame({
+        "datum": days,
+        "polotovar_sk": "300",
+        "polotovar_rc": [str(i // 12) for i in range(n)],
+        "polotovar_nazev": [f"Polotovar {i // 12}" for i in range(n)],
+        "potreba": [1.5 * i for i in range(n)],
+        "jednotka": "kg",
+        "vyrobeno": [i % 3 == 0 for i in range(n)],
+    })
+    det = main.iloc[::2].loc[lambda d: d.index.repeat(2), ["datum", "polotovar_sk", "polotovar_rc", "jednotka"]]
+    det = det.reset_index(drop=True).assign(
+        vyrobek_sk="400", vyrobek_rc=lambda d: [str(i) for i in range(len(d))],
+        vyrobek_nazev="Výrobek", mnozstvi=2.0)
+    return main, det
+
+
+def _cells(path):
+    wb = load_workbook(path)
+    return {name: [[c.value for c in row] for row in wb[name].iter_rows()] for name in wb.sheetnames}
+
+
+def test_semis_stream_matches_openpyxl_output(tmp_path):
+    main, det = _semis(60)
+    main.loc[5, "datum"] = None                      # NaT / prázdné hodnoty
+    main.loc[7, "polotovar_nazev"] = "http://neni-odkaz"
+    for streaming in (False, True):
+        ses.ensure_output_semis_excel(main, det, tmp_path / f"s_{streaming}.xlsx", merge_old=False, streaming=streaming)
+        ses.ensure_output_semis_excel(main, None, tmp_path / f"e_{streaming}.xlsx", merge_old=False, streaming=streaming)
+
+    for name in ("s", "e"):
+        old, new = _cells(tmp_path / f"{name}_False.xlsx"), _cells(tmp_path / f"{name}_True.xlsx")
+        assert list(new) == ["Prehled", "Detaily", "Polotovary"]
+        assert new == old
+    assert _cells(tmp_path / "e_True.xlsx")["Detaily"] == [ses.DETAIL_COLS]
+
+
+def test_stream_output_is_read_back_for_merge(tmp_path):
+    out = tmp_path / "polotovary.xlsx"
+    main, det = _semis(12)
+    main["vyrobeno"] = False
+    main.loc[3, "vyrobeno"] = True
+    ses.ensure_output_semis_excel(main, det, out, streaming=True)
+
+    main["vyrobeno"] = False                         # staré True se musí zachovat (OR merge)
+    ses.ensure_output_semis_excel(main, det, out, streaming=True)
+    pre = pd.read_excel(out, sheet_name="Prehled")
+    assert pre["vyrobeno"].tolist() == [i == 3 for i in range(12)]
+
+
+def test_ingredients_stream_matches_and_env_flag(tmp_path, monkeypatch):
+    df = pd.DataFrame({
+        "datum": [date(2025, 6, 2), date(2025, 6, 3), None],
+        "ingredience_sk": [100, 100.0, "200"],
+        "ingredience_rc": ["7", 8, 9.0],
+        "nazev": ["Sůl", "Pepř", "Česnek"],
+        "potreba": [1.25, np.nan, 3],
+        "jednotka": ["kg", "kg", "ks"],
+        "koupeno": [True, "ne", "x"],
+    })
+    es.ensure_output_excel_generic(df, tmp_path / "a.xlsx", merge_old=False)
+    calls = []
+    real = XS.write_sheets
+    monkeypatch.setattr(XS, "write_sheets", lambda *a: calls.append(1) or real(*a))
+    monkeypatch.setenv("FG_XLSX_STREAM", "1")
+    es.ensure_output_excel_generic(df, tmp_path / "b.xlsx", merge_old=False)
+
+    assert calls == [1]
+    assert _cells(tmp_path / "b.xlsx") == _cells(tmp_path / "a.xlsx")
+    # explicitní parametr má přednost před proměnnou prostředí
+    es.ensure_output_excel_generic(df, tmp_path / "c.xlsx", merge_old=False, streaming=False)
+    assert calls == [1]
+
+
+def test_stream_memory_does_not_grow_with_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(XS, "CHUNK_ROWS", 500)
+
+    def peak(n):
+        df = pd.DataFrame({"datum": [date(2025, 1, 1) + timedelta(days=i % 30) for i in range(n)],
+                           "nazev": [f"Položka {i}" for i in range(n)], "potreba": np.arange(n, dtype=float)})
+        tracemalloc.start()
+        XS.write_sheets(tmp_path / f"m{n}.xlsx", [XS.frame_sheet("Sheet1", df)])
+        _, top = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return top
+
+    small, large = peak(2_000), peak(16_000)
+    assert large < 1.5 * small
+
+
+def test_stream_matches_three_pass_write_on_large_plan(tmp_path):
+    main, det = _semis(1_500)
+    ses.ensure_output_semis_excel(main, det, tmp_path / "old.xlsx", merge_old=False, streaming=False)
+    ses.ensure_output_semis_excel(main, det, tmp_path / "new.xlsx", merge_old=False, streaming=True)
+
+    assert _cells(tmp_path / "new.xlsx") == _cells(tmp_path / "old.xlsx")
@@ -0,0 +1,24 @@
+# tools/_bench.py
+# -*- coding: utf-8 -*-
+"""Společné pro benchmarky v tools/: kořen projektu do sys.path + měření best-of-N."""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def best_of(fn, repeat: int, setup=None):
+    """(výsledek, nejlepší čas v s) z `repeat` běhů; `setup` se volá před každým během mimo měření."""
+    best, out = float("inf"), None
+    for _ in range(max(1, repeat)):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
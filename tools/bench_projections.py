@@ -0,0 +1,49 @@
+# tools/bench_projections.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark projekcí kusovníku: původní smyčka přes požadavky × hrany vs. CSR matice (bom_matrix).
+
+Spuštění z kořene projektu (mimo pytest, nic nezapisuje):
+    python tools/bench_projections.py [--demands 10000] [--repeat 3]
+
+Graf i referenční smyčka jsou tytéž jako v tests/test_bom_matrix.py; výsledky se navíc
+porovnají (při neshodě skript skončí chybou), takže benchmark neměří dvě různé věci.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+import numpy as np
+
+from _bench import best_of  # přidá i kořen projektu do sys.path
+from services.projections.ingredients_projection import to_ingredients_df
+from services.projections.semis_projection import to_semis_dfs
+from tests.test_bom_matrix import _loop_ingredients, _synthetic_graph
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--demands", type=int, default=10_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    g = _synthetic_graph(n_demands=args.demands)
+    ref, t_loop = best_of(lambda: _loop_ingredients(g), args.repeat)
+    df, t_csr = best_of(lambda: to_ingredients_df(g), args.repeat)
+    _, t_semis = best_of(lambda: to_semis_dfs(g), args.repeat)
+
+    got = {(r.datum, (r.ingredience_sk, r.ingredience_rc)): r.potreba for r in df.itertuples()}
+    if got.keys() != ref.keys() or not np.allclose([got[k] for k in ref], [ref[k] for k in ref], rtol=1e-9):
+        print("CHYBA: CSR projekce se liší od referenční smyčky", file=sys.stderr)
+        return 1
+
+    print(f"{len(g.demands)} požadavků, {len(g.nodes)} uzlů, {len(df)} řádků ingrediencí")
+    print(f"  ingredience – smyčka: {t_loop * 1000:8.0f} ms")
+    print(f"  ingredience – CSR:    {t_csr * 1000:8.0f} ms  ({t_loop / t_csr:.1f}×)")
+    print(f"  polotovary  – CSR:    {t_semis * 1000:8.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# tools/bench_readiness.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark readiness: vyhodnocení per požadavek (bez memo) vs. memo per finál (services/readiness).
+
+Spuštění z kořene projektu (mimo pytest):
+    python tools/bench_readiness.py [--finals 40] [--days 300] [--repeat 3]
+
+Plán má stovky požadavků na každý finál (graf i reference jako v tests/test_readiness_memo.py).
+„memo – studené“ = první výpočet po změně stavů, „memo – teplé“ = opakované čtení bez změny.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from _bench import best_of  # přidá i kořen projektu do sys.path
+from services.readiness import compute_ready_pack, compute_ready_semis_under_finals
+from tests.test_readiness_memo import _plan_graph, _reference
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--finals", type=int, default=40)
+    ap.add_argument("--days", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    g = _plan_graph(n_finals=args.finals, days_per_final=args.days)
+
+    def both():
+        return compute_ready_semis_under_finals(g), compute_ready_pack(g)
+
+    ref, t_ref = best_of(lambda: _reference(g), args.repeat)
+    cold, t_cold = best_of(both, args.repeat, setup=g.bump_state)
+    warm, t_warm = best_of(both, args.repeat)
+    if not (ref == cold == warm):
+        print("CHYBA: memo readiness se liší od reference", file=sys.stderr)
+        return 1
+
+    print(f"{len(g.demands)} požadavků ({args.days} na finál), {args.finals} finálů")
+    print(f"  bez memo:       {t_ref * 1000:8.1f} ms")
+    print(f"  memo – studené: {t_cold * 1000:8.1f} ms  ({t_ref / t_cold:.1f}×)")
+    print(f"  memo – teplé:   {t_warm * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# tools/bench_semis_weekly.py
+# -*- coding: utf-8 -*-
+"""
+Benchmark týdenní agregace polotovarů: maska přes celý zdroj per skupina vs. _weekly_groups (groupby).
+
+Spuštění z kořene projektu (mimo pytest):
+    python tools/bench_semis_weekly.py [--rows 10000] [--semis 120] [--repeat 3]
+
+Plán i referenční maska jsou tytéž jako v tests/test_semis_weekly_groups.py; mapování skupin
+na zdrojové řádky se porovná (při neshodě skript skončí chybou).
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from _bench import best_of  # přidá i kořen projektu do sys.path
+import gui.results_semis_window as rsw
+from tests.test_semis_weekly_groups import _mask_reference, _plan
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--semis", type=int, default=120)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    df = _plan(args.rows, n_semis=args.semis)
+    ref, t_mask = best_of(lambda: _mask_reference(df, "vyrobeno"), args.repeat)
+    (groups, src), t_groups = best_of(lambda: rsw._weekly_groups(df, "vyrobeno"), args.repeat)
+    if [list(map(int, s)) for s in src] != ref:
+        print("CHYBA: _weekly_groups mapuje skupiny jinak než maska", file=sys.stderr)
+        return 1
+
+    print(f"{len(df)} řádků plánu, {len(groups)} týdenních skupin")
+    print(f"  maska per skupina: {t_mask * 1000:8.0f} ms")
+    print(f"  groupby:           {t_groups * 1000:8.0f} ms  ({t_mask / t_groups:.0f}×)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())